@@ -0,0 +1,198 @@
+import mmap
+import select
+import socket
+import struct
+import logging
+from packet_parser import parse_frame, LINKTYPE_ETHERNET
+
+# Konstantet e Linux për socket-et AF_PACKET (linux/if_packet.h)
+SOL_PACKET = 263
+PACKET_RX_RING = 5
+PACKET_STATISTICS = 6
+PACKET_VERSION = 10
+TPACKET_V3 = 2
+ETH_P_ALL = 0x0003
+
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+
+# struct tpacket_req3
+TPACKET_REQ3 = struct.Struct('=IIIIIII')
+# struct tpacket_block_desc + tpacket_hdr_v1 (deri te offset_to_first_pkt)
+BLOCK_HEADER = struct.Struct('=IIIII')
+BLOCK_STATUS = struct.Struct('=I')
+BLOCK_STATUS_OFFSET = 8
+# struct tpacket3_hdr (deri te tp_net)
+PACKET_HEADER = struct.Struct('=IIIIIIHH')
+# struct tpacket_stats_v3
+PACKET_STATS_V3 = struct.Struct('=III')
+
+# Unaza e paracaktuar: 8 blloqe x 1 MiB memorie e kyçur, e mjaftueshme për një host personal
+RING_BLOCK_SIZE = 1 << 20
+RING_BLOCKS = 8
+
+def iter_block_packets(ring, block_offset, linktype=LINKTYPE_ETHERNET):
+    """Lexo paketat e një blloku TPACKET_V3 direkt nga buffer-i, pa kopjuar payload-in"""
+    _, _, _, num_pkts, offset = BLOCK_HEADER.unpack_from(ring, block_offset)
+    view = memoryview(ring)
+    try:
+        for _ in range(num_pkts):
+            position = block_offset + offset
+            next_offset, sec, nsec, snaplen, wire_len, _, mac, _ = PACKET_HEADER.unpack_from(ring, position)
+            frame = view[position + mac:position + mac + snaplen]
+            try:
+                yield parse_frame(frame, linktype, sec + nsec / 1e9, wire_len)
+            finally:
+                frame.release()
+            if next_offset == 0:
+                break
+            offset += next_offset
+    finally:
+        view.release()
+
+def fill_block(ring, block_offset, block_size, frames, timestamp=0.0, snaplen=None):
+    """Shkruaj korniza në një bllok në formatin e kernelit (për riprodhim në teste dhe benchmark)"""
+    header_size = 48
+    packet_header_size = 48
+    sec = int(timestamp)
+    nsec = int((timestamp - sec) * 1e9)
+
+    records = []
+    offset = header_size
+    for frame in frames:
+        wire_len = len(frame)
+        if snaplen is not None:
+            # Si kerneli: kopjohen vetëm snaplen bajtet e para, tp_len mban gjatësinë në rrjet
+            frame = frame[:snaplen]
+        # Kerneli i rreshton regjistrimet në 16 bajte
+        record_size = (packet_header_size + len(frame) + 15) & ~15
+        if offset + record_size > block_size:
+            break
+        records.append((offset, record_size, frame, wire_len))
+        offset += record_size
+
+    for i, (offset, record_size, frame, wire_len) in enumerate(records):
+        next_offset = record_size if i < len(records) - 1 else 0
+        PACKET_HEADER.pack_into(
+            ring, block_offset + offset,
+            next_offset, sec, nsec, len(frame), wire_len, TP_STATUS_USER, packet_header_size, 0
+        )
+        start = block_offset + offset + packet_header_size
+        ring[start:start + len(frame)] = frame
+
+    BLOCK_HEADER.pack_into(ring, block_offset, 1, 0, TP_STATUS_USER, len(records), header_size)
+    return len(records)
+
+class AfPacketCapture:
+    """Kapje me AF_PACKET dhe unazë TPACKET_V3 të mmap-uar, me lexim minimal të kokave"""
+
+    def __init__(self, callback, interface=None, block_size=RING_BLOCK_SIZE, block_count=RING_BLOCKS,
+                 frame_size=2048, block_timeout_ms=60, poll_timeout_ms=200):
+        self.callback = callback
+        self.interface = interface
+        self.block_size = block_size
+        self.block_count = block_count
+        self.frame_size = frame_size
+        self.block_timeout_ms = block_timeout_ms
+        self.poll_timeout_ms = poll_timeout_ms
+        self.sock = None
+        self.ring = None
+        self.running = False
+        self.stats = {
+            'packets': 0,
+            'skipped': 0,
+            'blocks': 0,
+            'kernel_packets': 0,
+            'kernel_drops': 0
+        }
+
+    def open(self):
+        """Krijo socket-in dhe unazën e përbashkët me kernelin"""
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            self.sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+            request = TPACKET_REQ3.pack(
+                self.block_size,
+                self.block_count,
+                self.frame_size,
+                (self.block_size // self.frame_size) * self.block_count,
+                self.block_timeout_ms,
+                0,
+                0
+            )
+            self.sock.setsockopt(SOL_PACKET, PACKET_RX_RING, request)
+            self.ring = mmap.mmap(
+                self.sock.fileno(),
+                self.block_size * self.block_count,
+                mmap.MAP_SHARED,
+                mmap.PROT_READ | mmap.PROT_WRITE
+            )
+            if self.interface:
+                self.sock.bind((self.interface, 0))
+        except Exception:
+            self.close()
+            raise
+        logging.info(
+            f"Kapja AF_PACKET u nis ({self.interface or 'të gjitha ndërfaqet'}, "
+            f"{self.block_count} blloqe x {self.block_size // 1024} KiB)"
+        )
+
+    def close(self):
+        """Liro unazën dhe socket-in"""
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        """Cikli i kapjes: pret blloqet e mbushura nga kerneli dhe i kthen pas leximit"""
+        if self.ring is None:
+            self.open()
+        self.running = True
+        poller = select.poll()
+        poller.register(self.sock.fileno(), select.POLLIN | select.POLLERR)
+        block = 0
+        try:
+            while self.running:
+                block_offset = block * self.block_size
+                status, = BLOCK_STATUS.unpack_from(self.ring, block_offset + BLOCK_STATUS_OFFSET)
+                if not status & TP_STATUS_USER:
+                    poller.poll(self.poll_timeout_ms)
+                    continue
+
+                self.process_block(block_offset)
+                # Ktheja bllokun kernelit
+                BLOCK_STATUS.pack_into(self.ring, block_offset + BLOCK_STATUS_OFFSET, TP_STATUS_KERNEL)
+                block = (block + 1) % self.block_count
+        finally:
+            self.update_kernel_stats()
+            self.close()
+
+    def process_block(self, block_offset):
+        """Kalo çdo paketë të bllokut te callback-u"""
+        self.stats['blocks'] += 1
+        for info in iter_block_packets(self.ring, block_offset):
+            if info is None:
+                self.stats['skipped'] += 1
+                continue
+            self.stats['packets'] += 1
+            self.callback(info)
+
+    def update_kernel_stats(self):
+        """Lexo numëruesit e kernelit për paketat e marra dhe të humbura"""
+        if self.sock is None:
+            return
+        try:
+            packets, drops, _ = PACKET_STATS_V3.unpack(
+                self.sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, PACKET_STATS_V3.size)
+            )
+            # Kerneli i rivendos numëruesit pas çdo leximi
+            self.stats['kernel_packets'] += packets
+            self.stats['kernel_drops'] += drops
+        except OSError:
+            pass
@@ -0,0 +1,97 @@
+import threading
+import time
+import logging
+import numpy as np
+
+class SampleRingBuffer:
+    """Buffer rrethor i para-alokuar për shembujt e trajnimit (karakteristika të pa-shkallëzuara)"""
+
+    def __init__(self, capacity=1000, n_features=10):
+        self.capacity = max(1, int(capacity))
+        self.features = np.zeros((self.capacity, n_features), dtype=np.float64)
+        self.labels = np.zeros(self.capacity, dtype=np.float32)
+        self.position = 0
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def add(self, features, label):
+        """Shto një shembull duke mbishkruar më të vjetrin kur buffer-i është plot"""
+        with self.lock:
+            self.features[self.position] = features
+            self.labels[self.position] = 1.0 if label else 0.0
+            self.position = (self.position + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+
+    def snapshot(self):
+        """Kthe një kopje të shembujve aktualë (X, y) për trajnim"""
+        with self.lock:
+            return self.features[:self.size].copy(), self.labels[:self.size].copy()
+
+class BackgroundTrainer:
+    """Trajnon modelin në sfond dhe publikon një model të ri inference pa ndalur pikëzimin"""
+
+    def __init__(self, analyzer, min_new_samples=32, interval=30.0, epochs=1):
+        self.analyzer = analyzer
+        self.min_new_samples = max(1, int(min_new_samples))
+        self.interval = interval
+        self.epochs = epochs
+        self.new_samples = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = False
+        self.worker = None
+        self.stats = {
+            'samples': 0,
+            'fits': 0,
+            'failed_fits': 0,
+            'last_fit_seconds': 0.0,
+            'last_fit_samples': 0
+        }
+
+    def start(self):
+        """Nis thread-in e trajnimit"""
+        self.running = True
+        self.worker = threading.Thread(target=self.run, name="BackgroundTrainer", daemon=True)
+        self.worker.start()
+
+    def stop(self, timeout=5.0):
+        """Ndalo thread-in e trajnimit"""
+        self.running = False
+        self.wakeup.set()
+        if self.worker is not None:
+            self.worker.join(timeout)
+            self.worker = None
+
+    def add_sample(self, features, is_suspicious):
+        """Shto rreshtin e karakteristikave të pikëzuara si shembull, pa bllokuar rrugën e paketave"""
+        # I njëjti rresht që pikëzoi modeli; buffer-i e kopjon, kështu që grupi mund të ripërdoret
+        self.analyzer.history.add(features, is_suspicious)
+        with self.lock:
+            self.new_samples += 1
+            self.stats['samples'] += 1
+            if self.new_samples >= self.min_new_samples:
+                self.wakeup.set()
+
+    def run(self):
+        """Trajno periodikisht ose pasi të mblidhen mjaftueshëm shembuj të rinj"""
+        while self.running:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            if not self.running:
+                break
+            with self.lock:
+                new_samples = self.new_samples
+                self.new_samples = 0
+            if new_samples == 0:
+                continue
+
+            started = time.monotonic()
+            if self.analyzer.fit_history(self.epochs):
+                self.stats['fits'] += 1
+                self.stats['last_fit_samples'] = len(self.analyzer.history)
+                self.stats['last_fit_seconds'] = time.monotonic() - started
+            else:
+                self.stats['failed_fits'] += 1
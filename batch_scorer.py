@@ -0,0 +1,199 @@
+import threading
+import time
+import logging
+from collections import deque
+import numpy as np
+
+class PacketBatch:
+    """Grup kolonar i para-alokuar: një rresht karakteristikash dhe një kontekst për çdo paketë"""
+
+    def __init__(self, capacity, n_features):
+        self.capacity = capacity
+        self.features = np.zeros((capacity, n_features), dtype=np.float64)
+        self.enqueued = np.zeros(capacity, dtype=np.float64)
+        self.callbacks = [None] * capacity
+        self.contexts = [None] * capacity
+        self.size = 0
+
+    def append(self, values, callback, context, now):
+        """Shkruaj rreshtin direkt në matricë; kthen True kur grupi mbushet"""
+        index = self.size
+        self.features[index] = values
+        self.enqueued[index] = now
+        self.callbacks[index] = callback
+        self.contexts[index] = context
+        self.size = index + 1
+        return self.size >= self.capacity
+
+    def view(self):
+        """Rreshtat e mbushur të matricës, pa kopjim"""
+        return self.features[:self.size]
+
+    def clear(self):
+        # Lësho referencat që kontekstet e paketave të mos mbahen gjallë pa nevojë
+        for index in range(self.size):
+            self.callbacks[index] = None
+            self.contexts[index] = None
+        self.size = 0
+
+class BatchScoringEngine:
+    """Grumbullon karakteristikat e paketave në grupe kolonare dhe i pikëzon me një kalim të vetëm të modelit"""
+
+    def __init__(self, analyzer, max_batch_size=64, max_delay=0.005, max_queue_size=10000, metrics=None):
+        self.analyzer = analyzer
+        self.metrics = metrics
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_delay = max(0.0, float(max_delay))
+        self.max_queue_size = max(self.max_batch_size, int(max_queue_size))
+        # Të gjitha grupet alokohen një herë; pas pikëzimit kthehen te grupet e lira
+        batch_count = -(-self.max_queue_size // self.max_batch_size)
+        n_features = len(analyzer.feature_keys)
+        self.free = [PacketBatch(self.max_batch_size, n_features) for _ in range(batch_count)]
+        self.filling = None
+        self.ready = deque()
+        self.depth = 0
+        self.condition = threading.Condition()
+        self.running = False
+        self.worker = None
+        self.stats = {
+            'submitted': 0,
+            'scored': 0,
+            'dropped': 0,
+            'batches': 0,
+            'full_batches': 0,
+            'deadline_batches': 0,
+            'max_batch_size': 0,
+            'last_batch_size': 0,
+            'inference_seconds': 0.0,
+            'callback_errors': 0
+        }
+
+    def start(self):
+        """Nis thread-in e pikëzimit"""
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.worker = threading.Thread(target=self.run, name="BatchScoringEngine", daemon=True)
+        self.worker.start()
+        logging.info(
+            f"Motori i pikëzimit në grupe u nis (madhësia: {self.max_batch_size}, "
+            f"afati: {self.max_delay * 1000:.1f} ms)"
+        )
+
+    def stop(self, timeout=2.0):
+        """Ndalo thread-in e pikëzimit pasi të përpunohen paketat në pritje"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.worker is not None:
+            self.worker.join(timeout)
+            self.worker = None
+
+    def submit(self, values, callback, context=None):
+        """Shkruaj rreshtin e karakteristikave në grup; thirret callback(context, score, features)"""
+        with self.condition:
+            batch = self.filling
+            if batch is None:
+                if not self.free:
+                    self.stats['dropped'] += 1
+                    return False
+                batch = self.filling = self.free.pop()
+            if batch.append(values, callback, context, time.monotonic()):
+                self.ready.append(batch)
+                self.filling = None
+                self.stats['full_batches'] += 1
+                self.condition.notify()
+            elif batch.size == 1:
+                self.condition.notify()
+            self.depth += 1
+            self.stats['submitted'] += 1
+        return True
+
+    def queue_depth(self):
+        """Numri i paketave që presin pikëzimin"""
+        return self.depth
+
+    def get_stats(self):
+        """Kthe statistikat e radhës dhe të madhësisë së grupeve"""
+        with self.condition:
+            stats = dict(self.stats)
+            stats['queue_depth'] = self.depth
+        stats['avg_batch_size'] = stats['scored'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+    def next_batch(self):
+        """Prit derisa të mbushet një grup ose të skadojë afati i paketës më të vjetër"""
+        with self.condition:
+            while True:
+                if self.ready:
+                    batch = self.ready.popleft()
+                    break
+                batch = self.filling
+                if batch is not None:
+                    remaining = batch.enqueued[0] + self.max_delay - time.monotonic()
+                    if remaining <= 0 or not self.running:
+                        self.filling = None
+                        self.stats['deadline_batches'] += 1
+                        break
+                    self.condition.wait(remaining)
+                elif not self.running:
+                    return None
+                else:
+                    self.condition.wait()
+
+            self.depth -= batch.size
+            return batch
+
+    def release(self, batch):
+        """Kthe grupin te grupet e lira për ta ripërdorur"""
+        batch.clear()
+        with self.condition:
+            self.free.append(batch)
+
+    def run(self):
+        """Cikli kryesor i pikëzimit"""
+        while True:
+            batch = self.next_batch()
+            if batch is None:
+                break
+            try:
+                self.score_batch(batch)
+            finally:
+                self.release(batch)
+
+    def score_batch(self, batch):
+        """Pikëzo një grup dhe ktheja çdo rezultat te rruga e vendimit të paketës së vet"""
+        features = batch.view()
+        size = batch.size
+        metrics = self.metrics
+        if metrics is not None and metrics.enabled:
+            # Koha në radhë e secilës paketë deri te fillimi i pikëzimit
+            for wait in (time.monotonic() - batch.enqueued[:size]).tolist():
+                metrics.observe('queue_wait', wait)
+
+        started = time.perf_counter()
+        scores = self.analyzer.analyze_matrix(features).tolist()
+        elapsed = time.perf_counter() - started
+        if metrics is not None:
+            metrics.observe('inference', elapsed)
+
+        with self.condition:
+            self.stats['inference_seconds'] += elapsed
+            self.stats['batches'] += 1
+            self.stats['scored'] += size
+            self.stats['last_batch_size'] = size
+            self.stats['max_batch_size'] = max(self.stats['max_batch_size'], size)
+
+        callbacks = batch.callbacks
+        contexts = batch.contexts
+        for index, score in enumerate(scores):
+            try:
+                started = metrics.now() if metrics is not None else None
+                # Rreshti është pamje e grupit: kush e mban pas callback-ut duhet ta kopjojë
+                callbacks[index](contexts[index], score, features[index])
+                if started is not None:
+                    metrics.lap('decision', started)
+            except Exception as e:
+                self.stats['callback_errors'] += 1
+                logging.error(f"Gabim gjatë trajtimit të rezultatit të pikëzimit: {e}")
@@ -0,0 +1,145 @@
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flow_table import FlowTable, PROTO_TCP, packet_feature_row
+from packet_parser import PacketInfo
+from batch_scorer import PacketBatch
+from ml_analyzer import NetworkBehaviorAnalyzer
+
+def synthetic_packets(count, flows=256, seed=1):
+    """Paketa TCP sintetike të shpërndara në një numër të kufizuar lidhjesh"""
+    rng = random.Random(seed)
+    packets = []
+    now = 1000.0
+    for _ in range(count):
+        flow = rng.randrange(flows)
+        now += rng.expovariate(10000)
+        packets.append(PacketInfo(
+            now, f"10.0.{flow // 256}.{flow % 256}", "192.168.1.10", 40000 + flow, 443, PROTO_TCP,
+            rng.randint(60, 1500), 64, 65535, 0x18
+        ))
+    return packets
+
+def legacy_features(flow, info):
+    """Rruga e mëparshme: një dict i ri për çdo paketë"""
+    time_delta = flow.duration()
+    packet_rate = flow.packet_count / time_delta if time_delta > 0 else 0
+    return {
+        'packet_size': info.length,
+        'protocol': 1 if info.proto == PROTO_TCP else 2,
+        'src_port': info.sport,
+        'dst_port': info.dport,
+        'ttl': info.ttl,
+        'window_size': info.window_size,
+        'tcp_flags': info.tcp_flags,
+        'time_delta': time_delta,
+        'packet_rate': packet_rate,
+        'connection_duration': time_delta
+    }
+
+def handle_score(context, score, features):
+    pass
+
+def run_legacy(analyzer, packets, batch_size):
+    """Dict për paketë, tuple + lambda në radhë, matrica ndërtohet nga dict-et gjatë pikëzimit"""
+    flow_table = FlowTable()
+    queue = deque()
+    for info in packets:
+        flow = flow_table.update(info.flow_key(), info.length, now=info.timestamp)
+        packet_data = legacy_features(flow, info)
+        queue.append((time.monotonic(), packet_data, lambda score, info=info, packet_data=packet_data: None))
+        if len(queue) >= batch_size:
+            batch = [queue.popleft() for _ in range(batch_size)]
+            scores = analyzer.analyze_batch([packet_data for _, packet_data, _ in batch])
+            for (_, _, callback), score in zip(batch, scores):
+                callback(score)
+
+def run_columnar(analyzer, packets, batch_size):
+    """Rreshti shkruhet direkt në grupin e para-alokuar, pikëzimi bëhet mbi matricën"""
+    flow_table = FlowTable()
+    batch = PacketBatch(batch_size, len(analyzer.feature_keys))
+    for info in packets:
+        flow = flow_table.update(info.flow_key(), info.length, now=info.timestamp)
+        if batch.append(packet_feature_row(flow, info), handle_score, info, time.monotonic()):
+            features = batch.view()
+            scores = analyzer.analyze_matrix(features).tolist()
+            for index, score in enumerate(scores):
+                batch.callbacks[index](batch.contexts[index], score, features[index])
+            batch.clear()
+
+def retained_blocks(analyzer, packets, batch_size, columnar):
+    """Blloqet e memories që mban çdo paketë në pritje të pikëzimit"""
+    flow_table = FlowTable()
+    for info in packets[:batch_size]:
+        flow_table.update(info.flow_key(), info.length, now=info.timestamp)
+    gc.collect()
+    if columnar:
+        batch = PacketBatch(batch_size, len(analyzer.feature_keys))
+        before = sys.getallocatedblocks()
+        for info in packets[:batch_size]:
+            flow = flow_table.get(info.flow_key())
+            batch.append(packet_feature_row(flow, info), handle_score, info, time.monotonic())
+    else:
+        queue = deque()
+        before = sys.getallocatedblocks()
+        for info in packets[:batch_size]:
+            flow = flow_table.get(info.flow_key())
+            packet_data = legacy_features(flow, info)
+            queue.append((time.monotonic(), packet_data, lambda score, info=info, packet_data=packet_data: None))
+    return (sys.getallocatedblocks() - before) / batch_size
+
+def measure(name, run, analyzer, packets, batch_size, columnar):
+    run(analyzer, packets[:batch_size * 4], batch_size)
+
+    gc.disable()
+    started = time.perf_counter()
+    run(analyzer, packets, batch_size)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    run(analyzer, packets, batch_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.enable()
+
+    return {
+        'path': name,
+        'packets': len(packets),
+        'retained_blocks_per_packet': round(retained_blocks(analyzer, packets, batch_size, columnar), 2),
+        'peak_bytes_per_batch': peak,
+        'us_per_packet': round(elapsed / len(packets) * 1e6, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Alokimet për paketë: dict kundrejt grupit kolonar')
+    parser.add_argument('--packets', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--output', help='Skedari JSON i rezultateve')
+    args = parser.parse_args()
+
+    analyzer = NetworkBehaviorAnalyzer()
+    packets = synthetic_packets(args.packets)
+    results = [
+        measure('dict', run_legacy, analyzer, packets, args.batch_size, False),
+        measure('columnar', run_columnar, analyzer, packets, args.batch_size, True)
+    ]
+    for result in results:
+        print(
+            f"{result['path']:>9}: {result['retained_blocks_per_packet']:6.2f} blloqe/paketë në radhë, "
+            f"kulmi {result['peak_bytes_per_batch'] / 1024:8.1f} KiB, {result['us_per_packet']:7.3f} µs/paketë"
+        )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feature_allocations import synthetic_packets
+from packet_parser import parse_frame, LINKTYPE_ETHERNET
+from shard_pipeline import ShardedPipeline
+
+def pcap_packets(path, limit):
+    """Kokat e paketave nga një skedar pcap, për ripërsëritje"""
+    from scapy.utils import RawPcapReader
+
+    packets = []
+    reader = RawPcapReader(path)
+    linktype = getattr(reader, 'linktype', LINKTYPE_ETHERNET)
+    for index, (data, _) in enumerate(reader):
+        if index >= limit:
+            break
+        info = parse_frame(data, linktype, time.time(), len(data))
+        if info is not None:
+            packets.append(info)
+    reader.close()
+    return packets
+
+def replay(packets, workers, batch_size, ring_slots, cached):
+    """Ripërsërit trace-in te N procese dhe mat kohën derisa të gjitha ta kenë përpunuar"""
+    verdicts = []
+    options = {}
+    if not cached:
+        # Çdo paketë pikëzohet: mat punën e plotë, jo goditjet e cache-it ose mostrimin
+        options = {
+            'verdict_options': {'rescore_packets': 1},
+            'sampler_options': {'high_watermark': ring_slots * 2, 'low_watermark': ring_slots}
+        }
+    pipeline = ShardedPipeline(
+        workers, lambda info, score, features: verdicts.append(score),
+        ring_slots=ring_slots, batch_size=batch_size, **options
+    )
+    pipeline.start()
+    if not pipeline.wait_ready(60.0):
+        pipeline.stop()
+        raise RuntimeError("Proceset punëtore nuk u nisën")
+
+    full_waits = 0
+    started = time.perf_counter()
+    for info in packets:
+        # Ripërsëritja pret kur unaza është plot në vend që të hedhë paketa
+        while not pipeline.submit(info):
+            full_waits += 1
+            time.sleep(0.0001)
+    dispatched = time.perf_counter() - started
+    pipeline.stop(timeout=300.0)
+    elapsed = time.perf_counter() - started
+
+    totals = pipeline.totals()
+    return {
+        'workers': workers,
+        'packets': len(packets),
+        'processed': totals.get('packets', 0),
+        'scored': totals.get('scored', 0),
+        'suspicious_verdicts': len(verdicts),
+        'ring_full_waits': full_waits,
+        'dispatch_seconds': round(dispatched, 4),
+        'elapsed_seconds': round(elapsed, 4),
+        'packets_per_second': round(len(packets) / elapsed, 1),
+        'per_worker_packets': [stats.get('packets', 0) for stats in pipeline.shard_stats]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Shkallëzimi i pikëzimit me procese sipas numrit të proceseve')
+    parser.add_argument('--workers', default='1,2,4', help='Numrat e proceseve, të ndarë me presje')
+    parser.add_argument('--packets', type=int, default=200000)
+    parser.add_argument('--flows', type=int, default=4096)
+    parser.add_argument('--pcap', help='Ripërsërit kokat nga ky pcap në vend të trace-it sintetik')
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--ring-slots', type=int, default=65536)
+    parser.add_argument('--cached', action='store_true',
+                        help='Lejo cache-in e vendimeve dhe mostrimin si në kapjen e drejtpërdrejtë')
+    parser.add_argument('--output', help='Skedari JSON i rezultateve')
+    args = parser.parse_args()
+
+    if args.pcap:
+        packets = pcap_packets(args.pcap, args.packets)
+    else:
+        packets = synthetic_packets(args.packets, flows=args.flows)
+    print(f"Trace: {len(packets)} paketa, {os.cpu_count()} CPU")
+
+    results = []
+    for workers in [int(value) for value in args.workers.split(',')]:
+        result = replay(packets, workers, args.batch_size, args.ring_slots, args.cached)
+        result['speedup'] = round(result['packets_per_second'] / results[0]['packets_per_second'], 2) \
+            if results else 1.0
+        result['efficiency'] = round(result['speedup'] / workers * results[0]['workers'], 2) \
+            if results else 1.0
+        results.append(result)
+        print(
+            f"{workers:>3} procese: {result['packets_per_second']:>10.0f} paketa/s, "
+            f"shpejtimi {result['speedup']:.2f}x, efikasiteti {result['efficiency']:.2f}, "
+            f"shpërndarja {result['per_worker_packets']}"
+        )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'cpu_count': os.cpu_count(), 'results': results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
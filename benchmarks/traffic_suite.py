@@ -0,0 +1,426 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+from flow_table import PROTO_TCP, PROTO_UDP
+from packet_parser import PacketInfo
+from main import ZeroTrustFirewall
+
+# Adresa lokale e hostit që mbron firewall-i
+LOCAL_IP = '192.168.1.10'
+
+# Flamujt TCP
+SYN = 0x02
+ACK = 0x10
+PSH_ACK = 0x18
+FIN_ACK = 0x11
+SYN_ACK = 0x12
+
+PROFILES = ('short_flows', 'elephant_flows', 'syn_scan', 'dns_burst', 'mixed')
+
+class TrafficClock:
+    """Ora sintetike e paketave: intervale eksponenciale me shpejtësinë e dhënë"""
+
+    def __init__(self, rng, rate=50000.0):
+        self.rng = rng
+        self.rate = rate
+        self.now = 1_700_000_000.0
+
+    def tick(self):
+        self.now += self.rng.expovariate(self.rate)
+        return self.now
+
+def tcp(clock, src, dst, sport, dport, length, flags, window=64240):
+    return PacketInfo(clock.tick(), src, dst, sport, dport, PROTO_TCP, length, 64, window, flags)
+
+def udp(clock, src, dst, sport, dport, length):
+    return PacketInfo(clock.tick(), src, dst, sport, dport, PROTO_UDP, length, 64)
+
+def short_flows(rng, clock, count):
+    """Shumë lidhje HTTPS të shkurtra: handshake, 1-8 paketa të dhënash dhe FIN"""
+    packets = []
+    while len(packets) < count:
+        server = f"93.184.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+        sport = rng.randrange(32768, 61000)
+        packets.append(tcp(clock, LOCAL_IP, server, sport, 443, 60, SYN))
+        packets.append(tcp(clock, server, LOCAL_IP, 443, sport, 60, SYN_ACK))
+        for index in range(rng.randint(1, 8)):
+            if index % 2 == 0:
+                packets.append(tcp(clock, LOCAL_IP, server, sport, 443, rng.randint(80, 600), PSH_ACK))
+            else:
+                packets.append(tcp(clock, server, LOCAL_IP, 443, sport, rng.randint(200, 1500), PSH_ACK))
+        packets.append(tcp(clock, LOCAL_IP, server, sport, 443, 52, FIN_ACK))
+    return packets[:count]
+
+def elephant_flows(rng, clock, count, flows=4):
+    """Pak lidhje të gjata me segmente të plota dhe ACK të rralla në drejtim të kundërt"""
+    endpoints = [(f"151.101.{rng.randrange(256)}.{rng.randrange(1, 255)}", rng.randrange(32768, 61000))
+                 for _ in range(flows)]
+    packets = []
+    for index in range(count):
+        server, sport = endpoints[rng.randrange(flows)]
+        if index % 8 == 7:
+            packets.append(tcp(clock, LOCAL_IP, server, sport, 443, 52, ACK))
+        else:
+            packets.append(tcp(clock, server, LOCAL_IP, 443, sport, 1500, ACK))
+    return packets
+
+def syn_scan(rng, clock, count):
+    """Një skaner që dërgon SYN te portat e njëpasnjëshme të hostit dhe të fqinjëve të tij"""
+    scanner = f"203.0.113.{rng.randrange(1, 255)}"
+    packets = []
+    for index in range(count):
+        host = LOCAL_IP if index % 4 else f"192.168.1.{rng.randrange(2, 255)}"
+        packets.append(tcp(clock, scanner, host, rng.randrange(40000, 60000), 1 + index % 65535, 60, SYN, 1024))
+    return packets
+
+def dns_burst(rng, clock, count):
+    """Shpërthime pyetjesh DNS me porta burimi të rastësishme dhe përgjigjet e tyre"""
+    resolvers = ('8.8.8.8', '1.1.1.1', '9.9.9.9')
+    packets = []
+    while len(packets) < count:
+        resolver = resolvers[rng.randrange(len(resolvers))]
+        sport = rng.randrange(1024, 65535)
+        packets.append(udp(clock, LOCAL_IP, resolver, sport, 53, rng.randint(60, 100)))
+        packets.append(udp(clock, resolver, LOCAL_IP, 53, sport, rng.randint(80, 512)))
+    return packets[:count]
+
+def mixed(rng, clock, count):
+    """Përzierje e profileve duke ruajtur renditjen brenda secilit"""
+    streams = [
+        short_flows(rng, clock, count * 5 // 10),
+        elephant_flows(rng, clock, count * 3 // 10),
+        dns_burst(rng, clock, count * 15 // 100),
+        syn_scan(rng, clock, count * 5 // 100)
+    ]
+    positions = [0] * len(streams)
+    weights = [len(stream) for stream in streams]
+    packets = []
+    while len(packets) < count and any(weights):
+        stream = rng.choices(range(len(streams)), weights=weights)[0]
+        packets.append(streams[stream][positions[stream]])
+        positions[stream] += 1
+        weights[stream] -= 1
+    return packets
+
+GENERATORS = {
+    'short_flows': short_flows,
+    'elephant_flows': elephant_flows,
+    'syn_scan': syn_scan,
+    'dns_burst': dns_burst,
+    'mixed': mixed
+}
+
+def to_scapy(packets):
+    """Ndërto paketat scapy për rrugën packet_callback (përfshin dissect-in)"""
+    from scapy.layers.l2 import Ether
+    from scapy.layers.inet import IP, TCP, UDP
+    from scapy.packet import Raw
+
+    frames = []
+    for info in packets:
+        if info.proto == PROTO_TCP:
+            transport = TCP(sport=info.sport, dport=info.dport, flags=info.tcp_flags, window=info.window_size)
+            header = 40
+        else:
+            transport = UDP(sport=info.sport, dport=info.dport)
+            header = 28
+        frame = Ether() / IP(src=info.src_ip, dst=info.dst_ip, ttl=info.ttl) / transport
+        if info.length > header:
+            frame = frame / Raw(b'\0' * (info.length - header))
+        frame.time = info.timestamp
+        frames.append(frame)
+    return frames
+
+def create_firewall(state_dir, shard_workers, train):
+    """Firewall pa kapje dhe pa pyetje interaktive, me gjendjen në një direktori të përkohshme"""
+    options = {}
+    if not train:
+        # Shembujt mblidhen në histori, por trajnimi nuk konkurron me rrugën e paketave për CPU
+        options = {'train_interval': 86400.0, 'train_min_samples': 1 << 30}
+    firewall = ZeroTrustFirewall(
+        interactive=False,
+        state_path=os.path.join(state_dir, 'firewall_state.db'),
+        shard_workers=shard_workers,
+        local_addresses=[LOCAL_IP],
+        **options
+    )
+    firewall.running = True
+    firewall.process_index.start()
+    firewall.state_store.start()
+    firewall.load_model()
+    if not firewall.model_ready.is_set():
+        raise RuntimeError("Modeli nuk u ngarkua")
+    return firewall
+
+def shutdown(firewall):
+    """Ndalo thread-et e sfondit pa rieksportuar known_apps.json në direktorinë e punës"""
+    firewall.running = False
+    if firewall.scoring_engine is not None:
+        firewall.scoring_engine.stop()
+    if firewall.shards is not None:
+        firewall.shards.stop()
+    if firewall.trainer is not None:
+        firewall.trainer.stop()
+    firewall.process_index.stop()
+    firewall.state_store.stop()
+
+def backlog(firewall):
+    """Paketat që ende presin pikëzimin"""
+    if firewall.shards is not None:
+        return firewall.shards.backlog()
+    return firewall.scoring_engine.queue_depth()
+
+def drain(firewall, timeout=60.0):
+    """Prit derisa radha e pikëzimit të zbrazet"""
+    deadline = time.monotonic() + timeout
+    while backlog(firewall) and time.monotonic() < deadline:
+        time.sleep(0.001)
+    # Grupi i fundit mund të jetë ende në pikëzim
+    time.sleep(firewall.batch_timeout * 2)
+
+def feed(firewall, packets, scapy_frames=None):
+    """Dërgo paketat në firewall dhe kthe sekondat deri në zbrazjen e radhës"""
+    started = time.perf_counter()
+    if scapy_frames is not None:
+        callback = firewall.packet_callback
+        for frame in scapy_frames:
+            callback(frame)
+    else:
+        process = firewall.process_packet
+        for info in packets:
+            process(info)
+    drain(firewall)
+    return time.perf_counter() - started
+
+def memory_checkpoint(firewall, elapsed, packets):
+    """RSS e procesit dhe madhësitë e strukturave që rriten me trafikun"""
+    verdicts = firewall.verdict_cache.stats()
+    return {
+        'elapsed_seconds': round(elapsed, 2),
+        'packets': packets,
+        'rss_bytes': psutil.Process().memory_info().rss,
+        'flow_table_entries': len(firewall.flow_table),
+        'history_samples': len(firewall.ml_analyzer.history),
+        'history_bytes': firewall.ml_analyzer.history.features.nbytes + firewall.ml_analyzer.history.labels.nbytes,
+        'verdict_flow_entries': verdicts['flow_entries'],
+        'verdict_destination_entries': verdicts['destination_entries'],
+        'pending_decisions': len(firewall.decisions.pending_decisions()),
+        'alert_limiter_entries': len(firewall.alerts.entries)
+    }
+
+def queue_capacity(firewall):
+    """Kufiri i radhës së pikëzimit: unazat e proceseve ose radha e BatchScoringEngine"""
+    if firewall.shards is not None:
+        return sum(ring.slots for ring in firewall.shards.rings)
+    return firewall.scoring_engine.max_queue_size
+
+def check_invariants(firewall):
+    """Kushtet që duhet të mbahen gjatë gjithë trafikut; kthe listën e shkeljeve"""
+    verdicts = firewall.verdict_cache.stats()
+    limits = (
+        ('tabela e lidhjeve', len(firewall.flow_table), firewall.flow_table.capacity),
+        ('radha e pikëzimit', backlog(firewall), queue_capacity(firewall)),
+        ('cache-i i vendimeve (lidhje)', verdicts['flow_entries'], firewall.verdict_cache.capacity),
+        ('cache-i i vendimeve (destinacione)', verdicts['destination_entries'], firewall.verdict_cache.capacity),
+        ('kufizuesi i alarmeve', len(firewall.alerts.entries), firewall.alerts.capacity),
+        ('vendimet në pritje', len(firewall.decisions.pending_decisions()), firewall.decisions.max_pending)
+    )
+    violations = [f"{name}: {size} > {capacity}" for name, size, capacity in limits if size > capacity]
+    # Hosti i mbrojtur nuk duhet të bllokohet apo izolohet kurrë nga trafiku që merr
+    if LOCAL_IP in firewall.quarantined_ips:
+        violations.append(f"adresa lokale {LOCAL_IP} u izolua")
+    if LOCAL_IP in firewall.suspicious_ips:
+        violations.append(f"adresa lokale {LOCAL_IP} u bllokua")
+    return violations
+
+def profile_result(firewall, packets, elapsed):
+    """Përmbledhja e një ekzekutimi: shpejtësia, vonesat dhe thirrjet e inferencës për paketë"""
+    engine = firewall.engine_stats()
+    histograms = firewall.metrics.histograms
+    return {
+        'packets': packets,
+        'seconds': round(elapsed, 4),
+        'packets_per_second': round(packets / elapsed, 1),
+        'latency': {
+            'p50_us': round(histograms['packet_total'].percentile(50) * 1e6, 2),
+            'p99_us': round(histograms['packet_total'].percentile(99) * 1e6, 2),
+            'max_us': round(histograms['packet_total'].max * 1e6, 2)
+        },
+        'queue_wait_p99_ms': round(histograms['queue_wait'].percentile(99) * 1000, 3),
+        'inference_calls_per_packet': round(engine.get('batches', 0) / packets, 5),
+        'scored_per_packet': round(engine.get('scored', 0) / packets, 4),
+        'dropped': engine.get('dropped', 0),
+        'alerts': firewall.stats.counters['alerts'],
+        'backend': type(firewall.ml_analyzer.inference).__name__ if firewall.ml_analyzer.inference is not None
+        else 'keras',
+        'stages': {stage: histogram.summary() for stage, histogram in histograms.items() if histogram.count}
+    }
+
+def run_profile(name, args, state_dir):
+    """Një profil trafiku mbi një firewall të ri"""
+    rng = random.Random(args.seed)
+    packets = GENERATORS[name](rng, TrafficClock(rng), args.packets)
+    frames = to_scapy(packets) if args.scapy else None
+    firewall = create_firewall(os.path.join(state_dir, name), args.shard_workers, args.train)
+    try:
+        # Ngrohja: inicializimi i backend-it dhe i cache-ve nuk hyn në matje
+        feed(firewall, packets[:1000], frames[:1000] if frames else None)
+        firewall.metrics.reset()
+        before = firewall.engine_stats()
+        elapsed = feed(firewall, packets, frames)
+        result = profile_result(firewall, len(packets), elapsed)
+        after = firewall.engine_stats()
+        result['inference_calls_per_packet'] = round(
+            (after.get('batches', 0) - before.get('batches', 0)) / len(packets), 5
+        )
+        result['scored_per_packet'] = round((after.get('scored', 0) - before.get('scored', 0)) / len(packets), 4)
+        result['violations'] = check_invariants(firewall)
+        return result
+    finally:
+        shutdown(firewall)
+
+def run_soak(args, state_dir):
+    """Trafik i përzier me lidhje gjithmonë të reja për args.soak sekonda; mat rritjen e memories"""
+    rng = random.Random(args.seed)
+    clock = TrafficClock(rng)
+    firewall = create_firewall(os.path.join(state_dir, 'soak'), args.shard_workers, args.train)
+    checkpoints = []
+    violations = []
+    total = 0
+    try:
+        started = time.perf_counter()
+        next_checkpoint = 0.0
+        while True:
+            elapsed = time.perf_counter() - started
+            if elapsed >= next_checkpoint:
+                checkpoints.append(memory_checkpoint(firewall, elapsed, total))
+                violations.extend(f"{elapsed:.0f}s: {violation}" for violation in check_invariants(firewall))
+                next_checkpoint += args.checkpoint
+            if elapsed >= args.soak:
+                break
+            packets = mixed(rng, clock, args.soak_chunk)
+            feed(firewall, packets)
+            total += len(packets)
+        result = profile_result(firewall, total, time.perf_counter() - started)
+        violations.extend(check_invariants(firewall))
+    finally:
+        shutdown(firewall)
+
+    # Rritja llogaritet pas pikës së parë të kontrollit, kur strukturat janë ngrohur
+    baseline = checkpoints[1] if len(checkpoints) > 2 else checkpoints[0]
+    last = checkpoints[-1]
+    result['checkpoints'] = checkpoints
+    result['violations'] = violations
+    result['growth'] = {
+        name: last[name] - baseline[name]
+        for name in ('rss_bytes', 'flow_table_entries', 'history_samples', 'history_bytes',
+                     'verdict_flow_entries', 'pending_decisions')
+    }
+    return result
+
+def git_commit():
+    """Commit-i aktual, që rezultatet të krahasohen midis commit-eve"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    """Shtyp ndryshimin në përqindje kundrejt një skedari rezultatesh të mëparshëm"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"Krahasim me {baseline.get('commit')} ({baseline_path}):")
+    for name, result in results['profiles'].items():
+        previous = baseline.get('profiles', {}).get(name)
+        if previous is None:
+            continue
+        for label, current, old in (
+            ('paketa/s', result['packets_per_second'], previous['packets_per_second']),
+            ('p99', result['latency']['p99_us'], previous['latency']['p99_us'])
+        ):
+            change = (current - old) / old * 100 if old else 0.0
+            print(f"  {name:>15} {label:>9}: {old:>10.1f} -> {current:>10.1f} ({change:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dhe soak me trafik sintetik mbi rrugën e paketave')
+    parser.add_argument('--profiles', default=','.join(PROFILES),
+                        help='Profilet e trafikut, të ndarë me presje')
+    parser.add_argument('--packets', type=int, default=50000, help='Paketa për çdo profil')
+    parser.add_argument('--scapy', action='store_true',
+                        help='Dërgo paketa scapy te packet_callback (përfshin dissect-in)')
+    parser.add_argument('--shard-workers', type=int, default=0)
+    parser.add_argument('--train', action='store_true',
+                        help='Lejo trajnimin në sfond gjatë matjes (parazgjedhje: vetëm mblidhen shembujt)')
+    parser.add_argument('--soak', type=float, default=0.0, help='Kohëzgjatja e soak-ut në sekonda (0: pa soak)')
+    parser.add_argument('--soak-chunk', type=int, default=20000)
+    parser.add_argument('--checkpoint', type=float, default=10.0, help='Intervali i matjes së memories gjatë soak-ut')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Skedari JSON i rezultateve')
+    parser.add_argument('--compare', help='Skedar JSON i një ekzekutimi të mëparshëm për krahasim')
+    parser.add_argument('--verbose', action='store_true', help='Shfaq logun e firewall-it')
+    args = parser.parse_args()
+
+    # Alarmet e trafikut sintetik nuk shkruhen në terminal, përveç kur kërkohet
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'config': vars(args),
+        'profiles': {}
+    }
+    with tempfile.TemporaryDirectory() as state_dir:
+        for name in [value for value in args.profiles.split(',') if value]:
+            if name not in GENERATORS:
+                parser.error(f"Profil i panjohur: {name}")
+            os.makedirs(os.path.join(state_dir, name))
+            result = results['profiles'][name] = run_profile(name, args, state_dir)
+            print(
+                f"{name:>15}: {result['packets_per_second']:>9.0f} paketa/s, "
+                f"p50 {result['latency']['p50_us']:>7.1f} µs, p99 {result['latency']['p99_us']:>8.1f} µs, "
+                f"{result['inference_calls_per_packet']:.4f} thirrje inference/paketë"
+            )
+        if args.soak > 0:
+            os.makedirs(os.path.join(state_dir, 'soak'))
+            results['soak'] = run_soak(args, state_dir)
+            growth = results['soak']['growth']
+            print(
+                f"{'soak':>15}: {results['soak']['packets']} paketa, RSS {growth['rss_bytes'] / 1024:+.0f} KiB, "
+                f"lidhje {growth['flow_table_entries']:+d}, histori {growth['history_samples']:+d}"
+            )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+    runs = list(results['profiles'].items())
+    if 'soak' in results:
+        runs.append(('soak', results['soak']))
+    failed = False
+    for name, result in runs:
+        for violation in result['violations']:
+            print(f"SHKELJE {name}: {violation}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
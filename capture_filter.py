@@ -0,0 +1,135 @@
+import os
+import json
+import logging
+import ipaddress
+from flow_table import PROTO_TCP, PROTO_UDP
+
+# Rregullat e paracaktuara të kapjes; mund të mbishkruhen nga capture_rules.json
+DEFAULT_CAPTURE_RULES = {
+    'interfaces': [],
+    'protocols': ['tcp', 'udp'],
+    'exclude_subnets': [],
+    'exclude_ports': [],
+    'include_loopback': False
+}
+
+PROTOCOL_NUMBERS = {'tcp': PROTO_TCP, 'udp': PROTO_UDP}
+LOOPBACK_NETWORKS = ('127.0.0.0/8', '::1/128')
+
+def load_capture_rules(path='capture_rules.json'):
+    """Ngarko rregullat e kapjes dhe plotësoji me vlerat e paracaktuara"""
+    rules = {key: list(value) if isinstance(value, list) else value
+             for key, value in DEFAULT_CAPTURE_RULES.items()}
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                rules.update(json.load(f))
+            logging.info("Rregullat e kapjes u ngarkuan me sukses")
+    except Exception as e:
+        logging.error(f"Gabim gjatë ngarkimit të rregullave të kapjes: {e}")
+    return rules
+
+def build_bpf_filter(rules):
+    """Gjenero shprehjen BPF nga rregullat: vetëm IP, protokollet e lejuara, pa rrjetet/portat e përjashtuara"""
+    protocols = [p for p in rules.get('protocols', []) if p in PROTOCOL_NUMBERS] or list(PROTOCOL_NUMBERS)
+    clauses = [
+        "(ip or ip6)",
+        "(" + " or ".join(protocols) + ")"
+    ]
+    excluded = list(rules.get('exclude_subnets', []))
+    if not rules.get('include_loopback', False):
+        excluded.extend(LOOPBACK_NETWORKS)
+    for subnet in excluded:
+        network = ipaddress.ip_network(subnet, strict=False)
+        clauses.append(f"not net {network}")
+    for port in rules.get('exclude_ports', []):
+        clauses.append(f"not port {int(port)}")
+    return " and ".join(clauses)
+
+def kernel_filter_available(expression):
+    """Kontrollo nëse shprehja BPF mund të kompilohet (kërkon libpcap ose tcpdump)"""
+    try:
+        from scapy.arch.common import compile_filter
+
+        compile_filter(expression)
+        return True
+    except Exception as e:
+        logging.warning(f"Filtri BPF nuk mund të kompilohet, duke filtruar në userspace: {e}")
+        return False
+
+def attach_bpf_filter(sock, expression, interface=None):
+    """Lidh filtrin BPF me një socket AF_PACKET"""
+    try:
+        from scapy.arch.linux import attach_filter
+
+        attach_filter(sock, expression, interface)
+        return True
+    except Exception as e:
+        logging.warning(f"Filtri BPF nuk u lidh me socket-in: {e}")
+        return False
+
+class CaptureFilter:
+    """I njëjti filtër në userspace, kur filtri i kernelit nuk është i disponueshëm"""
+
+    def __init__(self, rules):
+        self.protocols = {
+            PROTOCOL_NUMBERS[p] for p in rules.get('protocols', []) if p in PROTOCOL_NUMBERS
+        } or set(PROTOCOL_NUMBERS.values())
+        excluded = list(rules.get('exclude_subnets', []))
+        if not rules.get('include_loopback', False):
+            excluded.extend(LOOPBACK_NETWORKS)
+        self.networks = [ipaddress.ip_network(subnet, strict=False) for subnet in excluded]
+        self.ports = {int(port) for port in rules.get('exclude_ports', [])}
+        self.dropped = 0
+
+    def excluded_address(self, address):
+        ip = ipaddress.ip_address(address)
+        return any(ip in network for network in self.networks)
+
+    def allows(self, info):
+        """Kthe False për paketat që filtri BPF do t'i kishte hedhur"""
+        if (info.proto not in self.protocols
+                or info.sport in self.ports
+                or info.dport in self.ports
+                or self.excluded_address(info.src_ip)
+                or self.excluded_address(info.dst_ip)):
+            self.dropped += 1
+            return False
+        return True
+
+class AdaptiveSampler:
+    """Nën mbingarkesë pikëzon vetëm N paketat e para të çdo lidhjeje dhe një në K të tjera"""
+
+    def __init__(self, first_packets=8, sample_every=16, high_watermark=4096, low_watermark=1024):
+        self.first_packets = first_packets
+        self.sample_every = max(1, int(sample_every))
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.overloaded = False
+        self.stats = {
+            'scored': 0,
+            'sampled': 0,
+            'shed': 0,
+            'overload_episodes': 0
+        }
+
+    def should_score(self, flow_packets, load):
+        """Vendos nëse paketa e radhës e lidhjes duhet pikëzuar, sipas ngarkesës aktuale"""
+        # Histerezë midis dy pragjeve që mënyra të mos ndryshojë në çdo paketë
+        if self.overloaded:
+            if load <= self.low_watermark:
+                self.overloaded = False
+                logging.info("Ngarkesa ra: pikëzimi i plotë u rikthye")
+        elif load >= self.high_watermark:
+            self.overloaded = True
+            self.stats['overload_episodes'] += 1
+            logging.warning(f"Mbingarkesë (radha: {load}): duke kaluar në pikëzim me mostra")
+
+        if not self.overloaded:
+            self.stats['scored'] += 1
+            return True
+        if flow_packets <= self.first_packets or flow_packets % self.sample_every == 0:
+            self.stats['sampled'] += 1
+            return True
+        self.stats['shed'] += 1
+        return False
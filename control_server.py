@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import socket
+import logging
+import argparse
+import threading
+import socketserver
+
+# Socket-i lokal i kontrollit; në sistemet pa AF_UNIX përdoret TCP vetëm në localhost
+CONTROL_SOCKET = 'firewall.sock'
+CONTROL_PORT = 9109
+MAX_COMMAND = 4096
+
+class ControlServer:
+    """Socket lokal kontrolli: një komandë tekst për rresht, përgjigja si një rresht JSON"""
+
+    def __init__(self, handle_command, path=CONTROL_SOCKET, port=CONTROL_PORT):
+        self.handle_command = handle_command
+        self.path = path
+        self.port = port
+        self.server = None
+        self.worker = None
+
+    def start(self):
+        """Hap socket-in dhe nis thread-in që pranon komandat"""
+        handler = self.handler_class()
+        try:
+            if hasattr(socket, 'AF_UNIX'):
+                if os.path.exists(self.path):
+                    os.unlink(self.path)
+                # Socket-i krijohet i lexueshëm vetëm nga pronari (root), pa dritare midis bind dhe chmod
+                previous = os.umask(0o177)
+                try:
+                    self.server = socketserver.ThreadingUnixStreamServer(self.path, handler)
+                finally:
+                    os.umask(previous)
+                address = self.path
+            else:
+                self.server = socketserver.ThreadingTCPServer(('127.0.0.1', self.port), handler)
+                address = f"127.0.0.1:{self.port}"
+        except OSError as e:
+            logging.error(f"Gabim gjatë hapjes së socket-it të kontrollit: {e}")
+            self.server = None
+            return False
+        self.server.daemon_threads = True
+        self.worker = threading.Thread(target=self.server.serve_forever, name="ControlServer", daemon=True)
+        self.worker.start()
+        logging.info(f"Socket-i i kontrollit: {address}")
+        return True
+
+    def stop(self, timeout=2.0):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        if self.worker is not None:
+            self.worker.join(timeout)
+        self.server = None
+        if hasattr(socket, 'AF_UNIX') and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def handler_class(self):
+        handle_command = self.handle_command
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline(MAX_COMMAND).decode('utf-8', 'replace').split()
+                if not line:
+                    return
+                try:
+                    reply = handle_command(line[0], line[1:])
+                except Exception as e:
+                    logging.error(f"Gabim gjatë ekzekutimit të komandës '{line[0]}': {e}")
+                    reply = {'ok': False, 'error': str(e)}
+                self.wfile.write((json.dumps(reply, default=str) + '\n').encode())
+
+        return Handler
+
+def send_command(words, path=CONTROL_SOCKET, port=CONTROL_PORT, timeout=120.0):
+    """Dërgo një komandë te firewall-i që po punon dhe kthe përgjigjen"""
+    if hasattr(socket, 'AF_UNIX'):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = path
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address = ('127.0.0.1', port)
+    with sock:
+        sock.settimeout(timeout)
+        sock.connect(address)
+        sock.sendall((' '.join(words) + '\n').encode())
+        with sock.makefile('r') as reply:
+            return json.loads(reply.readline())
+
+def main():
+    parser = argparse.ArgumentParser(description="Kontrollo firewall-in që po punon")
+    parser.add_argument('command', nargs='+', help="status | reload [all|model|rules|apps]")
+    parser.add_argument('--socket', default=CONTROL_SOCKET, help="Shtegu i socket-it të kontrollit")
+    parser.add_argument('--port', type=int, default=CONTROL_PORT, help="Porta TCP kur AF_UNIX mungon")
+    args = parser.parse_args()
+    try:
+        reply = send_command(args.command, args.socket, args.port)
+    except OSError as e:
+        print(f"Firewall-i nuk u arrit: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(reply, indent=2))
+    sys.exit(0 if reply.get('ok', True) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+import logging
+
+# Politikat që zbatohen menjëherë derisa operatori të vendosë
+POLICY_ALLOW = 'allow'
+POLICY_DENY = 'deny'
+POLICY_QUARANTINE = 'quarantine'
+POLICIES = (POLICY_ALLOW, POLICY_DENY, POLICY_QUARANTINE)
+
+# Llojet e vendimeve që presin operatorin
+DECISION_APP = 'app'
+DECISION_CONNECTION = 'connection'
+
+class PendingDecision:
+    """Një vendim që pret përgjigjen e operatorit"""
+    __slots__ = ('kind', 'subject', 'details', 'default_action', 'created', 'occurrences')
+
+    def __init__(self, kind, subject, details, default_action):
+        self.kind = kind
+        self.subject = subject
+        self.details = details
+        self.default_action = default_action
+        self.created = time.time()
+        self.occurrences = 1
+
+    @property
+    def key(self):
+        return (self.kind, self.subject)
+
+    def describe(self):
+        """Përshkrim i shkurtër për CLI dhe GUI"""
+        if self.kind == DECISION_APP:
+            return f"Aplikacion i ri: {self.subject} ({self.details.get('path')})"
+        return (
+            f"Lidhje e dyshimtë: {self.details.get('src')} -> {self.subject} "
+            f"(rezultati: {self.details.get('score', 0):.2f}, {self.occurrences} herë)"
+        )
+
+class DecisionQueue:
+    """Radhë e vendimeve në pritje; kërkesat e përsëritura për të njëjtin subjekt bashkohen"""
+
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self.queue = queue.Queue()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.resolver = None
+        self.stats = {
+            'submitted': 0,
+            'collapsed': 0,
+            'dropped': 0,
+            'resolved': 0
+        }
+
+    def submit(self, kind, subject, details, default_action):
+        """Shto një vendim në pritje pa bllokuar; kthen False nëse u bashkua ose u hodh"""
+        with self.lock:
+            decision = self.pending.get((kind, subject))
+            if decision is not None:
+                decision.occurrences += 1
+                decision.details.update(details)
+                self.stats['collapsed'] += 1
+                return False
+            if len(self.pending) >= self.max_pending:
+                self.stats['dropped'] += 1
+                return False
+            decision = PendingDecision(kind, subject, dict(details), default_action)
+            self.pending[decision.key] = decision
+            self.stats['submitted'] += 1
+        self.queue.put(decision.key)
+        return True
+
+    def get(self, timeout=None):
+        """Merr vendimin e radhës që ende pret përgjigje (për CLI)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                key = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            with self.lock:
+                decision = self.pending.get(key)
+            # Vendimet e zgjidhura nga GUI-ja mbeten në radhë dhe anashkalohen
+            if decision is not None:
+                return decision
+
+    def pending_decisions(self):
+        """Kthe listën e vendimeve në pritje sipas rendit të krijimit"""
+        with self.lock:
+            return sorted(self.pending.values(), key=lambda decision: decision.created)
+
+    def resolve(self, kind, subject, action):
+        """Regjistro përgjigjen e operatorit dhe përditëso rregullat përmes resolver-it"""
+        with self.lock:
+            decision = self.pending.pop((kind, subject), None)
+            if decision is None:
+                return False
+            self.stats['resolved'] += 1
+        if self.resolver is not None:
+            try:
+                self.resolver(decision, action)
+            except Exception as e:
+                logging.error(f"Gabim gjatë zbatimit të vendimit për {subject}: {e}")
+        return True
+
+class OperatorConsole:
+    """Thread që pyet operatorin në terminal për vendimet në pritje, jashtë rrugës së paketave"""
+
+    def __init__(self, decisions):
+        self.decisions = decisions
+        self.running = False
+        self.worker = None
+
+    def start(self):
+        self.running = True
+        self.worker = threading.Thread(target=self.run, name="OperatorConsole", daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        while self.running:
+            decision = self.decisions.get(timeout=0.5)
+            if decision is None:
+                continue
+            try:
+                if decision.kind == DECISION_APP:
+                    print(f"\nU zbulua aplikacion i ri: {decision.subject}")
+                    print(f"Rruga: {decision.details.get('path')}")
+                    response = input("Lejo këtë aplikacion? (p/j): ").lower()
+                    action = POLICY_ALLOW if response == 'p' else POLICY_DENY
+                else:
+                    print("\nU zbulua lidhje e dyshimtë!")
+                    print(f"Rezultati i dyshimit: {decision.details.get('score', 0):.2f}")
+                    print(f"Burimi: {decision.details.get('src')}")
+                    print(f"Destinacioni: {decision.subject}")
+                    response = input("Blloko këtë lidhje? (p/j): ").lower()
+                    action = POLICY_DENY if response == 'p' else POLICY_ALLOW
+            except EOFError:
+                # Pa terminal interaktiv: mbetet politika e paracaktuar
+                self.running = False
+                break
+            self.decisions.resolve(decision.kind, decision.subject, action)
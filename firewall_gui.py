@@ -1,12 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 import threading
-from main import ZeroTrustFirewall
+from main import ZeroTrustFirewall, STATE_LOADING_MODEL, STATE_DEGRADED
+from decision_queue import DecisionQueue, POLICY_ALLOW, POLICY_DENY
+from firewall_stats import rates
+from log_pipeline import setup_logging
 import logging
 import queue
 import sys
+from collections import deque
 from datetime import datetime
 
+# Pamja e logut mban vetëm rreshtat e fundit dhe i shton në grup një herë për tick
+LOG_CAPACITY = 2000
+LOG_QUEUE_SIZE = 10000
+LOG_BATCH = 500
+LOG_REFRESH_MS = 100
+STATS_REFRESH_MS = 1000
+STOP_POLL_MS = 100
+STOP_TIMEOUT = 5.0
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+
 class FirewallGUI:
     def __init__(self, root):
         self.root = root
@@ -55,26 +69,69 @@ class FirewallGUI:
             state='disabled'
         )
         self.stop_button.grid(row=0, column=1, padx=5)
+
+        self.reload_button = ttk.Button(
+            self.control_frame,
+            text="Ringarko Modelin dhe Rregullat",
+            command=self.reload_firewall,
+            state='disabled'
+        )
+        self.reload_button.grid(row=0, column=2, padx=5)
         
         # Logu i aktiviteteve
         self.log_frame = ttk.LabelFrame(self.main_frame, text="Logu i Aktivitetit", padding="5")
         self.log_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         
+        self.level_var = tk.StringVar(value='INFO')
+        ttk.Label(self.log_frame, text="Niveli:").grid(row=0, column=0, sticky=tk.E)
+        self.level_box = ttk.Combobox(
+            self.log_frame,
+            textvariable=self.level_var,
+            values=LOG_LEVELS,
+            state='readonly',
+            width=10
+        )
+        self.level_box.grid(row=0, column=1, sticky=tk.W)
+        self.level_box.bind('<<ComboboxSelected>>', self.change_log_level)
+
         self.log_text = scrolledtext.ScrolledText(
             self.log_frame, 
             wrap=tk.WORD, 
             width=70, 
             height=20
         )
-        self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.log_text.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.log_frame.columnconfigure(1, weight=1)
+        self.log_frame.rowconfigure(1, weight=1)
         
+        # Vendimet në pritje
+        self.decisions_frame = ttk.LabelFrame(self.main_frame, text="Vendimet në Pritje", padding="5")
+        self.decisions_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+
+        self.decisions_list = tk.Listbox(self.decisions_frame, height=5, width=90)
+        self.decisions_list.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E))
+
+        self.allow_button = ttk.Button(
+            self.decisions_frame,
+            text="Lejo",
+            command=lambda: self.resolve_selected(POLICY_ALLOW)
+        )
+        self.allow_button.grid(row=1, column=0, padx=5, pady=5, sticky=tk.E)
+
+        self.deny_button = ttk.Button(
+            self.decisions_frame,
+            text="Blloko",
+            command=lambda: self.resolve_selected(POLICY_DENY)
+        )
+        self.deny_button.grid(row=1, column=1, padx=5, pady=5, sticky=tk.W)
+
         # Statistika
         self.stats_frame = ttk.LabelFrame(self.main_frame, text="Statistika", padding="5")
-        self.stats_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        self.stats_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
         
         self.stats_label = ttk.Label(
             self.stats_frame, 
-            text="Paketat e Analizuara: 0 | Lidhjet e Dyshimta: 0"
+            text="Paketa/s: 0 | Lidhjet: 0 | Inferenca: 0.00 ms | Alarmet: 0"
         )
         self.stats_label.grid(row=0, column=0, sticky=tk.W)
         
@@ -88,13 +145,19 @@ class FirewallGUI:
         self.firewall = None
         self.firewall_thread = None
         self.running = False
-        self.log_queue = queue.Queue()
+        self.log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.log_records = deque(maxlen=LOG_CAPACITY)
+        self.log_level = logging.INFO
+        self.previous_stats = None
+        self.decisions = DecisionQueue()
+        self.shown_decisions = []
         
         # Konfiguro logging
         self.setup_logging()
         
-        # Filloj të kontrolloj logun
+        # Filloj të kontrolloj logun dhe statistikat
         self.check_log_queue()
+        self.refresh_stats()
 
     def setup_logging(self):
         """Konfiguro logging për të shfaqur në GUI"""
@@ -104,7 +167,11 @@ class FirewallGUI:
                 self.log_queue = log_queue
 
             def emit(self, record):
-                self.log_queue.put(record)
+                # Gjatë një shpërthimi logesh hidhen rekordet e reja në vend që të bllokohet kapja
+                try:
+                    self.log_queue.put_nowait(record)
+                except queue.Full:
+                    pass
 
         # Shto handler-in e ri
         queue_handler = QueueHandler(self.log_queue)
@@ -112,60 +179,152 @@ class FirewallGUI:
         logging.getLogger().addHandler(queue_handler)
 
     def check_log_queue(self):
-        """Kontrollo logun për mesazhe të reja"""
-        while True:
+        """Kontrollo logun për mesazhe të reja dhe shtoji në një insert të vetëm"""
+        lines = []
+        for _ in range(LOG_BATCH):
             try:
                 record = self.log_queue.get_nowait()
-                self.log_text.insert(tk.END, self.format_log_record(record) + '\n')
-                self.log_text.see(tk.END)
             except queue.Empty:
                 break
-        self.root.after(100, self.check_log_queue)
+            line = self.format_log_record(record)
+            self.log_records.append((record.levelno, line))
+            if record.levelno >= self.log_level:
+                lines.append(line)
+        if lines:
+            self.append_log_lines(lines)
+        self.refresh_decisions()
+        self.root.after(LOG_REFRESH_MS, self.check_log_queue)
+
+    def append_log_lines(self, lines):
+        """Shto rreshtat dhe mbaj në widget vetëm LOG_CAPACITY rreshtat e fundit"""
+        self.log_text.insert(tk.END, '\n'.join(lines) + '\n')
+        excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - LOG_CAPACITY
+        if excess > 0:
+            self.log_text.delete('1.0', f'{excess + 1}.0')
+        self.log_text.see(tk.END)
+
+    def change_log_level(self, event=None):
+        """Rishfaq logun nga buffer-i sipas nivelit të zgjedhur"""
+        self.log_level = logging.getLevelName(self.level_var.get())
+        self.log_text.delete('1.0', tk.END)
+        lines = [line for levelno, line in self.log_records if levelno >= self.log_level]
+        if lines:
+            self.append_log_lines(lines)
+
+    def refresh_stats(self):
+        """Rifresko statistikat me ritëm fiks nga numëruesit e përbashkët të firewall-it"""
+        if self.running and self.firewall is not None:
+            current = self.firewall.stats_snapshot()
+            speed = rates(self.previous_stats, current)
+            self.previous_stats = current
+            self.stats_label.config(text=(
+                f"Paketa/s: {speed['packets_per_second']:.0f} | "
+                f"Lidhjet: {current['flows']} | "
+                f"Inferenca: {speed['inference_ms']:.2f} ms | "
+                f"Alarmet: {current['alerts']} | "
+                f"Në karantinë: {current['quarantined']} | "
+                f"Të bllokuara: {current['blocked']}"
+            ))
+            self.refresh_status()
+        self.root.after(STATS_REFRESH_MS, self.refresh_stats)
+
+    def refresh_status(self):
+        """Shfaq gjendjen e gatishmërisë së firewall-it"""
+        if not self.running or self.firewall is None:
+            return
+        state = self.firewall.state
+        if state == STATE_LOADING_MODEL:
+            text = "Statusi: Duke punuar (modeli po ngarkohet...)"
+        elif state == STATE_DEGRADED:
+            text = "Statusi: Duke punuar pa model ML"
+        else:
+            text = "Statusi: Duke punuar..."
+        if self.status_label.cget('text') != text:
+            self.status_label.config(text=text)
+
+    def refresh_decisions(self):
+        """Rifresko listën e vendimeve në pritje kur ajo ndryshon"""
+        pending = self.decisions.pending_decisions()
+        snapshot = [(decision.key, decision.occurrences) for decision in pending]
+        if snapshot == [(decision.key, occurrences) for decision, occurrences in self.shown_decisions]:
+            return
+        self.shown_decisions = [(decision, decision.occurrences) for decision in pending]
+        self.decisions_list.delete(0, tk.END)
+        for decision in pending:
+            self.decisions_list.insert(tk.END, decision.describe())
+
+    def resolve_selected(self, action):
+        """Dërgo përgjigjen e operatorit për vendimin e zgjedhur"""
+        selection = self.decisions_list.curselection()
+        if not selection:
+            return
+        decision, _ = self.shown_decisions[selection[0]]
+        self.decisions.resolve(decision.kind, decision.subject, action)
+        self.refresh_decisions()
 
     def format_log_record(self, record):
         """Format mesazhin e logut"""
         return f"{datetime.fromtimestamp(record.created).strftime('%H:%M:%S')} - {record.levelname} - {record.getMessage()}"
 
     def start_firewall(self):
-        """Nis firewall-in në një thread të veçantë"""
+        """Nis firewall-in; kapja dhe ngarkimi i modelit bëhen në thread-e të veçanta"""
         if not self.running:
             self.running = True
             self.start_button.config(state='disabled')
             self.stop_button.config(state='normal')
+            self.reload_button.config(state='normal')
             self.status_label.config(text="Statusi: Duke punuar...")
-            
-            self.firewall = ZeroTrustFirewall()
-            self.firewall_thread = threading.Thread(target=self.run_firewall)
-            self.firewall_thread.daemon = True
-            self.firewall_thread.start()
+            self.previous_stats = None
+            self.run_firewall()
 
     def stop_firewall(self):
-        """Ndalo firewall-in"""
+        """Ndalo firewall-in; butoni i nisjes aktivizohet vetëm kur ndalimi ka përfunduar"""
         if self.running:
             self.running = False
-            self.start_button.config(state='normal')
             self.stop_button.config(state='disabled')
-            self.status_label.config(text="Statusi: I ndaluar")
-            
+            self.reload_button.config(state='disabled')
+            self.status_label.config(text="Statusi: Duke ndaluar...")
+
             if self.firewall:
-                # TODO: Implemento metodën e ndalimit të firewall-it
-                pass
+                # Ndalimi pret thread-et e kapjes, prandaj nuk bëhet në thread-in e Tk
+                self.firewall_thread = threading.Thread(
+                    target=self.firewall.stop, args=(STOP_TIMEOUT,), name="FirewallStop", daemon=True
+                )
+                self.firewall_thread.start()
+                self.firewall = None
+            self.check_stopped()
+
+    def check_stopped(self):
+        """Prit pa bllokuar Tk derisa thread-i i ndalimit të mbarojë"""
+        if self.firewall_thread is not None and self.firewall_thread.is_alive():
+            self.root.after(STOP_POLL_MS, self.check_stopped)
+            return
+        self.firewall_thread = None
+        self.start_button.config(state='normal')
+        self.status_label.config(text="Statusi: I ndaluar")
+
+    def reload_firewall(self):
+        """Ringarko modelin, rregullat dhe aplikacionet në sfond pa ndalur kapjen"""
+        if self.running and self.firewall is not None:
+            logging.info("Duke ringarkuar modelin, rregullat dhe aplikacionet...")
+            self.firewall.request_reload()
 
     def run_firewall(self):
         """Ekzekuto firewall-in"""
         try:
-            while self.running:
-                # TODO: Implemento logjikën e firewall-it
-                pass
+            # Përgjigjet e operatorit vijnë nga paneli i vendimeve, jo nga input()
+            self.firewall = ZeroTrustFirewall(decisions=self.decisions, interactive=False)
+            self.firewall.start()
         except Exception as e:
             logging.error(f"Gabim në firewall: {e}")
-            self.running = False
             self.root.after(0, self.stop_firewall)
 
 def main():
+    log_listener = setup_logging()
     root = tk.Tk()
     app = FirewallGUI(root)
     root.mainloop()
+    log_listener.stop()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
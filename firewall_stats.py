@@ -0,0 +1,46 @@
+import time
+import threading
+
+class FirewallStats:
+    """Numërues të përbashkët të firewall-it, të lexuar nga GUI-ja pa bllokuar kapjen"""
+
+    def __init__(self):
+        # Numëruesit e rrugës së paketave shkruhen vetëm nga thread-i i kapjes dhe ata të ringarkimit
+        # nën reload_lock; 'alerts' rritet nga kapja (skicat) dhe nga thread-i i pikëzimit, prandaj
+        # kalon nga increment() me lock
+        self.lock = threading.Lock()
+        self.counters = {
+            'packets': 0,
+            'filtered': 0,
+            'unscored': 0,
+            'alerts': 0,
+            'new_apps': 0,
+            'reputation_blocked': 0,
+            'reloads': 0,
+            'reload_errors': 0
+        }
+
+    def increment(self, name, count=1):
+        """Rrit një numërues që shkruhet nga më shumë se një thread"""
+        with self.lock:
+            self.counters[name] += count
+
+    def snapshot(self, **values):
+        """Kthe një kopje të numëruesve, të plotësuar me vlerat e dhëna dhe kohën e leximit"""
+        snapshot = dict(self.counters)
+        snapshot.update(values)
+        snapshot['time'] = time.monotonic()
+        return snapshot
+
+def rates(previous, current):
+    """Llogarit shpejtësitë midis dy leximeve: paketa/s, pikëzime/s dhe vonesën e inferencës"""
+    elapsed = current['time'] - previous['time'] if previous else 0.0
+    if elapsed <= 0:
+        return {'packets_per_second': 0.0, 'scored_per_second': 0.0, 'inference_ms': 0.0}
+    batches = current['batches'] - previous['batches']
+    inference = current['inference_seconds'] - previous['inference_seconds']
+    return {
+        'packets_per_second': (current['packets'] - previous['packets']) / elapsed,
+        'scored_per_second': (current['scored'] - previous['scored']) / elapsed,
+        'inference_ms': inference / batches * 1000 if batches else 0.0
+    }
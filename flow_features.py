@@ -0,0 +1,264 @@
+import math
+import time
+from collections import OrderedDict
+from flow_table import PROTO_TCP
+
+# Renditja e karakteristikave të modelit në nivel lidhjeje
+FLOW_FEATURE_KEYS = (
+    'protocol',
+    'dst_port',
+    'packet_count',
+    'byte_count',
+    'duration',
+    'size_mean',
+    'size_std',
+    'iat_mean',
+    'iat_std',
+    'burst_count',
+    'fwd_byte_ratio',
+    'syn_ratio',
+    'fin_ratio',
+    'rst_ratio',
+    'psh_ratio',
+    'ack_ratio'
+)
+
+# Bitët e flamujve TCP
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_PSH = 0x08
+TCP_ACK = 0x10
+
+# Palët që kanë dërguar FIN
+CLOSED_FORWARD = 1
+CLOSED_REVERSE = 2
+
+class FlowStats:
+    """Statistika inkrementale të një lidhjeje dydrejtimëshe, të përditësuara në O(1) për paketë"""
+    __slots__ = ('initiator', 'start_time', 'last_time', 'window_start', 'window_packets',
+                 'packet_count', 'byte_count', 'fwd_bytes', 'size_mean', 'size_m2',
+                 'iat_count', 'iat_mean', 'iat_m2', 'burst_count',
+                 'syn', 'fin', 'rst', 'psh', 'ack', 'fin_sides', 'finished')
+
+    def __init__(self, initiator, now):
+        self.initiator = initiator
+        self.start_time = now
+        self.last_time = now
+        self.window_start = now
+        self.window_packets = 0
+        self.packet_count = 0
+        self.byte_count = 0
+        self.fwd_bytes = 0
+        self.size_mean = 0.0
+        self.size_m2 = 0.0
+        self.iat_count = 0
+        self.iat_mean = 0.0
+        self.iat_m2 = 0.0
+        self.burst_count = 0
+        self.syn = 0
+        self.fin = 0
+        self.rst = 0
+        self.psh = 0
+        self.ack = 0
+        self.fin_sides = 0
+        self.finished = False
+
+    def is_forward(self, info):
+        """A vjen paketa nga iniciatori i lidhjes"""
+        return info.src_ip == self.initiator.src_ip and info.sport == self.initiator.sport
+
+    def update(self, info, now, burst_gap):
+        """Shto një paketë me algoritmin e Welford për mesataren dhe variancën"""
+        size = info.length
+        self.packet_count += 1
+        self.window_packets += 1
+        self.byte_count += size
+        if self.is_forward(info):
+            self.fwd_bytes += size
+
+        delta = size - self.size_mean
+        self.size_mean += delta / self.packet_count
+        self.size_m2 += delta * (size - self.size_mean)
+
+        if self.packet_count == 1:
+            self.burst_count = 1
+        else:
+            iat = now - self.last_time
+            self.iat_count += 1
+            delta = iat - self.iat_mean
+            self.iat_mean += delta / self.iat_count
+            self.iat_m2 += delta * (iat - self.iat_mean)
+            # Një pauzë më e gjatë se burst_gap fillon një shpërthim të ri
+            if iat > burst_gap:
+                self.burst_count += 1
+        self.last_time = now
+
+        flags = info.tcp_flags
+        if flags:
+            self.syn += flags & TCP_SYN and 1
+            self.fin += flags & TCP_FIN and 1
+            self.rst += flags & TCP_RST and 1
+            self.psh += flags & TCP_PSH and 1
+            self.ack += flags & TCP_ACK and 1
+
+    def feature_row(self):
+        """Kthe karakteristikat e lidhjes si tuple në renditjen e FLOW_FEATURE_KEYS"""
+        packets = self.packet_count or 1
+        return (
+            1 if self.initiator.proto == PROTO_TCP else 2,
+            self.initiator.dport,
+            self.packet_count,
+            self.byte_count,
+            self.last_time - self.start_time,
+            self.size_mean,
+            math.sqrt(self.size_m2 / packets),
+            self.iat_mean,
+            math.sqrt(self.iat_m2 / self.iat_count) if self.iat_count else 0.0,
+            self.burst_count,
+            self.fwd_bytes / self.byte_count if self.byte_count else 0.0,
+            self.syn / packets,
+            self.fin / packets,
+            self.rst / packets,
+            self.psh / packets,
+            self.ack / packets
+        )
+
+    def features(self):
+        """Kthe karakteristikat e lidhjes si dict sipas FLOW_FEATURE_KEYS"""
+        return dict(zip(FLOW_FEATURE_KEYS, self.feature_row()))
+
+def bidirectional_key(info):
+    """Çelës i njëjtë për të dy drejtimet e lidhjes"""
+    a = (info.src_ip, info.sport)
+    b = (info.dst_ip, info.dport)
+    return (a, b, info.proto) if a <= b else (b, a, info.proto)
+
+class FlowFeatureTracker:
+    """Mban karakteristikat e lidhjeve dhe kthen dritaret që duhen pikëzuar"""
+
+    def __init__(self, window_seconds=10.0, window_packets=64, idle_timeout=60.0,
+                 burst_gap=0.1, capacity=65536, sweep_interval=1.0, close_linger=2.0):
+        self.window_seconds = window_seconds
+        self.window_packets = window_packets
+        self.idle_timeout = idle_timeout
+        self.close_linger = close_linger
+        self.burst_gap = burst_gap
+        self.capacity = max(1, int(capacity))
+        self.sweep_interval = sweep_interval
+        self.flows = OrderedDict()
+        # Lidhjet TCP pas FIN/RST mbahen pak sekonda, që FIN/ACK i palës tjetër dhe ACK i fundit
+        # të mos hapin lidhje të reja 1-2 paketëshe që duken si copa skanimi
+        self.closing = OrderedDict()
+        self.last_sweep = time.monotonic()
+        self.counters = {
+            'windows': 0,
+            'ended': 0,
+            'expired': 0,
+            'evicted': 0,
+            'lingered': 0
+        }
+
+    def __len__(self):
+        return len(self.flows)
+
+    def update(self, info, now=None):
+        """Përditëso lidhjen e paketës; kthe listën (initiator, rreshti i karakteristikave) për t'u pikëzuar"""
+        if now is None:
+            now = time.monotonic()
+        ready = []
+        key = bidirectional_key(info)
+        stats = self.flows.get(key)
+        if stats is not None and stats.finished:
+            if info.tcp_flags & (TCP_SYN | TCP_ACK) != TCP_SYN:
+                # Paketë e vonuar e një lidhjeje të pikëzuar tashmë: thithet pa u pikëzuar përsëri
+                stats.last_time = now
+                self.flows.move_to_end(key)
+                self.closing.move_to_end(key)
+                self.counters['lingered'] += 1
+                if now - self.last_sweep >= self.sweep_interval:
+                    ready.extend(self.expire(now))
+                return ready
+            # SYN i ri në të njëjtën katërshe porte: lidhja e vjetër ka mbaruar
+            del self.flows[key]
+            del self.closing[key]
+            stats = None
+        if stats is None:
+            if len(self.flows) >= self.capacity:
+                # Lidhja më pak e përdorur pikëzohet para se të largohet
+                evicted_key, evicted = self.flows.popitem(last=False)
+                self.closing.pop(evicted_key, None)
+                self.counters['evicted'] += 1
+                if not evicted.finished:
+                    ready.append((evicted.initiator, evicted.feature_row()))
+            stats = self.flows[key] = FlowStats(info, now)
+        else:
+            self.flows.move_to_end(key)
+
+        stats.update(info, now, self.burst_gap)
+
+        flags = info.tcp_flags
+        if flags & (TCP_FIN | TCP_RST):
+            if key in self.closing:
+                self.closing.move_to_end(key)
+            else:
+                self.closing[key] = stats
+            if flags & TCP_FIN:
+                stats.fin_sides |= CLOSED_FORWARD if stats.is_forward(info) else CLOSED_REVERSE
+            if flags & TCP_RST or stats.fin_sides == CLOSED_FORWARD | CLOSED_REVERSE:
+                # Fundi i lidhjes TCP: pikëzo tani, hyrja mbetet vetëm për paketat e vonuara
+                stats.finished = True
+                self.counters['ended'] += 1
+                ready.append((stats.initiator, stats.feature_row()))
+        elif key in self.closing:
+            # Lidhje gjysmë e mbyllur që ende transferon të dhëna
+            self.closing.move_to_end(key)
+
+        if not stats.finished and (stats.window_packets >= self.window_packets
+                                   or now - stats.window_start >= self.window_seconds):
+            stats.window_packets = 0
+            stats.window_start = now
+            self.counters['windows'] += 1
+            ready.append((stats.initiator, stats.feature_row()))
+
+        if now - self.last_sweep >= self.sweep_interval:
+            ready.extend(self.expire(now))
+        return ready
+
+    def expire(self, now=None):
+        """Largo lidhjet e mbyllura pas pritjes dhe ato pa aktivitet; kthe karakteristikat përfundimtare"""
+        if now is None:
+            now = time.monotonic()
+        self.last_sweep = now
+        ended = []
+        deadline = now - self.close_linger
+        while self.closing:
+            key, stats = next(iter(self.closing.items()))
+            if stats.last_time > deadline:
+                break
+            del self.closing[key]
+            del self.flows[key]
+            if not stats.finished:
+                # Vetëm njëra palë dërgoi FIN dhe lidhja heshti: pikëzohet si e përfunduar
+                self.counters['ended'] += 1
+                ended.append((stats.initiator, stats.feature_row()))
+
+        deadline = now - self.idle_timeout
+        expired = 0
+        while self.flows:
+            key, stats = next(iter(self.flows.items()))
+            if stats.last_time > deadline:
+                break
+            del self.flows[key]
+            self.closing.pop(key, None)
+            if not stats.finished:
+                expired += 1
+                ended.append((stats.initiator, stats.feature_row()))
+        self.counters['expired'] += expired
+        return ended
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['active_flows'] = len(self.flows)
+        stats['closing_flows'] = len(self.closing)
+        return stats
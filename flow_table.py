@@ -0,0 +1,129 @@
+import time
+from collections import OrderedDict
+
+# Numrat e protokolleve IP që përdoren në çelësat e lidhjeve
+PROTO_TCP = 6
+PROTO_UDP = 17
+
+class FlowRecord:
+    """Gjendja kompakte e një lidhjeje me kohë monotone"""
+    __slots__ = ('start_time', 'last_packet_time', 'packet_count', 'total_bytes', 'app_name')
+
+    def __init__(self, now, app_name=None):
+        self.start_time = now
+        self.last_packet_time = now
+        self.packet_count = 0
+        self.total_bytes = 0
+        self.app_name = app_name
+
+    def duration(self):
+        """Kohëzgjatja e lidhjes në sekonda"""
+        return self.last_packet_time - self.start_time
+
+class FlowTable:
+    """Tabelë lidhjesh me kapacitet të kufizuar, skadim pas mosaktivitetit dhe largim LRU"""
+
+    def __init__(self, capacity=65536, idle_timeout=120.0, active_timeout=3600.0, sweep_interval=1.0):
+        self.capacity = max(1, int(capacity))
+        self.idle_timeout = idle_timeout
+        self.active_timeout = active_timeout
+        self.sweep_interval = sweep_interval
+        # Renditja e OrderedDict ndjek paketën e fundit: fillimi është lidhja më pak e përdorur
+        self.flows = OrderedDict()
+        self.last_sweep = time.monotonic()
+        self.counters = {
+            'created': 0,
+            'evicted_lru': 0,
+            'expired_idle': 0,
+            'expired_active': 0
+        }
+
+    def __len__(self):
+        return len(self.flows)
+
+    def __contains__(self, key):
+        return key in self.flows
+
+    def get(self, key):
+        """Kthe regjistrimin e lidhjes pa e përditësuar"""
+        return self.flows.get(key)
+
+    def update(self, key, packet_size, app_name=None, now=None):
+        """Regjistro një paketë për lidhjen dhe kthe regjistrimin e përditësuar"""
+        if now is None:
+            now = time.monotonic()
+
+        flows = self.flows
+        record = flows.get(key)
+        if record is not None:
+            if now - record.last_packet_time > self.idle_timeout:
+                self.counters['expired_idle'] += 1
+                record = None
+            elif now - record.start_time > self.active_timeout:
+                self.counters['expired_active'] += 1
+                record = None
+            else:
+                flows.move_to_end(key)
+
+        if record is None:
+            flows.pop(key, None)
+            if len(flows) >= self.capacity:
+                flows.popitem(last=False)
+                self.counters['evicted_lru'] += 1
+            record = FlowRecord(now, app_name)
+            flows[key] = record
+            self.counters['created'] += 1
+
+        record.packet_count += 1
+        record.total_bytes += packet_size
+        record.last_packet_time = now
+
+        if now - self.last_sweep >= self.sweep_interval:
+            self.expire(now)
+        return record
+
+    def expire(self, now=None):
+        """Largo lidhjet që kanë kaluar afatin e mosaktivitetit"""
+        if now is None:
+            now = time.monotonic()
+        self.last_sweep = now
+
+        flows = self.flows
+        deadline = now - self.idle_timeout
+        expired = 0
+        # Lidhjet më të vjetra janë në fillim, prandaj ndalemi te e para aktive
+        while flows:
+            key, record = next(iter(flows.items()))
+            if record.last_packet_time > deadline:
+                break
+            del flows[key]
+            expired += 1
+        self.counters['expired_idle'] += expired
+        return expired
+
+    def stats(self):
+        """Kthe numëruesit e zënies dhe të largimeve"""
+        stats = dict(self.counters)
+        stats['active_flows'] = len(self.flows)
+        stats['capacity'] = self.capacity
+        stats['occupancy'] = len(self.flows) / self.capacity
+        return stats
+
+def packet_feature_row(flow, info):
+    """Karakteristikat e paketës si tuple në renditjen e FEATURE_KEYS, pa ndërtuar dict"""
+    # Llogarit delta kohore dhe shpejtësinë e paketave
+    time_delta = flow.duration()
+    packet_rate = flow.packet_count / time_delta if time_delta > 0 else 0
+
+    return (
+        info.length,
+        1 if info.proto == PROTO_TCP else 2,
+        info.sport,
+        info.dport,
+        info.ttl,
+        info.window_size,
+        info.tcp_flags,
+        time_delta,
+        packet_rate,
+        time_delta
+    )
@@ -0,0 +1,325 @@
+import os
+import sys
+import time
+import bisect
+import socket
+import logging
+import threading
+import numpy as np
+
+# Gjatësia e adresës në bajte për secilën familje
+ADDRESS_BYTES = {
+    socket.AF_INET: 4,
+    socket.AF_INET6: 16
+}
+
+def parse_prefix(text):
+    """Lexo '1.2.3.0/24', '2001:db8::/32' ose një adresë të vetme; kthen (familja, fillimi, fundi)"""
+    address, _, length = text.partition('/')
+    family = socket.AF_INET6 if ':' in address else socket.AF_INET
+    try:
+        packed = socket.inet_pton(family, address)
+    except OSError:
+        return None
+    bits = len(packed) * 8
+    prefix_length = int(length) if length else bits
+    if not 0 <= prefix_length <= bits:
+        return None
+    host_bits = bits - prefix_length
+    start = (int.from_bytes(packed, 'big') >> host_bits) << host_bits
+    return family, start, start + (1 << host_bits) - 1
+
+def read_feed(path):
+    """Lexo prefikset nga një skedar feed-i: një IP ose CIDR në rresht, me komente '#' ose ';'"""
+    prefixes = []
+    invalid = 0
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.split('#', 1)[0].split(';', 1)[0].strip()
+            if not line:
+                continue
+            # Formatet CSV/me hapësira: vlen vetëm kolona e parë
+            token = line.replace(',', ' ').split(None, 1)[0]
+            prefix = parse_prefix(token)
+            if prefix is None:
+                invalid += 1
+            else:
+                prefixes.append(prefix)
+    return prefixes, invalid
+
+def flatten_prefixes(prefixes):
+    """Ktheji prefikset e mbivendosura në intervale të ndara, secili me etiketën e prefiksit më të gjatë"""
+    # Prefikset CIDR janë ose të ndara ose të përfshira; renditja (fillimi, më i gjeri i pari)
+    # e bën prefiksin në majë të stivës gjithmonë më specifikin që përmban pozicionin aktual
+    ordered = sorted(prefixes, key=lambda prefix: (prefix[0], -prefix[1]))
+    starts, ends, labels = [], [], []
+
+    def emit(start, end, label):
+        if ends and labels[-1] == label and ends[-1] + 1 == start:
+            ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+            labels.append(label)
+
+    stack = []
+    cursor = 0
+    previous = None
+    for start, end, label in ordered:
+        if (start, end) == previous:
+            continue
+        previous = (start, end)
+        while stack and stack[-1][0] < start:
+            top_end, top_label = stack.pop()
+            if cursor <= top_end:
+                emit(cursor, top_end, top_label)
+                cursor = top_end + 1
+        if stack and cursor < start:
+            emit(cursor, start - 1, stack[-1][1])
+        cursor = start
+        stack.append((end, label))
+    while stack:
+        top_end, top_label = stack.pop()
+        if cursor <= top_end:
+            emit(cursor, top_end, top_label)
+            cursor = top_end + 1
+    return starts, ends, labels
+
+def build_ipv4_table(prefixes):
+    """Intervalet IPv4 me NumPy; cikli me stivë përdoret vetëm për grupet me prefikse të përfshira"""
+    values = np.array(prefixes, dtype=np.uint64).reshape(-1, 3)
+    starts, ends, labels = values[:, 0], values[:, 1], values[:, 2]
+    order = np.lexsort((starts - ends, starts))
+    starts, ends, labels = starts[order], ends[order], labels[order]
+    unique = np.ones(len(starts), dtype=bool)
+    unique[1:] = (starts[1:] != starts[:-1]) | (ends[1:] != ends[:-1])
+    starts, ends, labels = starts[unique], ends[unique], labels[unique]
+
+    # Një prefiks është i përfshirë kur fillon brenda një prefiksi të mëparshëm
+    covered = np.zeros(len(starts), dtype=bool)
+    covered[1:] = starts[1:] <= np.maximum.accumulate(ends)[:-1]
+    if covered.any():
+        # Prefikset e ndara mbeten ashtu siç janë; vetëm grupet e mbivendosura rrafshohen
+        groups = np.cumsum(~covered) - 1
+        nested_groups = np.unique(groups[covered])
+        nested = np.isin(groups, nested_groups)
+        pieces = [(starts[~nested], ends[~nested], labels[~nested])]
+        flat = flatten_prefixes(list(zip(starts[nested].tolist(), ends[nested].tolist(), labels[nested].tolist())))
+        pieces.append(tuple(np.array(column, dtype=np.uint64) for column in flat))
+        starts = np.concatenate([piece[0] for piece in pieces])
+        ends = np.concatenate([piece[1] for piece in pieces])
+        labels = np.concatenate([piece[2] for piece in pieces])
+        order = np.argsort(starts, kind='stable')
+        starts, ends, labels = starts[order], ends[order], labels[order]
+    return starts.astype(np.uint32), ends.astype(np.uint32), labels.astype(np.uint16)
+
+def build_ipv6_table(prefixes):
+    """Intervalet IPv6 si bajte big-endian me gjatësi fikse: renditja e bajteve = renditja numerike"""
+    starts, ends, labels = flatten_prefixes(prefixes)
+    return (
+        np.array([start.to_bytes(16, 'big') for start in starts], dtype='S16'),
+        np.array([end.to_bytes(16, 'big') for end in ends], dtype='S16'),
+        np.array(labels, dtype=np.uint16)
+    )
+
+class ReputationIndex:
+    """Indeks i pandryshueshëm me intervale të renditura për longest-prefix match mbi IPv4/IPv6"""
+
+    def __init__(self, prefixes=(), feeds=()):
+        self.feeds = list(feeds)
+        self.prefix_count = len(prefixes)
+        self.invalid = 0
+        self.tables = {}
+        self.views = {}
+        ipv4 = [(start, end, label) for family, start, end, label in prefixes if family == socket.AF_INET]
+        ipv6 = [(start, end, label) for family, start, end, label in prefixes if family == socket.AF_INET6]
+        if ipv4:
+            table = self.tables[socket.AF_INET] = build_ipv4_table(ipv4)
+            # memoryview i jep bisect-it int Python pa krijuar skalarë NumPy për çdo krahasim
+            self.views[socket.AF_INET] = tuple(memoryview(array) for array in table)
+        if ipv6:
+            self.tables[socket.AF_INET6] = build_ipv6_table(ipv6)
+
+    @classmethod
+    def from_feeds(cls, paths):
+        """Ndërto indeksin nga skedarët e feed-eve; emri i skedarit bëhet etiketa e prefikseve"""
+        prefixes = []
+        feeds = []
+        invalid = 0
+        for path in paths:
+            label = len(feeds)
+            feeds.append(os.path.splitext(os.path.basename(path))[0])
+            feed_prefixes, feed_invalid = read_feed(path)
+            invalid += feed_invalid
+            prefixes.extend((family, start, end, label) for family, start, end in feed_prefixes)
+        index = cls(prefixes, feeds)
+        index.invalid += invalid
+        return index
+
+    def lookup(self, ip):
+        """Kthe emrin e feed-it të prefiksit më të gjatë që përmban ip-në, ose None"""
+        if not self.tables or not ip:
+            return None
+        family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+        table = self.tables.get(family)
+        if table is None:
+            return None
+        try:
+            packed = socket.inet_pton(family, ip)
+        except OSError:
+            return None
+        views = self.views.get(family)
+        if views is not None:
+            starts, ends, labels = views
+            address = int.from_bytes(packed, 'big')
+            position = bisect.bisect_right(starts, address) - 1
+            if position >= 0 and address <= ends[position]:
+                return self.feeds[labels[position]]
+            return None
+        starts, ends, labels = table
+        position = int(starts.searchsorted(packed, side='right')) - 1
+        # Skalari S16 i NumPy-t i heq bajtet NUL në fund (p.sh. fundi i 2001:db8::100/128),
+        # prandaj plotësohet përsëri në 16 bajte para krahasimit me bytes të Python-it
+        if position >= 0 and packed <= ends[position].ljust(16, b'\x00'):
+            return self.feeds[labels[position]]
+        return None
+
+    def interval_count(self):
+        return sum(len(table[0]) for table in self.tables.values())
+
+    def nbytes(self):
+        """Memoria e tabelave të intervaleve në bajte"""
+        return sum(array.nbytes for table in self.tables.values() for array in table)
+
+    def bytes_per_prefix(self):
+        return self.nbytes() / self.prefix_count if self.prefix_count else 0.0
+
+class IpReputation:
+    """Kontrollon destinacionet kundër feed-eve lokale; indeksi rindërtohet në sfond dhe zëvendësohet atomikisht"""
+
+    def __init__(self, paths=(), refresh_interval=300.0):
+        self.paths = list(paths)
+        self.refresh_interval = refresh_interval
+        self.index = ReputationIndex()
+        self.mtimes = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.worker = None
+        self.hits_by_feed = {}
+        self.stats = {
+            'hits': 0,
+            'checks': 0,
+            'prefixes': 0,
+            'intervals': 0,
+            'invalid': 0,
+            'bytes': 0,
+            'bytes_per_prefix': 0.0,
+            'rebuilds': 0,
+            'failed_rebuilds': 0,
+            'build_seconds': 0.0
+        }
+
+    def start(self):
+        """Ngarko feed-et dhe rindërto indeksin kur ndryshojnë, pa vonuar nisjen e kapjes"""
+        if not self.paths:
+            return
+        self.stopped.clear()
+        self.worker = threading.Thread(target=self.run, name="IpReputation", daemon=True)
+        self.worker.start()
+
+    def stop(self, timeout=2.0):
+        self.stopped.set()
+        if self.worker is not None:
+            self.worker.join(timeout)
+            self.worker = None
+
+    def run(self):
+        while True:
+            mtimes = self.feed_mtimes()
+            if mtimes != self.mtimes:
+                self.reload(mtimes)
+            if self.stopped.wait(self.refresh_interval):
+                break
+
+    def feed_mtimes(self):
+        mtimes = []
+        for path in self.paths:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return mtimes
+
+    def reload(self, mtimes=None):
+        """Ndërto një indeks të ri dhe zëvendëso të vjetrin vetëm nëse ndërtimi pati sukses"""
+        started = time.perf_counter()
+        try:
+            paths = [path for path in self.paths if os.path.exists(path)]
+            index = ReputationIndex.from_feeds(paths)
+        except Exception as e:
+            self.stats['failed_rebuilds'] += 1
+            logging.error(f"Gabim gjatë ngarkimit të feed-eve të reputacionit: {e}")
+            return False
+
+        # Paketat në fluturim vazhdojnë me indeksin e vjetër; pas caktimit të gjitha shohin të riun
+        self.index = index
+        self.mtimes = mtimes if mtimes is not None else self.feed_mtimes()
+        with self.lock:
+            self.hits_by_feed = {feed: self.hits_by_feed.get(feed, 0) for feed in index.feeds}
+        elapsed = time.perf_counter() - started
+        self.stats.update({
+            'prefixes': index.prefix_count,
+            'intervals': index.interval_count(),
+            'invalid': index.invalid,
+            'bytes': index.nbytes(),
+            'bytes_per_prefix': index.bytes_per_prefix(),
+            'build_seconds': elapsed
+        })
+        self.stats['rebuilds'] += 1
+        logging.info(
+            f"Indeksi i reputacionit u ndërtua: {index.prefix_count} prefikse nga {len(index.feeds)} feed-e, "
+            f"{index.bytes_per_prefix():.1f} bajte/prefiks, {elapsed:.2f} s"
+        )
+        return True
+
+    def check(self, ip):
+        """Kthe feed-in që e rendit ip-në si keqdashëse, ose None"""
+        index = self.index
+        if not index.tables:
+            return None
+        self.stats['checks'] += 1
+        feed = index.lookup(ip)
+        if feed is not None:
+            self.stats['hits'] += 1
+            with self.lock:
+                self.hits_by_feed[feed] = self.hits_by_feed.get(feed, 0) + 1
+        return feed
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        with self.lock:
+            stats['hits_by_feed'] = dict(self.hits_by_feed)
+        return stats
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2:
+        print("Përdorimi: python ip_reputation.py FEED [FEED ...] [--lookup IP]")
+        sys.exit(1)
+    args = sys.argv[1:]
+    lookup = None
+    if '--lookup' in args:
+        position = args.index('--lookup')
+        lookup = args[position + 1] if position + 1 < len(args) else None
+        del args[position:position + 2]
+    reputation = IpReputation(args)
+    reputation.reload()
+    print(f"Prefikse: {reputation.stats['prefixes']}, intervale: {reputation.stats['intervals']}, "
+          f"të pavlefshme: {reputation.stats['invalid']}")
+    print(f"Memoria: {reputation.stats['bytes']} bajte ({reputation.stats['bytes_per_prefix']:.1f} bajte/prefiks), "
+          f"ndërtimi: {reputation.stats['build_seconds']:.2f} s")
+    if lookup:
+        print(f"{lookup}: {reputation.check(lookup) or 'nuk gjendet'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import json
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+ALERT_LOGGER = 'firewall.alerts'
+
+class DropOldestQueue(queue.Queue):
+    """Radhë e kufizuar që, kur është plot, hedh rekordin më të vjetër në vend që të bllokojë"""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.dropped = 0
+
+    def put(self, item, block=True, timeout=None):
+        with self.not_full:
+            if 0 < self.maxsize <= self._qsize():
+                self._get()
+                self.unfinished_tasks -= 1
+                self.dropped += 1
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def put_nowait(self, item):
+        self.put(item, False)
+
+class JsonLinesFormatter(logging.Formatter):
+    """Shkruan alarmin e strukturuar si një rresht JSON"""
+
+    def format(self, record):
+        alert = dict(record.alert)
+        alert['time'] = record.created
+        alert['level'] = record.levelname
+        return json.dumps(alert)
+
+def is_alert(record):
+    return hasattr(record, 'alert')
+
+def is_not_alert(record):
+    return not hasattr(record, 'alert')
+
+def setup_logging(log_file='firewall.log', level=logging.INFO, max_bytes=10 * 1024 * 1024,
+                  backup_count=5, queue_size=10000, alert_file=None, console=True):
+    """Dërgo logimin përmes një radhe te një thread i veçantë; kthen listener-in për ta ndaluar"""
+    log_queue = DropOldestQueue(queue_size)
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    file_handler.setFormatter(formatter)
+    file_handler.addFilter(is_not_alert)
+    handlers.append(file_handler)
+
+    if console:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        stream_handler.addFilter(is_not_alert)
+        handlers.append(stream_handler)
+
+    if alert_file:
+        alert_handler = RotatingFileHandler(alert_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        alert_handler.setFormatter(JsonLinesFormatter())
+        alert_handler.addFilter(is_alert)
+        handlers.append(alert_handler)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(log_queue))
+
+    alert_logger = logging.getLogger(ALERT_LOGGER)
+    alert_logger.propagate = False
+    alert_logger.setLevel(logging.INFO)
+    if alert_file:
+        alert_logger.addHandler(QueueHandler(log_queue))
+
+    listener.start()
+    return listener
+
+class AlertLimiter:
+    """Deduplikon dhe kufizon alarmet sipas (burimi, destinacioni, arsyeja), me përmbledhje të shtypjeve"""
+
+    def __init__(self, window=60.0, burst=1, capacity=10000, sweep_interval=1.0):
+        self.window = window
+        self.burst = max(1, int(burst))
+        self.capacity = max(1, int(capacity))
+        self.sweep_interval = sweep_interval
+        # çelësi -> [fillimi i dritares, të lejuara, të shtypura], sipas fillimit të dritares
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.last_sweep = time.monotonic()
+        self.stop_event = threading.Event()
+        self.worker = None
+        self.stream = logging.getLogger(ALERT_LOGGER)
+        self.stats = {
+            'emitted': 0,
+            'suppressed': 0,
+            'summaries': 0
+        }
+
+    def alert(self, reason, src, dst, message, level=logging.WARNING, now=None, **fields):
+        """Logo alarmin nëse çelësi nuk e ka tejkaluar kufirin; kthen True nëse u logua"""
+        if now is None:
+            now = time.monotonic()
+        key = (src, dst, reason)
+        summaries = []
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                if entry is not None and entry[2]:
+                    summaries.append((key, entry[2]))
+                entry = [now, 0, 0]
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+                if len(self.entries) > self.capacity:
+                    old_key, old_entry = self.entries.popitem(last=False)
+                    if old_entry[2]:
+                        summaries.append((old_key, old_entry[2]))
+
+            allowed = entry[1] < self.burst
+            if allowed:
+                entry[1] += 1
+                self.stats['emitted'] += 1
+            else:
+                entry[2] += 1
+                self.stats['suppressed'] += 1
+
+            if now - self.last_sweep >= self.window:
+                summaries.extend(self.sweep(now))
+
+        for summary_key, count in summaries:
+            self.log_summary(summary_key, count)
+        if allowed:
+            logging.log(level, message)
+            if self.stream.handlers:
+                alert = {'reason': reason, 'src': src, 'dst': dst, 'message': message}
+                alert.update(fields)
+                self.stream.log(level, message, extra={'alert': alert})
+        return allowed
+
+    def start(self):
+        """Nis thread-in që logon përmbledhjet e dritareve të mbaruara edhe kur flood-i ka ndaluar"""
+        if self.worker is not None:
+            return
+        self.stop_event.clear()
+        self.worker = threading.Thread(target=self.run, name="AlertSweeper", daemon=True)
+        self.worker.start()
+
+    def stop(self, timeout=2.0):
+        """Ndalo thread-in e përmbledhjeve"""
+        self.stop_event.set()
+        if self.worker is not None:
+            self.worker.join(timeout)
+            self.worker = None
+
+    def run(self):
+        while not self.stop_event.wait(self.sweep_interval):
+            try:
+                self.sweep_expired()
+            except Exception as e:
+                logging.error(f"Gabim gjatë përmbledhjes së alarmeve: {e}")
+
+    def sweep_expired(self, now=None):
+        """Logo përmbledhjet e dritareve që kanë mbaruar pa pritur alarmin e radhës"""
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            summaries = self.sweep(now)
+        for key, count in summaries:
+            self.log_summary(key, count)
+
+    def sweep(self, now):
+        """Hiq dritaret e mbaruara dhe kthe çelësat me ngjarje të shtypura"""
+        self.last_sweep = now
+        summaries = []
+        while self.entries:
+            key, entry = next(iter(self.entries.items()))
+            if now - entry[0] < self.window:
+                break
+            del self.entries[key]
+            if entry[2]:
+                summaries.append((key, entry[2]))
+        return summaries
+
+    def flush(self):
+        """Logo përmbledhjet e mbetura (p.sh. gjatë ndalimit)"""
+        with self.lock:
+            summaries = [(key, entry[2]) for key, entry in self.entries.items() if entry[2]]
+            self.entries.clear()
+        for key, count in summaries:
+            self.log_summary(key, count)
+
+    def log_summary(self, key, count):
+        src, dst, reason = key
+        with self.lock:
+            self.stats['summaries'] += 1
+        logging.warning(f"{count} ngjarje të ngjashme u shtypën ({reason}: {src} -> {dst})")
@@ -2,232 +2,971 @@
 import os
 import sys
 import time
-from scapy.all import *
-from scapy.layers.inet import IP, TCP, UDP
-import psutil
+import signal
+import threading
 import logging
 from datetime import datetime
 import json
 from pathlib import Path
-from ml_analyzer import NetworkBehaviorAnalyzer
-
-# Konfiguro logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('firewall.log'),
-        logging.StreamHandler()
-    ]
+import argparse
+from ml_analyzer import NetworkBehaviorAnalyzer, SUSPICIOUS_THRESHOLD
+from batch_scorer import BatchScoringEngine
+from flow_table import FlowTable, packet_feature_row
+from flow_features import FlowFeatureTracker
+from process_attribution import SocketProcessIndex
+from packet_parser import packet_info_from_scapy
+from background_trainer import BackgroundTrainer
+from state_store import StateStore, STATE_FILE
+from ip_reputation import IpReputation
+from sketch_detector import SketchScanDetector, FLOOD_DESTINATION
+from shard_pipeline import ShardedPipeline
+from control_server import ControlServer, CONTROL_SOCKET
+from firewall_stats import FirewallStats
+from metrics import MetricsRegistry, MetricsExporter
+from log_pipeline import AlertLimiter, setup_logging, LOG_FORMAT
+from verdict_cache import VerdictCache, VERDICT_ALLOW, VERDICT_BLOCK, VERDICT_SUSPICIOUS
+from capture_filter import (
+    AdaptiveSampler, CaptureFilter, build_bpf_filter, kernel_filter_available,
+    attach_bpf_filter, load_capture_rules
 )
+from decision_queue import (
+    DecisionQueue, OperatorConsole, DECISION_APP, DECISION_CONNECTION,
+    POLICIES, POLICY_ALLOW, POLICY_DENY, POLICY_QUARANTINE
+)
+
+# Gjendjet e gatishmërisë së firewall-it
+STATE_INITIALIZED = 'initialized'
+STATE_LOADING_MODEL = 'loading_model'
+STATE_READY = 'ready'
+STATE_DEGRADED = 'degraded'
+STATE_STOPPED = 'stopped'
+
+# Sa pritet që proceset punëtore të ngarkojnë modelin
+SHARD_START_TIMEOUT = 60.0
+
+# Pjesët që mund të ringarkohen pa ndalur kapjen
+RELOAD_PARTS = ('model', 'rules', 'apps')
+APPS_FILE = 'known_apps.json'
+
+def time_left(deadline, minimum=0.1):
+    """Koha që mbetet deri në afatin e ndalimit, me një minimum për çdo hap"""
+    return max(minimum, deadline - time.monotonic())
 
 class ZeroTrustFirewall:
-    def __init__(self):
+    def __init__(self, batch_size=64, batch_timeout=0.005,
+                 flow_capacity=65536, flow_idle_timeout=120.0, flow_active_timeout=3600.0,
+                 attribution_refresh=1.0, process_metadata_ttl=30.0,
+                 default_policy=POLICY_QUARANTINE, decisions=None, interactive=True,
+                 verdict_flow_ttl=30.0, verdict_destination_ttl=300.0, rescore_packets=200,
+                 train_interval=30.0, train_min_samples=32,
+                 capture_backend='scapy', interface=None, capture_rules=None, capture_ring_mb=8,
+                 sample_first_packets=8, sample_every=16, overload_watermark=4096,
+                 scoring_mode='packet', flow_window_seconds=10.0, flow_window_packets=64,
+                 state_path=STATE_FILE, metrics_enabled=True, metrics_port=None,
+                 metrics_file=None, metrics_interval=10.0, alert_window=60.0, alert_burst=1,
+                 reputation_feeds=None, reputation_refresh=300.0,
+                 scan_detection=True, sketch_memory=1 << 20, scan_window=10.0,
+                 shard_workers=0, shard_ring_slots=65536, control_socket=None, local_addresses=None):
+        if default_policy not in POLICIES:
+            raise ValueError(f"Politikë e panjohur: {default_policy}")
+        if scoring_mode not in ('packet', 'flow'):
+            raise ValueError(f"Mënyrë e panjohur pikëzimi: {scoring_mode}")
+        self.state = STATE_INITIALIZED
+        self.running = False
+        self.model_ready = threading.Event()
+        self.model_loader = None
+        self.capture_thread = None
+        self.started_at = None
+        self.startup_seconds = None
+        self.model_load_seconds = None
+        self.stats = FirewallStats()
+        # Alarmet e përsëritura për të njëjtin (burim, destinacion, arsye) përmblidhen
+        self.alerts = AlertLimiter(window=alert_window, burst=alert_burst)
+        # Histogramet e fazave mund të ndizen/fiken gjatë punës pa rinisur firewall-in
+        self.metrics = MetricsRegistry(enabled=metrics_enabled)
+        self.metrics_exporter = None
+        if metrics_port is not None or metrics_file:
+            self.metrics_exporter = MetricsExporter(
+                self.metrics,
+                self.metrics_values,
+                port=metrics_port,
+                snapshot_path=metrics_file,
+                snapshot_interval=metrics_interval
+            )
         self.known_apps = {}
         self.suspicious_ips = set()
+        self.quarantined_ips = set()
         self.rules = {}
-        self.ml_analyzer = NetworkBehaviorAnalyzer()
-        self.connection_history = {}
-        self.ml_analyzer.load_model()
+        self.default_policy = default_policy
+        self.capture_backend = capture_backend
+        self.capture_ring_mb = capture_ring_mb
+        self.interface = interface
+        self.capture = None
+        self.sniffer = None
+        # Filtri BPF gjenerohet nga rregullat e kapjes; në mungesë të tij filtrohet në userspace
+        self.capture_rules = capture_rules if capture_rules is not None else load_capture_rules()
+        self.bpf_filter = build_bpf_filter(self.capture_rules)
+        self.kernel_filter_active = False
+        self.capture_filter = CaptureFilter(self.capture_rules)
+        self.sampler = AdaptiveSampler(
+            first_packets=sample_first_packets,
+            sample_every=sample_every,
+            high_watermark=overload_watermark,
+            low_watermark=overload_watermark // 4
+        )
+        # Vendimet e operatorit vijnë nga CLI ose GUI, jashtë thread-it të kapjes
+        self.decisions = decisions if decisions is not None else DecisionQueue()
+        self.decisions.resolver = self.resolve_decision
+        self.operator_console = OperatorConsole(self.decisions) if interactive else None
+        self.scoring_mode = scoring_mode
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.train_interval = train_interval
+        self.train_min_samples = train_min_samples
+        # Modeli, motori i pikëzimit dhe trajnimi krijohen në sfond nga start()
+        self.ml_analyzer = None
+        self.scoring_engine = None
+        self.trainer = None
+        self.flow_table = FlowTable(
+            capacity=flow_capacity,
+            idle_timeout=flow_idle_timeout,
+            active_timeout=flow_active_timeout
+        )
+        # Në mënyrën 'flow' modeli pikëzon karakteristikat e lidhjes një herë për dritare
+        self.flow_features = None
+        if scoring_mode == 'flow' and shard_workers <= 0:
+            self.flow_features = FlowFeatureTracker(
+                window_seconds=flow_window_seconds,
+                window_packets=flow_window_packets,
+                idle_timeout=flow_idle_timeout,
+                capacity=flow_capacity
+            )
+        # Skanimet dhe flood-et zbulohen me skica me memorie fikse, pa gjendje për çdo lidhje
+        self.sketches = None
+        if scan_detection:
+            self.sketches = SketchScanDetector(
+                memory_budget=sketch_memory,
+                window_seconds=scan_window,
+                is_local=self.is_local_address
+            )
+        # Me procese punëtore, kapja vetëm shpërndan kokat sipas lidhjes; secili proces zotëron
+        # pjesën e vet të tabelës së lidhjeve, cache-in e vendimeve për lidhjet dhe modelin
+        self.shards = None
+        if shard_workers > 0:
+            shard_capacity = max(1, flow_capacity // shard_workers)
+            self.shards = ShardedPipeline(
+                shard_workers,
+                self.handle_score,
+                feature_set=scoring_mode,
+                ring_slots=shard_ring_slots,
+                batch_size=max(batch_size, 256),
+                flow_options={
+                    'capacity': shard_capacity,
+                    'idle_timeout': flow_idle_timeout,
+                    'active_timeout': flow_active_timeout
+                },
+                flow_feature_options={
+                    'window_seconds': flow_window_seconds,
+                    'window_packets': flow_window_packets,
+                    'idle_timeout': flow_idle_timeout,
+                    'capacity': shard_capacity
+                },
+                verdict_options={
+                    'flow_ttl': verdict_flow_ttl,
+                    'rescore_packets': rescore_packets,
+                    'capacity': shard_capacity
+                },
+                sampler_options={
+                    'first_packets': sample_first_packets,
+                    'sample_every': sample_every,
+                    'high_watermark': min(overload_watermark, shard_ring_slots // 2),
+                    'low_watermark': min(overload_watermark, shard_ring_slots // 2) // 4
+                }
+            )
+        # Rruga e shpejtë: lidhjet e vendosura nuk kalojnë nga ML deri në ripikëzim
+        self.verdict_cache = VerdictCache(
+            flow_ttl=verdict_flow_ttl,
+            destination_ttl=verdict_destination_ttl,
+            rescore_packets=rescore_packets,
+            capacity=flow_capacity
+        )
+        self.process_index = SocketProcessIndex(
+            refresh_interval=attribution_refresh,
+            metadata_ttl=process_metadata_ttl,
+            local_addresses=local_addresses or ()
+        )
+        # Feed-et lokale të reputacionit (IP/CIDR) kontrollohen para çdo pune ML
+        self.reputation = IpReputation(reputation_feeds or (), refresh_interval=reputation_refresh)
+        # Vendimet ruhen në SQLite (WAL) me commit në grup, jo me rishkrim të plotë të JSON-it
+        self.state_store = StateStore(state_path)
+        # Koha e modifikimit të known_apps.json që është importuar ose eksportuar së fundi
+        self.apps_mtime = 0.0
         self.load_known_apps()
-        self.setup_packet_filter()
+        # Modeli, rregullat dhe aplikacionet ringarkohen me SIGHUP ose nga socket-i i kontrollit
+        self.reload_lock = threading.Lock()
+        self.control = ControlServer(self.handle_control, path=control_socket) if control_socket else None
         logging.info("Firewall-i u inicializua me sukses")
 
+    def start(self):
+        """Nis kapjen menjëherë nën politikën e paracaktuar dhe ngarko modelin në sfond"""
+        if self.running:
+            return
+        self.started_at = time.monotonic()
+        self.running = True
+        self.state = STATE_LOADING_MODEL
+        self.process_index.start()
+        self.reputation.start()
+        self.state_store.start()
+        self.alerts.start()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.start()
+        if self.operator_console is not None:
+            self.operator_console.start()
+        if self.control is not None:
+            self.control.start()
+        self.model_loader = threading.Thread(target=self.load_model, name="ModelLoader", daemon=True)
+        self.model_loader.start()
+        self.capture_thread = threading.Thread(target=self.setup_packet_filter, name="Capture", daemon=True)
+        self.capture_thread.start()
+        self.startup_seconds = time.monotonic() - self.started_at
+        logging.info(f"Kapja u nis për {self.startup_seconds * 1000:.0f} ms; modeli po ngarkohet në sfond")
+
+    def stop(self, timeout=5.0):
+        """Ndalo kapjen dhe thread-et e sfondit brenda afatit të dhënë"""
+        if not self.running:
+            return
+        deadline = time.monotonic() + timeout
+        self.running = False
+        if self.capture is not None:
+            self.capture.stop()
+        if self.sniffer is not None and self.sniffer.running:
+            # Mbyll select-in e sniffer-it menjëherë, edhe kur nuk vjen asnjë paketë
+            try:
+                self.sniffer.stop(join=False)
+            except Exception as e:
+                logging.error(f"Gabim gjatë ndalimit të sniffer-it: {e}")
+        if self.control is not None:
+            self.control.stop()
+        for worker in (self.capture_thread, self.model_loader):
+            if worker is not None and worker is not threading.current_thread():
+                worker.join(time_left(deadline))
+                if worker.is_alive():
+                    logging.warning(f"Thread-i {worker.name} nuk u ndal brenda afatit")
+        if self.scoring_engine is not None:
+            self.scoring_engine.stop(time_left(deadline))
+        if self.shards is not None:
+            self.shards.stop(time_left(deadline))
+        if self.trainer is not None:
+            self.trainer.stop(time_left(deadline))
+        self.process_index.stop(time_left(deadline))
+        self.reputation.stop(time_left(deadline))
+        if self.operator_console is not None:
+            self.operator_console.stop()
+        self.alerts.stop(time_left(deadline))
+        self.alerts.flush()
+        self.save_known_apps()
+        self.state_store.stop(time_left(deadline))
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        self.state = STATE_STOPPED
+        logging.info("Firewall-i u ndal")
+
+    def load_model(self):
+        """Ngarko modelin dhe nis pikëzimin ML pa vonuar kapjen"""
+        try:
+            started = time.monotonic()
+            analyzer = NetworkBehaviorAnalyzer(feature_set=self.scoring_mode)
+            if not self.running:
+                return
+            scoring_engine = None
+            if self.shards is not None:
+                # Proceset punëtore ngarkojnë secili modelin e vet; këtu mbetet trajnimi nga vendimet e mbledhura
+                self.shards.start()
+                if not self.shards.wait_ready(SHARD_START_TIMEOUT):
+                    raise RuntimeError("proceset punëtore nuk u nisën")
+            else:
+                scoring_engine = BatchScoringEngine(
+                    analyzer,
+                    max_batch_size=self.batch_size,
+                    max_delay=self.batch_timeout,
+                    metrics=self.metrics
+                )
+                scoring_engine.start()
+            # Trajnimi bëhet në sfond; pikëzimi nuk pret kurrë modelin e ri
+            trainer = BackgroundTrainer(
+                analyzer,
+                min_new_samples=self.train_min_samples,
+                interval=self.train_interval
+            )
+            trainer.start()
+            self.ml_analyzer = analyzer
+            self.trainer = trainer
+            # Motori publikohet i fundit: paketat pikëzohen vetëm kur gjithçka është gati
+            self.scoring_engine = scoring_engine
+            self.model_load_seconds = time.monotonic() - started
+            self.state = STATE_READY
+            self.model_ready.set()
+            logging.info(f"Modeli u ngarkua për {self.model_load_seconds:.2f} s; pikëzimi ML është aktiv")
+        except Exception as e:
+            self.state = STATE_DEGRADED
+            logging.error(f"Gabim gjatë ngarkimit të modelit: {e}")
+
+    def readiness(self):
+        """Kthe gjendjen e gatishmërisë dhe kohët e nisjes"""
+        return {
+            'state': self.state,
+            'capturing': self.running,
+            'model_ready': self.model_ready.is_set(),
+            'startup_seconds': self.startup_seconds,
+            'model_load_seconds': self.model_load_seconds,
+            'unscored': self.stats.counters['unscored']
+        }
+
+    def stats_snapshot(self):
+        """Kthe numëruesit aktualë të firewall-it për GUI-në dhe monitorimin"""
+        engine = self.engine_stats()
+        return self.stats.snapshot(
+            state=self.state,
+            scored=engine.get('scored', 0),
+            batches=engine.get('batches', 0),
+            inference_seconds=engine.get('inference_seconds', 0.0),
+            queue_depth=engine.get('queue_depth', 0),
+            flows=engine['flows'] if 'flows' in engine else len(self.flow_table),
+            blocked=len(self.suspicious_ips),
+            quarantined=len(self.quarantined_ips),
+            pending_decisions=len(self.decisions.pending_decisions())
+        )
+
+    def metrics_values(self):
+        """Numëruesit dhe gauge-t për eksportin e metrikave, përfshirë humbjet e kapjes"""
+        values = self.stats_snapshot()
+        engine = self.engine_stats()
+        values['scoring_dropped'] = engine.get('dropped', 0)
+        if self.shards is not None:
+            values['shard_workers'] = self.shards.workers
+            values['shard_dispatched'] = engine['dispatched']
+            values['shard_verdicts'] = engine['verdicts']
+        values['sampler_shed'] = self.sampler.stats['shed']
+        values['alerts_suppressed'] = self.alerts.stats['suppressed']
+        values['verdict_cache_hit_rate'] = self.verdict_cache.stats()['hit_rate']
+        if self.sketches is not None:
+            sketch_stats = self.sketches.counters
+            for name in ('port_scans', 'host_sweeps', 'source_floods', 'destination_floods'):
+                values[name] = sketch_stats[name]
+            values['sketch_memory_bytes'] = self.sketches.nbytes()
+        values['reputation_prefixes'] = self.reputation.stats['prefixes']
+        values['reputation_bytes_per_prefix'] = self.reputation.stats['bytes_per_prefix']
+        values['model_ready'] = 1 if self.model_ready.is_set() else 0
+        values['metrics_enabled'] = 1 if self.metrics.enabled else 0
+        if self.capture is not None:
+            self.capture.update_kernel_stats()
+            values['kernel_packets'] = self.capture.stats['kernel_packets']
+            values['kernel_drops'] = self.capture.stats['kernel_drops']
+        return values
+
+    def engine_stats(self):
+        """Statistikat e pikëzimit: nga motori lokal ose të mbledhura nga proceset punëtore"""
+        if self.shards is not None:
+            totals = self.shards.totals()
+            totals['queue_depth'] = self.shards.backlog()
+            totals['dropped'] = totals['ring_dropped']
+            return totals
+        return self.scoring_engine.get_stats() if self.scoring_engine is not None else {}
+
     def load_known_apps(self):
-        """Ngarko aplikacionet e njohura dhe modelet e tyre të rrjetit"""
+        """Ngarko aplikacionet e njohura, destinacionet e bllokuara dhe rregullat"""
         try:
-            if os.path.exists('known_apps.json'):
-                with open('known_apps.json', 'r') as f:
-                    self.known_apps = json.load(f)
-                logging.info("Aplikacionet e njohura u ngarkuan me sukses")
+            if self.state_store.is_empty() and os.path.exists('known_apps.json'):
+                # Nisja e parë: migro aplikacionet nga formati i vjetër JSON
+                self.state_store.import_json('known_apps.json')
+            self.known_apps, destinations, self.rules = self.state_store.load()
+            if os.path.exists(APPS_FILE):
+                self.apps_mtime = os.path.getmtime(APPS_FILE)
+            self.suspicious_ips = {ip for ip, status in destinations.items() if status == POLICY_DENY}
+            self.quarantined_ips = {ip for ip, status in destinations.items() if status == POLICY_QUARANTINE}
+            logging.info("Aplikacionet e njohura u ngarkuan me sukses")
         except Exception as e:
             logging.error(f"Gabim gjatë ngarkimit të aplikacioneve: {e}")
 
     def save_known_apps(self):
-        """Ruaj aplikacionet e njohura dhe modelet e tyre të rrjetit"""
-        try:
-            with open('known_apps.json', 'w') as f:
-                json.dump(self.known_apps, f, indent=4)
-            logging.info("Aplikacionet e njohura u ruajtën me sukses")
-        except Exception as e:
-            logging.error(f"Gabim gjatë ruajtjes së aplikacioneve: {e}")
+        """Eksporto aplikacionet e njohura në known_apps.json (formati i përputhshëm)"""
+        if self.state_store.export_json(APPS_FILE):
+            self.apps_mtime = os.path.getmtime(APPS_FILE)
+
+    def request_reload(self, parts=RELOAD_PARTS):
+        """Nis ringarkimin në sfond (p.sh. nga SIGHUP), pa bllokuar thread-in që e kërkon"""
+        threading.Thread(target=self.reload, args=(parts,), name="Reloader", daemon=True).start()
+
+    def reload(self, parts=RELOAD_PARTS):
+        """Ringarko pjesët e kërkuara; secila verifikohet dhe zëvendësohet atomikisht, lidhjet ruhen"""
+        parts = RELOAD_PARTS if 'all' in parts else tuple(parts)
+        unknown = [part for part in parts if part not in RELOAD_PARTS]
+        if unknown:
+            return {'ok': False, 'error': f"Pjesë e panjohur: {', '.join(unknown)}"}
+        reloaders = {
+            'model': self.reload_model,
+            'rules': self.reload_rules,
+            'apps': self.reload_apps
+        }
+        with self.reload_lock:
+            started = time.monotonic()
+            results = {}
+            for part in parts:
+                try:
+                    results[part] = reloaders[part]()
+                except Exception as e:
+                    logging.error(f"Gabim gjatë ringarkimit ({part}): {e}")
+                    results[part] = False
+            if all(results.values()):
+                self.stats.counters['reloads'] += 1
+            else:
+                self.stats.counters['reload_errors'] += 1
+            seconds = time.monotonic() - started
+        logging.info(f"Ringarkimi përfundoi për {seconds:.2f} s: {results}")
+        return {'ok': all(results.values()), 'results': results, 'seconds': round(seconds, 3)}
+
+    def reload_model(self):
+        """Ngarko peshat e reja në analizuesin aktiv; motori i pikëzimit vazhdon pa ndalur"""
+        analyzer = self.ml_analyzer
+        if analyzer is None:
+            logging.warning("Modeli ende po ngarkohet; ringarkimi i modelit u anashkalua")
+            return False
+        if not analyzer.reload_weights():
+            return False
+        # Vendimet e modelit të vjetër nuk vlejnë më; tabela e lidhjeve ruhet
+        self.verdict_cache.clear()
+        if self.shards is not None:
+            self.shards.reload_model()
+        return True
+
+    def reload_rules(self):
+        """Rilexo rregullat e operatorit dhe destinacionet nga baza e gjendjes"""
+        self.state_store.flush()
+        _, destinations, rules = self.state_store.load()
+        invalid = [ip for ip, action in rules.items() if action not in POLICIES]
+        for ip in invalid:
+            logging.warning(f"Rregull i pavlefshëm për {ip}: {rules.pop(ip)}")
+        suspicious_ips = {ip for ip, status in destinations.items() if status == POLICY_DENY}
+        quarantined_ips = {ip for ip, status in destinations.items() if status == POLICY_QUARANTINE}
+        # Thread-i i kapjes sheh ose bashkësitë e vjetra ose të rejat, kurrë një gjendje të përzier
+        self.rules, self.suspicious_ips, self.quarantined_ips = rules, suspicious_ips, quarantined_ips
+        self.verdict_cache.clear()
+        logging.info(f"Rregullat u ringarkuan: {len(rules)} rregulla, {len(suspicious_ips)} destinacione të bllokuara")
+        return True
+
+    def reload_apps(self):
+        """Importo known_apps.json nëse ka ndryshuar dhe rilexo aplikacionet nga baza"""
+        if os.path.exists(APPS_FILE) and os.path.getmtime(APPS_FILE) > self.apps_mtime:
+            mtime = os.path.getmtime(APPS_FILE)
+            with open(APPS_FILE, 'r') as f:
+                apps = json.load(f)
+            if not isinstance(apps, dict) or not all(
+                isinstance(app, dict) and isinstance(app.get('allowed', False), bool) for app in apps.values()
+            ):
+                logging.error(f"{APPS_FILE} nuk ka formatin e pritur; aplikacionet nuk u ringarkuan")
+                return False
+            for name, app in apps.items():
+                self.state_store.put_app(name, app)
+            self.apps_mtime = mtime
+        self.state_store.flush()
+        known_apps, _, _ = self.state_store.load()
+        for name, app in self.known_apps.items():
+            # Aplikacionet që presin vendimin e operatorit ende nuk janë në bazë
+            if app.get('pending') and name not in known_apps:
+                known_apps[name] = app
+        self.known_apps = known_apps
+        self.verdict_cache.clear()
+        logging.info(f"Aplikacionet u ringarkuan: {len(known_apps)} aplikacione")
+        return True
+
+    def handle_control(self, command, args):
+        """Ekzekuto një komandë nga socket-i i kontrollit"""
+        if command == 'status':
+            status = self.readiness()
+            status.update(self.stats.counters)
+            status['flows'] = self.stats_snapshot()['flows']
+            status['ok'] = True
+            return status
+        if command == 'reload':
+            return self.reload(args or ('all',))
+        return {'ok': False, 'error': f"Komandë e panjohur: {command}"}
 
     def get_process_info(self, pid):
         """Merr informacionin e procesit për një PID të dhënë"""
-        try:
-            process = psutil.Process(pid)
-            return {
-                'name': process.name(),
-                'path': process.exe(),
-                'cmdline': process.cmdline()
-            }
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return None
+        return self.process_index.process_info(pid)
 
     def get_connection_key(self, src_ip, dst_ip, sport, dport, proto):
         """Gjenero një çelës unik për një lidhje"""
-        return f"{src_ip}:{sport}-{dst_ip}:{dport}-{proto}"
+        return (src_ip, dst_ip, sport, dport, proto)
 
-    def update_connection_history(self, packet, process_info):
+    def update_connection_history(self, info, process_info, now=None):
         """Përditëso historinë e lidhjeve me informacionin e paketës"""
-        if IP in packet:
-            src_ip = packet[IP].src
-            dst_ip = packet[IP].dst
-            
-            if TCP in packet:
-                sport = packet[TCP].sport
-                dport = packet[TCP].dport
-                proto = "TCP"
-                window_size = packet[TCP].window
-                tcp_flags = packet[TCP].flags
-            elif UDP in packet:
-                sport = packet[UDP].sport
-                dport = packet[UDP].dport
-                proto = "UDP"
-                window_size = 0
-                tcp_flags = 0
-            else:
+        conn_key = self.get_connection_key(info.src_ip, info.dst_ip, info.sport, info.dport, info.proto)
+        flow = self.flow_table.update(
+            conn_key, info.length, process_info['name'] if process_info else None, now
+        )
+        if self.flow_features is not None:
+            # Në mënyrën 'flow' pikëzohen vetëm dritaret e lidhjeve: pa rresht për çdo paketë
+            return None
+
+        # Rreshti i karakteristikave shkruhet direkt në grupin kolonar të pikëzimit
+        return packet_feature_row(flow, info)
+
+    def packet_callback(self, packet):
+        """Procesoj çdo paketë të rrjetit"""
+        try:
+            started = self.metrics.now()
+            info = packet_info_from_scapy(packet)
+            self.metrics.lap('dissect', started)
+            if info is not None:
+                self.process_packet(info)
+        except Exception as e:
+            self.report_packet_error(e)
+
+    def process_packet(self, info):
+        """Procesoj kokat e lexuara të një pakete (nga scapy ose AF_PACKET)"""
+        metrics = self.metrics
+        started = stage = metrics.now()
+        try:
+            self.stats.counters['packets'] += 1
+            if not self.kernel_filter_active and not self.capture_filter.allows(info):
+                self.stats.counters['filtered'] += 1
+                return
+            # Adresat nga feed-et e reputacionit trajtohen para atribuimit dhe ML
+            feed = self.reputation.check(info.dst_ip) or self.reputation.check(info.src_ip)
+            if feed is not None and self.rules.get(info.dst_ip) != POLICY_ALLOW:
+                self.handle_reputation_hit(info, feed)
                 return
+            stage = metrics.lap('filter', stage)
 
-            conn_key = self.get_connection_key(src_ip, dst_ip, sport, dport, proto)
-            
-            if conn_key not in self.connection_history:
-                self.connection_history[conn_key] = {
-                    'start_time': datetime.now(),
-                    'packet_count': 0,
-                    'total_bytes': 0,
-                    'last_packet_time': datetime.now(),
-                    'process_info': process_info
-                }
+            # Gjej procesin që zotëron socket-in lokal të paketës
+            process_info = self.process_index.lookup(
+                info.src_ip, info.sport, info.dst_ip, info.dport, info.proto
+            )
+            stage = metrics.lap('attribution', stage)
 
-            history = self.connection_history[conn_key]
-            history['packet_count'] += 1
-            history['total_bytes'] += len(packet)
-            history['last_packet_time'] = datetime.now()
-
-            # Llogarit delta kohore dhe shpejtësinë e paketave
-            time_delta = (history['last_packet_time'] - history['start_time']).total_seconds()
-            packet_rate = history['packet_count'] / time_delta if time_delta > 0 else 0
-
-            # Përgatit të dhënat e paketës për analizën ML
-            packet_data = {
-                'packet_size': len(packet),
-                'protocol': 1 if proto == "TCP" else 2,
-                'src_port': sport,
-                'dst_port': dport,
-                'ttl': packet[IP].ttl,
-                'window_size': window_size,
-                'tcp_flags': tcp_flags,
-                'time_delta': time_delta,
-                'packet_rate': packet_rate,
-                'connection_duration': time_delta
-            }
+            if process_info:
+                app_name = process_info['name']
+                if app_name not in self.known_apps:
+                    self.alerts.alert(
+                        'new_application', info.src_ip, info.dst_ip,
+                        f"U zbulua aplikacion i ri: {app_name}",
+                        app=app_name, path=process_info['path']
+                    )
+                    self.handle_new_application(app_name, process_info)
 
-            return packet_data
+            if self.shards is not None:
+                self.update_sketches(info)
+                metrics.lap('flow_update', stage)
+                self.dispatch_to_shard(info, process_info)
+                return
 
-    def packet_callback(self, packet):
-        """Procesoj çdo paketë të rrjetit"""
-        if IP in packet:
-            src_ip = packet[IP].src
-            dst_ip = packet[IP].dst
-            
-            try:
-                if TCP in packet:
-                    sport = packet[TCP].sport
-                    dport = packet[TCP].dport
-                    proto = "TCP"
-                elif UDP in packet:
-                    sport = packet[UDP].sport
-                    dport = packet[UDP].dport
-                    proto = "UDP"
+            # Përditëso historinë e lidhjeve dhe merr rreshtin e karakteristikave
+            features = self.update_connection_history(info, process_info)
+            self.update_sketches(info)
+            metrics.lap('flow_update', stage)
+
+            if self.flow_features is not None:
+                self.score_flow_windows(info)
+                return
+
+            if self.scoring_engine is None:
+                # Modeli ende po ngarkohet: vlejnë vetëm rregullat dhe politika e paracaktuar
+                self.stats.counters['unscored'] += 1
+                return
+
+            # Vetëm lidhjet e reja ose me vendim të skaduar shkojnë te ML
+            if self.cached_verdict(info, process_info) is None and self.should_sample(info):
+                # Vendos paketën në radhë për pikëzim në grup me ML
+                self.scoring_engine.submit(features, self.handle_score, info)
+
+        except Exception as e:
+            self.report_packet_error(e)
+        finally:
+            metrics.lap('packet_total', started)
+
+    def update_sketches(self, info):
+        """Skicat kanë nevojë për pamjen e plotë të trafikut, prandaj mbeten në procesin e kapjes"""
+        if self.sketches is not None:
+            detection = self.sketches.update(info)
+            if detection is not None:
+                self.handle_sketch_detection(info, detection)
+
+    def dispatch_to_shard(self, info, process_info):
+        """Dërgo paketën te procesi punëtor i lidhjes, përveç kur vendimi dihet nga rregullat"""
+        if self.model_ready.is_set():
+            if self.cached_verdict(info, process_info) is None:
+                # Kur unaza është plot paketa hidhet dhe numërohet te ring_dropped
+                self.shards.submit(info)
+        else:
+            # Proceset po nisen: vlejnë vetëm rregullat dhe politika e paracaktuar
+            self.stats.counters['unscored'] += 1
+
+    def report_packet_error(self, error):
+        """Logo gabimet e rrugës së paketave me kufizim, që një gabim i përsëritur të mos bllokojë kapjen"""
+        self.alerts.alert(
+            f"packet_error:{type(error).__name__}", None, None,
+            f"Gabim gjatë procesimit të paketës: {error}",
+            level=logging.ERROR
+        )
+
+    def score_flow_windows(self, info):
+        """Pikëzo dritaret e lidhjeve që u mbyllën me këtë paketë, ose lidhjet që përfunduan"""
+        windows = self.flow_features.update(info)
+        if self.scoring_engine is None:
+            self.stats.counters['unscored'] += len(windows)
+            return
+        for initiator, features in windows:
+            if self.cached_verdict(initiator, None) is not None:
+                continue
+            self.scoring_engine.submit(features, self.handle_score, initiator)
+
+    def should_sample(self, info):
+        """Nën mbingarkesë pikëzo vetëm paketat e para dhe një mostër të secilës lidhje"""
+        flow = self.flow_table.get(info.flow_key())
+        flow_packets = flow.packet_count if flow is not None else 1
+        return self.sampler.should_score(flow_packets, self.scoring_engine.queue_depth())
+
+    def cached_verdict(self, info, process_info):
+        """Kthe vendimin nga cache-i ose rregullat, ose None nëse paketa duhet pikëzuar"""
+        verdict = self.verdict_cache.lookup(info.flow_key(), info.dst_ip)
+        if verdict is not None:
+            return verdict.verdict
+
+        # Destinacionet e bllokuara ose të lejuara nga operatori nuk kanë nevojë për ML
+        if info.dst_ip in self.suspicious_ips:
+            self.verdict_cache.store_destination(info.dst_ip, VERDICT_BLOCK)
+            return VERDICT_BLOCK
+        if info.src_ip in self.suspicious_ips:
+            # Burimet e bllokuara (p.sh. një skaner) nuk pikëzohen përsëri
+            self.verdict_cache.store_flow(info.flow_key(), VERDICT_BLOCK)
+            return VERDICT_BLOCK
+        if self.rules.get(info.dst_ip) == POLICY_ALLOW:
+            self.verdict_cache.store_destination(info.dst_ip, VERDICT_ALLOW)
+            return VERDICT_ALLOW
+
+        # Trafiku i një aplikacioni të bllokuar nga operatori, ose i një aplikacioni të ri në pritje
+        # kur politika e paracaktuar është bllokimi
+        if process_info:
+            app = self.known_apps.get(process_info['name'])
+            if app is not None:
+                if app.get('pending'):
+                    blocked = app.get('policy') == POLICY_DENY
                 else:
-                    return
+                    blocked = not app.get('allowed')
+                if blocked:
+                    self.verdict_cache.store_flow(info.flow_key(), VERDICT_BLOCK)
+                    return VERDICT_BLOCK
+        return None
 
-                # Merr informacionin e procesit
-                process_info = self.get_process_info(os.getpid())
-                
-                if process_info:
-                    app_name = process_info['name']
-                    if app_name not in self.known_apps:
-                        logging.warning(f"U zbulua aplikacion i ri: {app_name}")
-                        self.handle_new_application(app_name, process_info)
-                    
-                    # Përditëso historinë e lidhjeve dhe merr të dhënat e paketës
-                    packet_data = self.update_connection_history(packet, process_info)
-                    
-                    if packet_data:
-                        # Analizo sjelljen duke përdorur ML
-                        suspicious_score = self.ml_analyzer.analyze_behavior(packet_data)
-                        
-                        # Nëse rezultati i dyshimit është i lartë, trajto si lidhje të dyshimtë
-                        if suspicious_score > 0.8:
-                            logging.warning(f"U zbulua lidhje e dyshimtë (rezultati: {suspicious_score:.2f})")
-                            self.handle_suspicious_connection(packet, suspicious_score)
-                            
-                            # Përditëso modelin ML me këtë shembull
-                            self.ml_analyzer.update_model(packet_data, True)
+    def handle_score(self, info, suspicious_score, features):
+        """Trajto rezultatin e dyshimit të kthyer nga motori i pikëzimit"""
+        # Nëse rezultati i dyshimit është i lartë, trajto si lidhje të dyshimtë
+        if suspicious_score > SUSPICIOUS_THRESHOLD:
+            self.verdict_cache.store_flow(info.flow_key(), VERDICT_SUSPICIOUS, suspicious_score)
+            self.alerts.alert(
+                'suspicious_connection', info.src_ip, info.dst_ip,
+                f"U zbulua lidhje e dyshimtë {info.src_ip} -> {info.dst_ip}:{info.dport} "
+                f"(rezultati: {suspicious_score:.2f})",
+                score=round(suspicious_score, 4), sport=info.sport, dport=info.dport, proto=info.proto
+            )
+            self.handle_suspicious_connection(info, suspicious_score)
 
-            except Exception as e:
-                logging.error(f"Gabim gjatë procesimit të paketës: {e}")
+            # Shto shembullin për trajnimin në sfond
+            if self.trainer is not None:
+                self.trainer.add_sample(features, True)
+        else:
+            self.verdict_cache.store_flow(info.flow_key(), VERDICT_ALLOW, suspicious_score)
 
     def handle_new_application(self, app_name, process_info):
         """Trajto aplikacionet e sapo zbuluara"""
-        print(f"\nU zbulua aplikacion i ri: {app_name}")
-        print(f"Rruga: {process_info['path']}")
-        response = input("Lejo këtë aplikacion? (p/j): ").lower()
-        
-        if response == 'p':
-            self.known_apps[app_name] = {
-                'path': process_info['path'],
-                'allowed': True,
-                'first_seen': datetime.now().isoformat()
-            }
-            self.save_known_apps()
-            logging.info(f"Aplikacioni {app_name} u lejua")
+        self.stats.counters['new_apps'] += 1
+        # Zbato menjëherë politikën e paracaktuar dhe lëre vendimin për operatorin
+        self.known_apps[app_name] = {
+            'path': process_info['path'],
+            'allowed': self.default_policy == POLICY_ALLOW,
+            'policy': self.default_policy,
+            'pending': True,
+            'first_seen': datetime.now().isoformat()
+        }
+        self.decisions.submit(
+            DECISION_APP,
+            app_name,
+            {'path': process_info['path']},
+            self.default_policy
+        )
+
+    def handle_reputation_hit(self, info, feed):
+        """Trajto paketat drejt ose nga adresat e listuara në feed-et e reputacionit"""
+        self.stats.counters['reputation_blocked'] += 1
+        self.alerts.alert(
+            f"reputation:{feed}", info.src_ip, info.dst_ip,
+            f"Lidhje me adresë të listuar në '{feed}': {info.src_ip} -> {info.dst_ip}:{info.dport}",
+            feed=feed, sport=info.sport, dport=info.dport, proto=info.proto
+        )
+
+    def handle_sketch_detection(self, info, detection):
+        """Trajto skanimet dhe flood-et e zbuluara nga skicat si lidhje të dyshimta nga burimi ofendues"""
+        kind, key, estimate = detection
+        if kind == FLOOD_DESTINATION:
+            # Çelësi është viktima; ofendues është dërguesi i paketës që kaloi pragun
+            offender = info.src_ip
+            message = f"U zbulua flood drejt {key} nga {offender}: ~{estimate} lidhje në dritare"
         else:
+            offender = key
+            message = f"U zbulua {kind} nga {key}: ~{estimate} në dritare"
+        self.alerts.alert(
+            kind, offender, key if kind == FLOOD_DESTINATION else None, message,
+            estimate=estimate, dport=info.dport, proto=info.proto
+        )
+        self.handle_suspicious_connection(info, 1.0, offender)
+
+    def is_local_address(self, ip):
+        """A i përket adresa këtij hosti (ndërfaqet ose --local-address)"""
+        return self.process_index.is_local(ip)
+
+    def remote_address(self, info):
+        """Skaji jo-lokal i paketës: destinacioni për trafikun dalës, burimi për atë hyrës"""
+        if self.is_local_address(info.dst_ip):
+            return info.src_ip
+        return info.dst_ip
+
+    def handle_suspicious_connection(self, info, suspicious_score, address=None):
+        """Trajto lidhjet e dyshimta; vendimi merret për adresën e largët, kurrë për këtë host"""
+        if address is None:
+            address = self.remote_address(info)
+        self.stats.increment('alerts')
+        if self.is_local_address(address):
+            # Karantina e një adrese lokale do ta shkëpuste vetë hostin: mbetet vetëm alarmi
+            return
+        # Operatori e ka lejuar tashmë këtë adresë
+        if self.rules.get(address) == POLICY_ALLOW:
+            return
+
+        if self.default_policy == POLICY_DENY and address not in self.suspicious_ips:
+            self.suspicious_ips.add(address)
+            self.state_store.put_destination(address, POLICY_DENY)
+        elif self.default_policy == POLICY_QUARANTINE and address not in self.quarantined_ips:
+            self.quarantined_ips.add(address)
+            self.state_store.put_destination(address, POLICY_QUARANTINE)
+
+        if address not in self.rules:
+            self.decisions.submit(
+                DECISION_CONNECTION,
+                address,
+                {'src': info.src_ip, 'score': suspicious_score},
+                self.default_policy
+            )
+
+    def resolve_decision(self, decision, action):
+        """Zbato përgjigjen e operatorit në rregulla (thirret nga CLI ose GUI)"""
+        if decision.kind == DECISION_APP:
+            app_name = decision.subject
             self.known_apps[app_name] = {
-                'path': process_info['path'],
-                'allowed': False,
-                'first_seen': datetime.now().isoformat()
+                'path': decision.details.get('path'),
+                'allowed': action == POLICY_ALLOW,
+                'first_seen': self.known_apps.get(app_name, {}).get('first_seen', datetime.now().isoformat())
             }
-            self.save_known_apps()
-            logging.info(f"Aplikacioni {app_name} u bllokua")
-
-    def handle_suspicious_connection(self, packet, suspicious_score):
-        """Trajto lidhjet e dyshimta"""
-        print("\nU zbulua lidhje e dyshimtë!")
-        print(f"Rezultati i dyshimit: {suspicious_score:.2f}")
-        print(f"Burimi: {packet[IP].src}")
-        print(f"Destinacioni: {packet[IP].dst}")
-        response = input("Blloko këtë lidhje? (p/j): ").lower()
-        
-        if response == 'p':
-            self.suspicious_ips.add(packet[IP].dst)
-            logging.info(f"Lidhja me {packet[IP].dst} u bllokua")
+            self.state_store.put_app(app_name, self.known_apps[app_name])
+            # Vendimet e ruajtura sipas politikës së përkohshme të aplikacionit nuk vlejnë më
+            self.verdict_cache.clear()
+            if action == POLICY_ALLOW:
+                logging.info(f"Aplikacioni {app_name} u lejua")
+            else:
+                logging.info(f"Aplikacioni {app_name} u bllokua")
         else:
-            logging.info(f"Lidhja me {packet[IP].dst} u lejua")
+            dst_ip = decision.subject
+            self.rules[dst_ip] = action
+            self.state_store.put_rule(dst_ip, action)
+            self.quarantined_ips.discard(dst_ip)
+            self.verdict_cache.store_destination(
+                dst_ip, VERDICT_BLOCK if action == POLICY_DENY else VERDICT_ALLOW
+            )
+            if action == POLICY_DENY:
+                self.suspicious_ips.add(dst_ip)
+                self.state_store.put_destination(dst_ip, POLICY_DENY)
+                logging.info(f"Lidhja me {dst_ip} u bllokua")
+            else:
+                self.suspicious_ips.discard(dst_ip)
+                self.state_store.delete_destination(dst_ip)
+                logging.info(f"Lidhja me {dst_ip} u lejua")
 
     def setup_packet_filter(self):
         """Konfiguro filtrin e paketave"""
         try:
+            if self.capture_backend == 'afpacket':
+                if self.start_afpacket_capture():
+                    return
+                logging.warning("Kapja AF_PACKET nuk është e disponueshme, duke përdorur scapy")
+            # Scapy importohet vetëm kur nis kapja
+            from scapy.all import AsyncSniffer
+
             # Konfiguro filtrin e paketave
-            sniff(prn=self.packet_callback, store=0)
+            self.kernel_filter_active = kernel_filter_available(self.bpf_filter)
+            logging.info(f"Filtri i kapjes: {self.bpf_filter}")
+            # AsyncSniffer ndalet nga stop() pa pritur paketën e radhës, ndryshe nga sniff()
+            self.sniffer = AsyncSniffer(
+                prn=self.packet_callback,
+                store=False,
+                iface=self.capture_interfaces(),
+                filter=self.bpf_filter if self.kernel_filter_active else None
+            )
+            if not self.running:
+                return
+            self.sniffer.start()
+            self.sniffer.join()
+            if self.running:
+                logging.error("Kapja me scapy përfundoi papritur")
+                self.state = STATE_DEGRADED
         except Exception as e:
             logging.error(f"Gabim gjatë konfigurimit të filtrit të paketave: {e}")
-            sys.exit(1)
+            self.state = STATE_DEGRADED
+
+    def start_afpacket_capture(self):
+        """Nis kapjen me AF_PACKET/TPACKET_V3; kthen False nëse nuk mbështetet"""
+        try:
+            from afpacket_capture import AfPacketCapture
+
+            interfaces = self.capture_interfaces()
+            if isinstance(interfaces, list):
+                # Socket-i AF_PACKET lidhet me një ndërfaqe ose me të gjitha
+                interfaces = interfaces[0] if len(interfaces) == 1 else None
+            # Unaza AF_PACKET është memorie e kyçur: blloqe 1 MiB, aq sa MiB janë kërkuar
+            self.capture = AfPacketCapture(
+                self.process_packet, interface=interfaces, block_count=max(1, self.capture_ring_mb)
+            )
+            self.capture.open()
+            self.kernel_filter_active = attach_bpf_filter(self.capture.sock, self.bpf_filter, interfaces)
+            logging.info(f"Filtri i kapjes: {self.bpf_filter}")
+        except (ImportError, AttributeError, OSError) as e:
+            logging.error(f"Gabim gjatë hapjes së socket-it AF_PACKET: {e}")
+            self.capture = None
+            return False
+        self.capture.run()
+        return True
+
+    def capture_interfaces(self):
+        """Ndërfaqet e kapjes: argumenti i dhënë ose lista nga rregullat e kapjes"""
+        if self.interface:
+            return self.interface
+        return list(self.capture_rules.get('interfaces', [])) or None
+
+def parse_args(argv=None):
+    """Lexo argumentet e rreshtit të komandës"""
+    parser = argparse.ArgumentParser(description="Firewall Zero Trust me AI")
+    parser.add_argument('--policy', choices=POLICIES, default=POLICY_QUARANTINE,
+                        help="Politika e paracaktuar për aplikacionet dhe lidhjet e reja derisa operatori të vendosë")
+    parser.add_argument('--capture', choices=('scapy', 'afpacket'), default='scapy',
+                        help="Backend-i i kapjes; afpacket kërkon Linux, përndryshe përdoret scapy")
+    parser.add_argument('--capture-ring-mb', type=int, default=8,
+                        help="Madhësia e unazës AF_PACKET në MiB (memorie e kyçur për socket)")
+    parser.add_argument('--interface', help="Ndërfaqja e rrjetit për kapje (parazgjedhje: të gjitha)")
+    parser.add_argument('--scoring', choices=('packet', 'flow'), default='packet',
+                        help="Pikëzo çdo paketë ose karakteristikat e lidhjes një herë për dritare (vetëm trafik i drejtpërdrejtë)")
+    parser.add_argument('--pcap', help="Analizo një skedar pcap/pcapng në vend të trafikut të drejtpërdrejtë")
+    parser.add_argument('--report', help="Skedari i raportit për analizën pcap (parazgjedhje: <pcap>.scores.jsonl)")
+    parser.add_argument('--report-format', choices=('jsonl', 'csv'), default='jsonl')
+    parser.add_argument('--report-mode', choices=('packet', 'flow'), default='packet',
+                        help="Rezultate për çdo paketë ose të përmbledhura për çdo lidhje")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Numri i proceseve për analizën pcap")
+    parser.add_argument('--shard-workers', type=int, default=0,
+                        help="Numri i proceseve që pikëzojnë trafikun e drejtpërdrejtë (0: pikëzim në një proces)")
+    parser.add_argument('--control-socket', default=CONTROL_SOCKET,
+                        help="Socket-i lokal i kontrollit (status, reload) për control_server.py")
+    parser.add_argument('--no-control', action='store_true', help="Mos hap socket-in e kontrollit")
+    parser.add_argument('--metrics-port', type=int,
+                        help="Porta e endpoint-it Prometheus në localhost (p.sh. 9108)")
+    parser.add_argument('--metrics-file', help="Skedari JSON ku shkruhen metrikat periodikisht")
+    parser.add_argument('--alert-file', help="Skedari JSONL ku shkruhen alarmet e strukturuara")
+    parser.add_argument('--no-metrics', action='store_true',
+                        help="Nis pa matjen e fazave (mund të aktivizohet me POST /enable)")
+    parser.add_argument('--reputation-feed', action='append', default=[],
+                        help="Skedar feed-i me IP/CIDR keqdashëse (mund të jepet disa herë)")
+    parser.add_argument('--sketch-memory', type=int, default=1 << 20,
+                        help="Buxheti i memories (bajte) për skicat e zbulimit të skanimeve dhe flood-eve")
+    parser.add_argument('--local-address', action='append', default=[],
+                        help="Adresë shtesë e këtij hosti (p.sh. IP publike e NAT-it), që nuk vihet kurrë në karantinë")
+    parser.add_argument('--no-scan-detection', action='store_true',
+                        help="Çaktivizo zbulimin e skanimeve dhe flood-eve me skica")
+    parser.add_argument('--reputation-refresh', type=float, default=300.0,
+                        help="Sa shpesh (sekonda) kontrollohen feed-et për ndryshime")
+    args = parser.parse_args(argv)
+    if args.pcap and args.scoring == 'flow':
+        # Analiza pcap pikëzon çdo paketë; peshat e modelit të lidhjeve do të jepnin rezultate të pakuptimta
+        parser.error("--scoring flow nuk mbështetet me --pcap")
+    return args
 
 def main():
+    args = parse_args()
+    if args.pcap:
+        from pcap_analysis import run_pcap_analysis
+
+        # Analiza offline nuk ka thread kapjeje; proceset punëtore shkruajnë direkt në log
+        logging.basicConfig(
+            level=logging.INFO,
+            format=LOG_FORMAT,
+            handlers=[
+                logging.FileHandler('firewall.log'),
+                logging.StreamHandler()
+            ]
+        )
+
+        report = args.report or f"{args.pcap}.scores.{args.report_format}"
+        print(f"Duke analizuar {args.pcap} me {args.workers} procese...")
+        try:
+            summary = run_pcap_analysis(
+                args.pcap,
+                report,
+                workers=args.workers,
+                report_format=args.report_format,
+                report_mode=args.report_mode
+            )
+        except RuntimeError as e:
+            logging.error(f"Gabim gjatë analizës së {args.pcap}: {e}")
+            sys.exit(1)
+        print(f"Raporti u ruajt në {report}: {json.dumps(summary)}")
+        return
+
+    # Shkrimet në log bëhen nga një thread i veçantë, jo nga thread-i i kapjes
+    log_listener = setup_logging(alert_file=args.alert_file)
     print("Duke nisur Firewall-in Zero Trust...")
     print("Shtyp Ctrl+C për të ndaluar")
     
-    firewall = ZeroTrustFirewall()
-    
+    firewall = ZeroTrustFirewall(
+        default_policy=args.policy,
+        capture_backend=args.capture,
+        capture_ring_mb=args.capture_ring_mb,
+        interface=args.interface,
+        scoring_mode=args.scoring,
+        metrics_enabled=not args.no_metrics,
+        metrics_port=args.metrics_port,
+        metrics_file=args.metrics_file,
+        reputation_feeds=args.reputation_feed,
+        reputation_refresh=args.reputation_refresh,
+        scan_detection=not args.no_scan_detection,
+        sketch_memory=args.sketch_memory,
+        shard_workers=args.shard_workers,
+        control_socket=None if args.no_control else args.control_socket,
+        local_addresses=args.local_address
+    )
+    firewall.start()
+
+    # SIGHUP ringarkon modelin, rregullat dhe aplikacionet; SIGTERM ndalon si Ctrl+C
+    stopping = threading.Event()
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: firewall.request_reload())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+
     try:
-        while True:
-            time.sleep(1)
+        while not stopping.wait(1.0):
+            pass
     except KeyboardInterrupt:
-        print("\nDuke ndaluar firewall-in...")
-        sys.exit(0)
+        pass
+    print("\nDuke ndaluar firewall-in...")
+    firewall.stop()
+    log_listener.stop()
+    sys.exit(0)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,263 @@
+import os
+import json
+import math
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Fazat e rrugës së paketës që maten
+STAGES = (
+    'dissect',
+    'filter',
+    'attribution',
+    'flow_update',
+    'packet_total',
+    'queue_wait',
+    'inference',
+    'decision'
+)
+
+# Numëruesit monotonë; vlerat e tjera eksportohen si gauge
+COUNTERS = (
+    'packets',
+    'filtered',
+    'unscored',
+    'alerts',
+    'alerts_suppressed',
+    'new_apps',
+    'reputation_blocked',
+    'reloads',
+    'reload_errors',
+    'port_scans',
+    'host_sweeps',
+    'source_floods',
+    'destination_floods',
+    'scored',
+    'batches',
+    'inference_seconds',
+    'scoring_dropped',
+    'sampler_shed',
+    'kernel_packets',
+    'kernel_drops'
+)
+
+# Kovat: dy nën-kova për çdo fuqi të 2-shit, nga 1 µs deri në ~16 s
+BUCKET_UNIT = 1e-6
+BUCKET_COUNT = 50
+
+def bucket_bound(index):
+    """Kufiri i sipërm i kovës në sekonda"""
+    return (0.75 if index % 2 == 0 else 1.0) * (1 << (index // 2)) * BUCKET_UNIT
+
+class LatencyHistogram:
+    """Histogram vonesash me kova logaritmike (në stilin HDR); regjistrimi është O(1)"""
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        mantissa, exponent = math.frexp(seconds / BUCKET_UNIT)
+        index = 2 * exponent + (mantissa >= 0.75)
+        if index < 0:
+            index = 0
+        elif index >= BUCKET_COUNT:
+            index = BUCKET_COUNT - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """Kufiri i sipërm i kovës që përmban përqindëshin q (0-100)"""
+        if self.count == 0:
+            return 0.0
+        target = self.count * q / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(bucket_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(50) * 1000,
+            'p90_ms': self.percentile(90) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'max_ms': self.max * 1000
+        }
+
+class MetricsRegistry:
+    """Histogramet e fazave; kur është i çaktivizuar, matja kushton vetëm një kontroll"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+
+    def set_enabled(self, enabled):
+        self.enabled = bool(enabled)
+        logging.info(f"Matja e fazave u {'aktivizua' if self.enabled else 'çaktivizua'}")
+
+    def now(self):
+        """Koha e fillimit të fazës, ose None kur matja është e çaktivizuar"""
+        return time.perf_counter() if self.enabled else None
+
+    def lap(self, stage, started):
+        """Regjistro kohën që nga started dhe kthe kohën aktuale për fazën e radhës"""
+        if started is None:
+            return None
+        now = time.perf_counter()
+        self.histograms[stage].record(now - started)
+        return now
+
+    def observe(self, stage, seconds):
+        if self.enabled:
+            self.histograms[stage].record(seconds)
+
+    def reset(self):
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+
+    def snapshot(self, values):
+        """Kthe gjendjen si dict për skedarin JSON"""
+        return {
+            'timestamp': time.time(),
+            'enabled': self.enabled,
+            'values': {
+                name: value for name, value in values.items()
+                if name != 'time' and isinstance(value, (int, float))
+            },
+            'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+        }
+
+    def prometheus(self, values):
+        """Kthe metrikat në formatin tekst të Prometheus"""
+        lines = []
+        for name, value in sorted(values.items()):
+            if name == 'time' or isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if name in COUNTERS:
+                metric = f"firewall_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+            else:
+                metric = f"firewall_{name}"
+                lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        lines.append("# TYPE firewall_stage_latency_seconds histogram")
+        for stage, histogram in self.histograms.items():
+            cumulative = 0
+            for index, count in enumerate(histogram.counts):
+                cumulative += count
+                if count:
+                    lines.append(
+                        f'firewall_stage_latency_seconds_bucket{{stage="{stage}",le="{bucket_bound(index):.9g}"}} {cumulative}'
+                    )
+            lines.append(f'firewall_stage_latency_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'firewall_stage_latency_seconds_sum{{stage="{stage}"}} {histogram.total:.9f}')
+            lines.append(f'firewall_stage_latency_seconds_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """Eksporton metrikat në localhost (Prometheus) dhe periodikisht në një skedar JSON"""
+
+    def __init__(self, registry, collect, port=9108, host='127.0.0.1',
+                 snapshot_path='metrics.json', snapshot_interval=10.0):
+        self.registry = registry
+        self.collect = collect
+        self.port = port
+        self.host = host
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.server = None
+        self.server_thread = None
+        self.snapshot_thread = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        """Nis serverin HTTP dhe shkruesin e skedarit JSON"""
+        if self.port is not None:
+            try:
+                self.server = ThreadingHTTPServer((self.host, self.port), self.handler_class())
+                self.server.daemon_threads = True
+                self.server_thread = threading.Thread(
+                    target=self.server.serve_forever, name="MetricsServer", daemon=True
+                )
+                self.server_thread.start()
+                logging.info(f"Metrikat janë në http://{self.host}:{self.server.server_address[1]}/metrics")
+            except OSError as e:
+                logging.error(f"Gabim gjatë nisjes së serverit të metrikave: {e}")
+                self.server = None
+        if self.snapshot_path:
+            self.snapshot_thread = threading.Thread(
+                target=self.run_snapshots, name="MetricsSnapshot", daemon=True
+            )
+            self.snapshot_thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.snapshot_thread is not None:
+            self.snapshot_thread.join(2.0)
+            self.snapshot_thread = None
+            self.write_snapshot()
+
+    def run_snapshots(self):
+        while not self.stopped.wait(self.snapshot_interval):
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        """Shkruaj gjendjen atomikisht që lexuesit të mos shohin skedar të gjysmuar"""
+        try:
+            temporary = f"{self.snapshot_path}.tmp"
+            with open(temporary, 'w') as f:
+                json.dump(self.registry.snapshot(self.collect()), f, indent=2)
+            os.replace(temporary, self.snapshot_path)
+        except Exception as e:
+            logging.error(f"Gabim gjatë shkrimit të metrikave: {e}")
+
+    def handler_class(self):
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    self.reply(exporter.registry.prometheus(exporter.collect()), 'text/plain; version=0.0.4')
+                elif self.path == '/snapshot':
+                    self.reply(json.dumps(exporter.registry.snapshot(exporter.collect())), 'application/json')
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                # Ndezja/fikja e matjes gjatë punës, vetëm nga localhost
+                if self.path in ('/enable', '/disable'):
+                    exporter.registry.set_enabled(self.path == '/enable')
+                    self.reply("ok\n", 'text/plain')
+                elif self.path == '/reset':
+                    exporter.registry.reset()
+                    self.reply("ok\n", 'text/plain')
+                else:
+                    self.send_error(404)
+
+            def reply(self, body, content_type):
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return MetricsHandler
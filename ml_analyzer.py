@@ -1,28 +1,83 @@
+import os
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras import layers, models
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
 import logging
 import json
+import threading
 from datetime import datetime
+from numpy_backend import NumpyMLP, export_from_keras, export_from_keras_file, export_from_saved_model
+from background_trainer import SampleRingBuffer
+from flow_features import FLOW_FEATURE_KEYS
+
+# Renditja e karakteristikave që pret modeli
+FEATURE_KEYS = (
+    'packet_size',
+    'protocol',
+    'src_port',
+    'dst_port',
+    'ttl',
+    'window_size',
+    'tcp_flags',
+    'time_delta',
+    'packet_rate',
+    'connection_duration'
+)
+
+# Karakteristikat dhe prefiksi i skedarëve të modelit për secilën mënyrë pikëzimi
+FEATURE_SETS = {
+    'packet': FEATURE_KEYS,
+    'flow': FLOW_FEATURE_KEYS
+}
+MODEL_PATHS = {
+    'packet': 'model',
+    'flow': 'model_flow'
+}
+
+def saved_model_path(path):
+    """Modeli Keras i ruajtur: formati .keras i Keras 3, ose direktoria SavedModel e versioneve të vjetra"""
+    keras_path = f'{path}_model.keras'
+    legacy_path = f'{path}_model'
+    if not os.path.exists(keras_path) and os.path.isdir(legacy_path):
+        return legacy_path
+    return keras_path
+
+# Rezultati mbi të cilin një lidhje trajtohet si e dyshimtë
+SUSPICIOUS_THRESHOLD = 0.8
 
 class NetworkBehaviorAnalyzer:
-    def __init__(self):
+    def __init__(self, backend='numpy', history_size=1000, feature_set='packet'):
+        if feature_set not in FEATURE_SETS:
+            raise ValueError(f"Grup i panjohur karakteristikash: {feature_set}")
+        self.feature_set = feature_set
+        self.feature_keys = FEATURE_SETS[feature_set]
+        self.model_path = MODEL_PATHS[feature_set]
         self.model = None
-        self.scaler = StandardScaler()
-        self.history = []
+        self.training_model = None
+        self.inference = None
+        self.backend = backend
+        self._scaler = None
+        self.history = SampleRingBuffer(history_size, len(self.feature_keys))
+        # Rritet me çdo ringarkim; trajnimi nuk publikon një model të nisur para ringarkimit
+        self.generation = 0
+        self.swap_lock = threading.Lock()
+        # Backend-i NumPy nuk ka nevojë për TensorFlow kur peshat e eksportuara ekzistojnë
+        if self.backend == 'numpy' and self.load_numpy_model():
+            return
         self.initialize_model()
         # Provo të ngarkosh modelin, nëse dështon, fito scaler-in me të dhëna fillestare
         if not self.load_model():
             self.fit_scaler()
+        if self.backend == 'numpy':
+            self.refresh_inference()
 
     def initialize_model(self):
         """Inicializo modelin e rrjetit nervor"""
         try:
+            # TensorFlow importohet vetëm kur nevojitet modeli Keras (trajnim)
+            from tensorflow.keras import layers, models
+
             # Krijo një rrjet nervor të thjeshtë për zbulimin e anomalive
             self.model = models.Sequential([
-                layers.Dense(64, activation='relu', input_shape=(10,)),
+                layers.Dense(64, activation='relu', input_shape=(len(self.feature_keys),)),
                 layers.Dropout(0.2),
                 layers.Dense(32, activation='relu'),
                 layers.Dropout(0.2),
@@ -39,23 +94,75 @@ class NetworkBehaviorAnalyzer:
         except Exception as e:
             logging.error(f"Gabim gjatë inicializimit të modelit: {e}")
 
+    def ensure_keras_model(self):
+        """Ngarko modelin Keras vetëm kur nevojitet për trajnim"""
+        if self.model is not None:
+            return
+        self.initialize_model()
+        if not self.load_model() and self.inference is not None:
+            # Fillo trajnimin nga peshat e eksportuara në vend të një modeli të patrajnuar
+            self.model.set_weights(self.inference.keras_weights())
+
+    def load_numpy_model(self, path=None):
+        """Ngarko backend-in NumPy dhe scaler-in nga skedari kompakt"""
+        path = path or self.model_path
+        try:
+            self.inference = NumpyMLP.load(f'{path}_weights.npz')
+            if self._scaler is not None:
+                self.copy_scaler_from_inference(self._scaler)
+            logging.info("Backend-i NumPy i inferencës u ngarkua me sukses")
+            return True
+        except Exception as e:
+            logging.warning(f"Backend-i NumPy nuk u ngarkua, duke përdorur modelin Keras: {e}")
+            self.inference = None
+            return False
+
+    @property
+    def scaler(self):
+        """Scaler-i i sklearn importohet vetëm kur nevojitet (trajnim ose rruga Keras)"""
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+
+            self._scaler = StandardScaler()
+            if self.inference is not None:
+                self.copy_scaler_from_inference(self._scaler)
+        return self._scaler
+
+    def set_scaler(self, scaler):
+        """Zëvendëso scaler-in me një të fituar jashtë analizuesit (p.sh. me partial_fit)"""
+        self._scaler = scaler
+
+    def copy_scaler_from_inference(self, scaler):
+        scaler.mean_ = self.inference.mean.copy()
+        scaler.scale_ = self.inference.scale.copy()
+        scaler.var_ = self.inference.var.copy()
+        scaler.n_features_in_ = len(self.feature_keys)
+
+    def refresh_inference(self):
+        """Rindërto backend-in NumPy nga modeli Keras aktual"""
+        try:
+            self.inference = NumpyMLP.from_keras(self.model, self.scaler)
+        except Exception as e:
+            logging.error(f"Gabim gjatë rindërtimit të backend-it NumPy: {e}")
+            self.inference = None
+
+    def feature_vector(self, packet_data):
+        """Kthe karakteristikat e pa-shkallëzuara të paketës ose lidhjes si matricë 1 x n"""
+        return np.array([
+            packet_data.get(key, 0) for key in self.feature_keys
+        ], dtype=np.float64).reshape(1, -1)
+
+    def feature_matrix(self, packet_data_list):
+        """Kthe karakteristikat e pa-shkallëzuara të një grupi si matricë me një rresht për paketë"""
+        return np.array(
+            [[packet_data.get(key, 0) for key in self.feature_keys] for packet_data in packet_data_list],
+            dtype=np.float64
+        ).reshape(len(packet_data_list), len(self.feature_keys))
+
     def extract_features(self, packet_data):
         """Nxjerr karakteristikat nga të dhënat e paketës për analizë"""
         try:
-            features = np.array([
-                packet_data.get('packet_size', 0),
-                packet_data.get('protocol', 0),
-                packet_data.get('src_port', 0),
-                packet_data.get('dst_port', 0),
-                packet_data.get('ttl', 0),
-                packet_data.get('window_size', 0),
-                packet_data.get('tcp_flags', 0),
-                packet_data.get('time_delta', 0),
-                packet_data.get('packet_rate', 0),
-                packet_data.get('connection_duration', 0)
-            ]).reshape(1, -1)
-            
-            return self.scaler.transform(features)
+            return self.scaler.transform(self.feature_vector(packet_data))
         except Exception as e:
             logging.error(f"Gabim gjatë nxjerrjes së karakteristikave: {e}")
             return None
@@ -63,6 +170,10 @@ class NetworkBehaviorAnalyzer:
     def analyze_behavior(self, packet_data):
         """Analizo sjelljen e rrjetit duke përdorur modelin ML"""
         try:
+            if self.inference is not None:
+                # Shkallëzimi është i shkrirë në shtresën e parë të backend-it NumPy
+                return float(self.inference.predict(self.feature_vector(packet_data))[0])
+
             features = self.extract_features(packet_data)
             if features is not None:
                 prediction = self.model.predict(features)
@@ -72,50 +183,169 @@ class NetworkBehaviorAnalyzer:
             logging.error(f"Gabim gjatë analizës së sjelljes: {e}")
             return 0.5
 
+    def extract_features_batch(self, packet_data_list):
+        """Nxjerr karakteristikat për një grup paketash në një matricë të vetme"""
+        try:
+            return self.scaler.transform(self.feature_matrix(packet_data_list))
+        except Exception as e:
+            logging.error(f"Gabim gjatë nxjerrjes së karakteristikave të grupit: {e}")
+            return None
+
+    def check_inference(self, inference):
+        """Verifiko backend-in e ri me një matricë prove; kthen përshkrimin e gabimit ose None"""
+        if inference.input_size != len(self.feature_keys):
+            return f"modeli pret {inference.input_size} karakteristika, jo {len(self.feature_keys)}"
+        # Prova përdor shembujt realë të historisë kur ka, përndryshe një rresht me zero
+        probe, _ = self.history.snapshot()
+        probe = probe[-256:] if len(probe) else np.zeros((1, len(self.feature_keys)))
+        try:
+            scores = inference.predict(probe)
+        except Exception as e:
+            return f"pikëzimi i provës dështoi: {e}"
+        if scores.shape != (len(probe),):
+            return f"forma e rezultateve {scores.shape} nuk përputhet"
+        if not np.all(np.isfinite(scores)) or scores.min() < 0 or scores.max() > 1:
+            return "rezultatet nuk janë probabilitete të fundme"
+        return None
+
+    def reload_weights(self, path=None):
+        """Ngarko dhe verifiko peshat nga disku; zëvendësoji atomikisht vetëm nëse janë të vlefshme"""
+        path = path or self.model_path
+        weights_path = f'{path}_weights.npz'
+        try:
+            saved_model = saved_model_path(path)
+            if os.path.exists(saved_model) and (
+                not os.path.exists(weights_path)
+                or os.path.getmtime(saved_model) > os.path.getmtime(weights_path)
+            ):
+                # Një model Keras i ritrajnuar rieksportohet para se të ngarkohet
+                if saved_model.endswith('.keras'):
+                    export_from_keras_file(saved_model, f'{path}_scaler.json', weights_path)
+                else:
+                    export_from_saved_model(saved_model, f'{path}_scaler.json', weights_path)
+            inference = NumpyMLP.load(weights_path)
+        except Exception as e:
+            logging.error(f"Gabim gjatë ngarkimit të peshave të reja: {e}")
+            return False
+
+        error = self.check_inference(inference)
+        if error is not None:
+            logging.error(f"Peshat e reja u refuzuan ({weights_path}): {error}")
+            return False
+
+        with self.swap_lock:
+            self.generation += 1
+            self.inference = inference
+            # Modeli Keras dhe scaler-i rindërtohen nga peshat e reja herën e ardhshme që nevojiten
+            self.model = None
+            self.training_model = None
+            self._scaler = None
+        logging.info(f"Modeli u ringarkua nga {weights_path}")
+        return True
+
+    def analyze_matrix(self, features):
+        """Pikëzo një matricë karakteristikash të pa-shkallëzuara (një rresht për paketë) me një kalim"""
+        count = len(features)
+        if count == 0:
+            return np.zeros(0)
+        try:
+            if self.inference is not None:
+                return self.inference.predict(features)
+
+            predictions = self.model.predict(self.scaler.transform(features), batch_size=count, verbose=0)
+            return predictions.reshape(-1)
+        except Exception as e:
+            logging.error(f"Gabim gjatë analizës së grupit: {e}")
+            return np.full(count, 0.5)
+
+    def analyze_batch(self, packet_data_list):
+        """Analizo një grup paketash me një kalim të vetëm përmes modelit"""
+        if not packet_data_list:
+            return []
+        return self.analyze_matrix(self.feature_matrix(packet_data_list)).tolist()
+
+    def ensure_training_model(self):
+        """Kthe modelin Keras të trajnimit, të ndarë nga modeli që përdoret për pikëzim"""
+        if self.training_model is None:
+            self.ensure_keras_model()
+            from tensorflow.keras import models
+
+            model = models.clone_model(self.model)
+            model.set_weights(self.model.get_weights())
+            model.compile(
+                optimizer='adam',
+                loss='binary_crossentropy',
+                metrics=['accuracy']
+            )
+            self.training_model = model
+        return self.training_model
+
+    def publish_model(self, model):
+        """Zëvendëso atomikisht modelin e inferencës me një kopje të modelit të trajnuar"""
+        if self.backend == 'numpy':
+            self.inference = NumpyMLP.from_keras(model, self.scaler)
+        else:
+            from tensorflow.keras import models
+
+            snapshot = models.clone_model(model)
+            snapshot.set_weights(model.get_weights())
+            self.model = snapshot
+
+    def fit_history(self, epochs=1):
+        """Trajno modelin me shembujt e buffer-it dhe publiko modelin e ri"""
+        try:
+            X, y = self.history.snapshot()
+            if len(X) == 0:
+                return False
+            generation = self.generation
+            model = self.ensure_training_model()
+            model.fit(self.scaler.transform(X), y, epochs=epochs, batch_size=32, verbose=0)
+            with self.swap_lock:
+                if generation != self.generation:
+                    logging.info("Trajnimi u anashkalua: modeli u ringarkua gjatë tij")
+                    return False
+                self.publish_model(model)
+            logging.info("Modeli u përditësua me sukses")
+            return True
+        except Exception as e:
+            logging.error(f"Gabim gjatë përditësimit të modelit: {e}")
+            return False
+
     def update_model(self, packet_data, is_suspicious):
-        """Përditëso modelin me të dhëna të reja trajnimi"""
+        """Përditëso modelin me të dhëna të reja trajnimi (në mënyrë sinkrone)"""
         try:
-            features = self.extract_features(packet_data)
-            if features is not None:
-                # Shto në histori
-                self.history.append({
-                    'features': features.tolist(),
-                    'is_suspicious': is_suspicious,
-                    'timestamp': datetime.now().isoformat()
-                })
-
-                # Mbaj vetëm 1000 shembujt e fundit
-                if len(self.history) > 1000:
-                    self.history = self.history[-1000:]
-
-                # Përgatit të dhënat e trajnimit
-                X = np.array([h['features'] for h in self.history])
-                y = np.array([h['is_suspicious'] for h in self.history])
-
-                # Përditëso modelin
-                self.model.fit(X, y, epochs=1, verbose=0)
-                logging.info("Modeli u përditësua me sukses")
+            self.history.add(self.feature_vector(packet_data)[0], is_suspicious)
         except Exception as e:
             logging.error(f"Gabim gjatë përditësimit të modelit: {e}")
+            return
+        self.fit_history()
 
-    def save_model(self, path='model'):
-        """Ruaj modelin dhe scaler-in"""
+    def save_model(self, path=None):
+        """Ruaj modelin dhe scaler-in; kthen False nëse ruajtja dështoi"""
+        path = path or self.model_path
         try:
-            self.model.save(f'{path}_model')
+            self.model.save(f'{path}_model.keras')
             with open(f'{path}_scaler.json', 'w') as f:
                 json.dump({
                     'scale_': self.scaler.scale_.tolist(),
                     'mean_': self.scaler.mean_.tolist(),
                     'var_': self.scaler.var_.tolist()
                 }, f)
+            # Eksporto edhe skedarin kompakt për backend-in NumPy
+            export_from_keras(self.model, self.scaler, f'{path}_weights.npz')
             logging.info("Modeli dhe scaler-i u ruajtën me sukses")
+            return True
         except Exception as e:
             logging.error(f"Gabim gjatë ruajtjes së modelit: {e}")
+            return False
 
-    def load_model(self, path='model'):
+    def load_model(self, path=None):
         """Ngarko modelin dhe scaler-in"""
+        path = path or self.model_path
         try:
-            self.model = models.load_model(f'{path}_model')
+            from tensorflow.keras import models
+
+            self.model = models.load_model(saved_model_path(path))
             with open(f'{path}_scaler.json', 'r') as f:
                 scaler_data = json.load(f)
                 self.scaler.scale_ = np.array(scaler_data['scale_'])
@@ -128,17 +358,49 @@ class NetworkBehaviorAnalyzer:
             self.initialize_model()
             return False
 
+    def initial_training_data(self):
+        """Kthe shembujt fillestarë (normalë, të dyshimtë) për grupin aktual të karakteristikave"""
+        if self.feature_set == 'flow':
+            # protocol, dst_port, packet_count, byte_count, duration, size_mean, size_std,
+            # iat_mean, iat_std, burst_count, fwd_byte_ratio, syn/fin/rst/psh/ack_ratio
+            normal_data = np.array([
+                [1, 443, 64, 60000, 2.0, 937, 600, 0.03, 0.05, 3, 0.1, 0.03, 0, 0, 0.3, 0.97],  # Shkarkim HTTPS
+                [1, 80, 20, 15000, 0.8, 750, 500, 0.04, 0.06, 2, 0.2, 0.1, 0.05, 0, 0.2, 0.9],   # HTTP normal
+                [2, 53, 2, 180, 0.02, 90, 30, 0.02, 0, 1, 0.35, 0, 0, 0, 0, 0],                  # DNS normal
+                [2, 123, 2, 180, 0.05, 90, 0, 0.05, 0, 1, 0.5, 0, 0, 0, 0, 0],                   # NTP normal
+                [1, 22, 64, 8000, 30.0, 125, 60, 0.5, 1.2, 20, 0.5, 0.02, 0, 0, 0.5, 1.0]        # SSH interaktiv
+            ])
+            suspicious_data = np.array([
+                [1, 22, 2, 114, 0.001, 57, 3, 0.001, 0, 1, 0.53, 0.5, 0, 0.5, 0, 0.5],           # Skanim SYN SSH
+                [1, 3389, 2, 114, 0.001, 57, 3, 0.001, 0, 1, 0.53, 0.5, 0, 0.5, 0, 0.5],         # Skanim SYN RDP
+                [1, 80, 64, 3840, 0.05, 60, 0, 0.0008, 0.0002, 1, 1.0, 1.0, 0, 0, 0, 0],         # SYN flood
+                [2, 53, 64, 64000, 0.1, 1000, 0, 0.0015, 0.0005, 1, 1.0, 0, 0, 0, 0, 0],         # UDP flood
+                [1, 4444, 64, 90000, 1.0, 1400, 50, 0.015, 0.01, 1, 0.98, 0.02, 0, 0, 0.5, 1.0]  # Nxjerrje të dhënash
+            ])
+            return normal_data, suspicious_data
+
+        normal_data = np.array([
+            [100, 1, 1024, 80, 64, 65535, 0, 0.1, 10, 1],    # HTTP normal
+            [150, 2, 53, 53, 128, 0, 0, 0.2, 20, 2],         # DNS normal
+            [200, 1, 443, 443, 32, 32768, 0, 0.3, 30, 3],    # HTTPS normal
+            [300, 2, 123, 123, 64, 0, 0, 0.4, 40, 4],        # NTP normal
+            [400, 1, 22, 22, 16, 16384, 0, 0.5, 50, 5]       # SSH normal
+        ])
+
+        suspicious_data = np.array([
+            [1000, 1, 1024, 22, 1, 0, 0, 0.01, 1000, 0.1],   # Skanim i dyshimtë SSH
+            [2000, 1, 1024, 3389, 1, 0, 0, 0.01, 2000, 0.1], # Skanim i dyshimtë RDP
+            [1500, 1, 1024, 445, 1, 0, 0, 0.01, 1500, 0.1],  # Skanim i dyshimtë SMB
+            [3000, 1, 1024, 1433, 1, 0, 0, 0.01, 3000, 0.1], # Skanim i dyshimtë SQL
+            [2500, 1, 1024, 3306, 1, 0, 0, 0.01, 2500, 0.1]  # Skanim i dyshimtë MySQL
+        ])
+        return normal_data, suspicious_data
+
     def fit_scaler(self):
         """Fito scaler-in me të dhëna fillestare për të shmangur gabimet"""
         try:
             # Krijo të dhëna fillestare me vargje të arsyeshme për karakteristikat e rrjetit
-            dummy_data = np.array([
-                [100, 1, 1024, 80, 64, 65535, 0, 0.1, 10, 1],  # Shembull pakete 1
-                [150, 2, 53, 53, 128, 0, 0, 0.2, 20, 2],       # Shembull pakete 2
-                [200, 1, 443, 443, 32, 32768, 0, 0.3, 30, 3],  # Shembull pakete 3
-                [300, 2, 123, 123, 64, 0, 0, 0.4, 40, 4],      # Shembull pakete 4
-                [400, 1, 22, 22, 16, 16384, 0, 0.5, 50, 5]     # Shembull pakete 5
-            ])
+            dummy_data, _ = self.initial_training_data()
             self.scaler.fit(dummy_data)
             logging.info("Scaler-i u fitua me të dhëna fillestare")
             # Krijo dhe ruaj modelin fillestar
@@ -150,21 +412,7 @@ class NetworkBehaviorAnalyzer:
         """Krijo dhe ruaj modelin fillestar me të dhëna trajnimi"""
         try:
             # Krijo më shumë të dhëna trajnimi me modele normale dhe të dyshimta
-            normal_data = np.array([
-                [100, 1, 1024, 80, 64, 65535, 0, 0.1, 10, 1],    # HTTP normal
-                [150, 2, 53, 53, 128, 0, 0, 0.2, 20, 2],         # DNS normal
-                [200, 1, 443, 443, 32, 32768, 0, 0.3, 30, 3],    # HTTPS normal
-                [300, 2, 123, 123, 64, 0, 0, 0.4, 40, 4],        # NTP normal
-                [400, 1, 22, 22, 16, 16384, 0, 0.5, 50, 5]       # SSH normal
-            ])
-
-            suspicious_data = np.array([
-                [1000, 1, 1024, 22, 1, 0, 0, 0.01, 1000, 0.1],   # Skanim i dyshimtë SSH
-                [2000, 1, 1024, 3389, 1, 0, 0, 0.01, 2000, 0.1], # Skanim i dyshimtë RDP
-                [1500, 1, 1024, 445, 1, 0, 0, 0.01, 1500, 0.1],  # Skanim i dyshimtë SMB
-                [3000, 1, 1024, 1433, 1, 0, 0, 0.01, 3000, 0.1], # Skanim i dyshimtë SQL
-                [2500, 1, 1024, 3306, 1, 0, 0, 0.01, 2500, 0.1]  # Skanim i dyshimtë MySQL
-            ])
+            normal_data, suspicious_data = self.initial_training_data()
 
             # Kombino dhe normalizo të dhënat
             X = np.vstack([normal_data, suspicious_data])
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import logging
+import numpy as np
+
+# Skedari kompakt me peshat e modelit dhe parametrat e scaler-it
+WEIGHTS_FILE = 'model_weights.npz'
+
+# Aktivizimet e shtresave Dense të modelit në NetworkBehaviorAnalyzer.initialize_model
+DEFAULT_ACTIVATIONS = ('relu', 'relu', 'relu', 'sigmoid')
+
+def relu(x):
+    return np.maximum(x, 0.0, out=x)
+
+def sigmoid(x):
+    # Kufizo vlerat që exp të mos tejkalojë kufijtë e float64
+    np.clip(x, -500.0, 500.0, out=x)
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1.0
+    return np.reciprocal(x, out=x)
+
+ACTIVATIONS = {
+    'relu': relu,
+    'sigmoid': sigmoid,
+    'linear': lambda x: x
+}
+
+def dense_layers(model):
+    """Kthe peshat, bias-et dhe aktivizimet e shtresave Dense të një modeli Keras"""
+    kernels, biases, activations = [], [], []
+    for layer in model.layers:
+        weights = layer.get_weights()
+        if len(weights) != 2:
+            # Dropout dhe shtresat pa pesha nuk ndikojnë në inferencë
+            continue
+        kernels.append(weights[0])
+        biases.append(weights[1])
+        activations.append(layer.get_config().get('activation', 'linear'))
+    return kernels, biases, activations
+
+class NumpyMLP:
+    """Inferencë me NumPy për rrjetin Dense, me scaler-in e shkrirë në shtresën e parë"""
+
+    def __init__(self, kernels, biases, mean, scale, activations=DEFAULT_ACTIVATIONS, var=None):
+        if len(kernels) != len(biases) or len(kernels) != len(activations):
+            raise ValueError("Numri i peshave, bias-eve dhe aktivizimeve nuk përputhet")
+
+        # Peshat origjinale ruhen për të rindërtuar modelin Keras gjatë trajnimit
+        self.original_weights = [
+            (np.asarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32))
+            for kernel, bias in zip(kernels, biases)
+        ]
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64).copy()
+        self.var = np.asarray(var, dtype=np.float64) if var is not None else self.scale ** 2
+        # StandardScaler përdor 1.0 për karakteristikat me variancë zero
+        self.scale[self.scale == 0] = 1.0
+        self.activations = tuple(activations)
+        self.input_size = self.mean.shape[0]
+
+        # Shkri (x - mean) / scale në shtresën e parë: W' = W / scale, b' = b - (mean / scale) @ W
+        first_kernel = np.asarray(kernels[0], dtype=np.float64)
+        fused_kernel = first_kernel / self.scale[:, None]
+        fused_bias = np.asarray(biases[0], dtype=np.float64) - (self.mean / self.scale) @ first_kernel
+
+        self.kernels = [fused_kernel] + [np.asarray(k, dtype=np.float64) for k in kernels[1:]]
+        self.biases = [fused_bias] + [np.asarray(b, dtype=np.float64) for b in biases[1:]]
+        self.layers = [
+            (kernel, bias, ACTIVATIONS[activation])
+            for kernel, bias, activation in zip(self.kernels, self.biases, self.activations)
+        ]
+
+    @classmethod
+    def from_keras(cls, model, scaler):
+        """Ndërto backend-in nga një model Keras dhe një StandardScaler"""
+        kernels, biases, activations = dense_layers(model)
+        return cls(kernels, biases, scaler.mean_, scaler.scale_, activations, scaler.var_)
+
+    @classmethod
+    def load(cls, path=WEIGHTS_FILE):
+        """Ngarko backend-in nga skedari kompakt i eksportuar"""
+        with np.load(path, allow_pickle=False) as data:
+            layer_count = int(data['layer_count'])
+            kernels = [data[f'kernel_{i}'] for i in range(layer_count)]
+            biases = [data[f'bias_{i}'] for i in range(layer_count)]
+            activations = [str(a) for a in data['activations']]
+            return cls(kernels, biases, data['mean'], data['scale'], activations, data['var'])
+
+    def keras_weights(self):
+        """Kthe peshat në renditjen e Keras get_weights()/set_weights()"""
+        return [array for layer in self.original_weights for array in layer]
+
+    def predict(self, features):
+        """Kthe rezultatet e dyshimit për një matricë karakteristikash të pa-shkallëzuara (n x 10)"""
+        x = np.asarray(features, dtype=np.float64)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        for kernel, bias, activation in self.layers:
+            x = x @ kernel
+            x += bias
+            x = activation(x)
+        return x.reshape(-1)
+
+def export_weights(path, kernels, biases, mean, scale, var, activations=DEFAULT_ACTIVATIONS):
+    """Shkruaj peshat dhe scaler-in në një skedar të vetëm kompakt"""
+    arrays = {
+        'layer_count': np.array(len(kernels)),
+        'activations': np.array(list(activations)),
+        'mean': np.asarray(mean, dtype=np.float64),
+        'scale': np.asarray(scale, dtype=np.float64),
+        'var': np.asarray(var, dtype=np.float64)
+    }
+    for i, (kernel, bias) in enumerate(zip(kernels, biases)):
+        arrays[f'kernel_{i}'] = np.asarray(kernel, dtype=np.float32)
+        arrays[f'bias_{i}'] = np.asarray(bias, dtype=np.float32)
+    # Skedari zëvendësohet atomikisht që një ringarkim të mos lexojë kurrë peshat përgjysmë
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(temporary, path)
+    logging.info(f"Peshat e modelit u eksportuan në {path}")
+
+def export_from_keras(model, scaler, path=WEIGHTS_FILE):
+    """Eksporto një model Keras dhe StandardScaler-in e tij"""
+    kernels, biases, activations = dense_layers(model)
+    export_weights(path, kernels, biases, scaler.mean_, scaler.scale_, scaler.var_, activations)
+
+def export_from_keras_file(model_path='model_model.keras', scaler_path='model_scaler.json', path=WEIGHTS_FILE):
+    """Eksporto peshat nga një model i ruajtur në formatin .keras"""
+    from tensorflow.keras import models
+
+    model = models.load_model(model_path, compile=False)
+    kernels, biases, activations = dense_layers(model)
+    with open(scaler_path, 'r') as f:
+        scaler_data = json.load(f)
+    export_weights(
+        path, kernels, biases,
+        scaler_data['mean_'], scaler_data['scale_'], scaler_data['var_'], activations
+    )
+
+def export_from_saved_model(model_dir='model_model', scaler_path='model_scaler.json', path=WEIGHTS_FILE):
+    """Eksporto peshat direkt nga checkpoint-i i SavedModel pa rindërtuar modelin Keras"""
+    import tensorflow as tf
+
+    reader = tf.train.load_checkpoint(f'{model_dir}/variables/variables')
+    kernels, biases = [], []
+    i = 0
+    while reader.has_tensor(f'layer_with_weights-{i}/kernel/.ATTRIBUTES/VARIABLE_VALUE'):
+        kernels.append(reader.get_tensor(f'layer_with_weights-{i}/kernel/.ATTRIBUTES/VARIABLE_VALUE'))
+        biases.append(reader.get_tensor(f'layer_with_weights-{i}/bias/.ATTRIBUTES/VARIABLE_VALUE'))
+        i += 1
+
+    with open(scaler_path, 'r') as f:
+        scaler_data = json.load(f)
+
+    export_weights(
+        path, kernels, biases,
+        scaler_data['mean_'], scaler_data['scale_'], scaler_data['var_'],
+        ('relu',) * (len(kernels) - 1) + ('sigmoid',)
+    )
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    model_dir = sys.argv[1] if len(sys.argv) > 1 else 'model_model'
+    scaler_path = sys.argv[2] if len(sys.argv) > 2 else 'model_scaler.json'
+    output = sys.argv[3] if len(sys.argv) > 3 else WEIGHTS_FILE
+    if model_dir.endswith('.keras'):
+        export_from_keras_file(model_dir, scaler_path, output)
+    else:
+        export_from_saved_model(model_dir, scaler_path, output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+import numpy as np
+from flow_table import FlowTable, PROTO_TCP, PROTO_UDP, packet_feature_row
+from flow_features import FlowFeatureTracker
+from packet_parser import PacketInfo, parse_frame, LINKTYPE_ETHERNET
+from pcap_analysis import frame_timestamp, flow_shard
+
+# Vlerat e etiketës që trajtohen si trafik normal; çdo vlerë tjetër jo-bosh është e dyshimtë
+NORMAL_LABELS = ('0', 'benign', 'normal', 'false', 'no')
+PROTOCOLS = {'tcp': PROTO_TCP, 'udp': PROTO_UDP}
+
+def parse_label(value):
+    """1.0 për shembujt e dyshimtë, 0.0 për ata normalë"""
+    return 0.0 if str(value).strip().lower() in NORMAL_LABELS else 1.0
+
+def endpoint_key(src_ip, sport, dst_ip, dport, proto):
+    """Çelës i njëjtë për të dy drejtimet, si bidirectional_key i lidhjeve"""
+    a = (src_ip, int(sport))
+    b = (dst_ip, int(dport))
+    return (a, b, int(proto)) if a <= b else (b, a, int(proto))
+
+def load_flow_labels(path):
+    """Lexo etiketat e lidhjeve (src_ip, dst_ip, sport, dport, proto, label) nga një CSV"""
+    labels = {}
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            proto = row['proto'].strip().lower()
+            proto = PROTOCOLS.get(proto, proto)
+            key = endpoint_key(row['src_ip'], row['sport'], row['dst_ip'], row['dport'], proto)
+            labels[key] = parse_label(row['label'])
+    return labels
+
+def csv_chunk_features(rows, columns, label_column):
+    """Procesi punëtor: kthe një copë rreshtash CSV në matricë karakteristikash dhe etiketash"""
+    X = np.zeros((len(rows), len(columns)), dtype=np.float32)
+    y = np.zeros(len(rows), dtype=np.float32)
+    for i, row in enumerate(rows):
+        for j, column in enumerate(columns):
+            try:
+                X[i, j] = float(row[column])
+            except (ValueError, IndexError):
+                pass
+        y[i] = parse_label(row[label_column])
+    # Eksportet e lidhjeve shpesh kanë inf/NaN (p.sh. shpejtësi me kohëzgjatje zero)
+    np.nan_to_num(X, copy=False, posinf=0.0, neginf=0.0)
+    return X, y
+
+def bounded_imap(pool, function, tasks, max_pending):
+    """Si pool.imap, por lexon vetëm max_pending detyra përpara, që input-i të mos ngarkohet i gjithi"""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(function, task))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+def csv_samples(path, feature_keys, label_column='label', workers=None, chunk_rows=8192):
+    """Lexo një eksport CSV të lidhjeve si rrjedhë copash (X, y) të nxjerra paralelisht"""
+    with open(path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]
+        missing = [key for key in feature_keys if key not in header]
+        if missing:
+            logging.warning(f"Kolonat mungojnë në {path} dhe do të jenë zero: {', '.join(missing)}")
+        columns = [header.index(key) if key in header else len(header) for key in feature_keys]
+        label_index = header.index(label_column)
+
+        def tasks():
+            chunk = []
+            for row in reader:
+                chunk.append(row)
+                if len(chunk) >= chunk_rows:
+                    yield (chunk, columns, label_index)
+                    chunk = []
+            if chunk:
+                yield (chunk, columns, label_index)
+
+        workers = max(1, int(workers or os.cpu_count() or 1))
+        with multiprocessing.get_context().Pool(workers) as pool:
+            yield from bounded_imap(pool, csv_chunk_features, tasks(), workers * 2)
+
+def pcap_worker(chunk_queue, result_queue, feature_set, labels, default_label, flow_options):
+    """Procesi punëtor: zotëron një pjesë të lidhjeve dhe kthen karakteristikat e tyre me etiketa"""
+    flow_table = FlowTable(**flow_options)
+    tracker = FlowFeatureTracker() if feature_set == 'flow' else None
+
+    def label_of(info):
+        key = endpoint_key(info.src_ip, info.sport, info.dst_ip, info.dport, info.proto)
+        return labels.get(key, default_label)
+
+    def emit(samples):
+        # Lidhjet pa etiketë (kur nuk ka etiketë të paracaktuar) nuk përdoren për trajnim
+        labelled = [(row, label) for row, label in ((row, label_of(info)) for info, row in samples)
+                    if label is not None]
+        if labelled:
+            X = np.array([row for row, _ in labelled], dtype=np.float32)
+            y = np.array([label for _, label in labelled], dtype=np.float32)
+            result_queue.put((X, y))
+
+    now = None
+    while True:
+        chunk = chunk_queue.get()
+        if chunk is None:
+            break
+        samples = []
+        for values in chunk:
+            info = PacketInfo.from_tuple(values)
+            now = info.timestamp
+            if tracker is not None:
+                samples.extend(tracker.update(info, now))
+            else:
+                flow = flow_table.update(info.flow_key(), info.length, now=now)
+                samples.append((info, packet_feature_row(flow, info)))
+        emit(samples)
+
+    if tracker is not None and now is not None:
+        # Lidhjet që janë ende të hapura në fund të skedarit
+        emit(tracker.expire(now + tracker.idle_timeout + 1))
+    result_queue.put(None)
+
+def pcap_samples(path, labels=None, default_label=None, feature_set='packet', workers=None,
+                 chunk_size=4096, queue_chunks=8, flow_options=None):
+    """Lexo një pcap si rrjedhë dhe nxirr karakteristikat e etiketuara në procese sipas lidhjes"""
+    from scapy.utils import RawPcapReader
+
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    context = multiprocessing.get_context()
+    chunk_queues = [context.Queue(maxsize=queue_chunks) for _ in range(workers)]
+    result_queue = context.Queue(maxsize=queue_chunks * workers)
+    processes = [
+        context.Process(
+            target=pcap_worker,
+            args=(chunk_queues[i], result_queue, feature_set, labels or {}, default_label, flow_options or {}),
+            name=f"PcapTrainer-{i}",
+            daemon=True
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def read():
+        pending = [[] for _ in range(workers)]
+        try:
+            with RawPcapReader(path) as reader:
+                default_linktype = getattr(reader, 'linktype', LINKTYPE_ETHERNET)
+                nano = getattr(reader, 'nano', False)
+                for data, metadata in reader:
+                    info = parse_frame(
+                        data,
+                        getattr(metadata, 'linktype', default_linktype),
+                        frame_timestamp(metadata, nano),
+                        getattr(metadata, 'wirelen', None) or len(data)
+                    )
+                    if info is None:
+                        continue
+                    shard = flow_shard(info, workers)
+                    pending[shard].append(info.as_tuple())
+                    if len(pending[shard]) >= chunk_size:
+                        chunk_queues[shard].put(pending[shard])
+                        pending[shard] = []
+        except Exception as e:
+            logging.error(f"Gabim gjatë leximit të {path}: {e}")
+        finally:
+            for shard, bucket in enumerate(pending):
+                if bucket:
+                    chunk_queues[shard].put(bucket)
+                chunk_queues[shard].put(None)
+
+    # Leximi bëhet në një thread, që rezultatet të konsumohen ndërkohë dhe radhët të mos bllokohen
+    reader = threading.Thread(target=read, name="PcapTrainingReader", daemon=True)
+    reader.start()
+    finished = 0
+    while finished < workers:
+        result = result_queue.get()
+        if result is None:
+            finished += 1
+        else:
+            yield result
+    reader.join()
+    for process in processes:
+        process.join()
+
+class SampleSpill:
+    """Shembujt e nxjerrë shkruhen në disk si float32 dhe lexohen në copa me memmap"""
+
+    def __init__(self, path, n_features):
+        self.path = path
+        self.n_features = n_features
+        self.count = 0
+        self.positives = 0
+        self.file = open(path, 'wb')
+
+    def append(self, X, y):
+        rows = np.empty((len(y), self.n_features + 1), dtype=np.float32)
+        rows[:, :-1] = X
+        rows[:, -1] = y
+        rows.tofile(self.file)
+        self.count += len(y)
+        self.positives += int(y.sum())
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def chunks(self, chunk_rows, shuffle=False, seed=0):
+        """Kthe (X, y) në copa; me shuffle përzihen copat dhe rreshtat brenda secilës copë"""
+        if self.count == 0:
+            return
+        data = np.memmap(self.path, dtype=np.float32, mode='r', shape=(self.count, self.n_features + 1))
+        starts = np.arange(0, self.count, chunk_rows)
+        rng = np.random.default_rng(seed)
+        if shuffle:
+            rng.shuffle(starts)
+        for start in starts:
+            chunk = np.array(data[start:start + chunk_rows])
+            if shuffle:
+                rng.shuffle(chunk)
+            yield chunk[:, :-1], chunk[:, -1]
+        del data
+
+class OfflineTrainer:
+    """Trajnim offline në rrjedhë: nxjerrje paralele, scaler me partial_fit dhe tf.data me prefetch"""
+
+    def __init__(self, feature_set='packet', epochs=5, batch_size=256, validation_fraction=0.1,
+                 chunk_rows=8192, workers=None, spill_dir=None, seed=42):
+        from ml_analyzer import FEATURE_SETS
+
+        self.feature_set = feature_set
+        self.feature_keys = FEATURE_SETS[feature_set]
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.validation_fraction = validation_fraction
+        self.chunk_rows = chunk_rows
+        self.workers = workers
+        self.spill_dir = spill_dir
+        self.seed = seed
+        self.report = {}
+
+    def extract(self, sources, train_spill, validation_spill, scaler):
+        """Kalimi i parë: nxirr shembujt, fito scaler-in në mënyrë inkrementale dhe shkruaj në disk"""
+        rng = np.random.default_rng(self.seed)
+        started = time.monotonic()
+        for source in sources:
+            for X, y in source:
+                validation = rng.random(len(y)) < self.validation_fraction
+                train = ~validation
+                if train.any():
+                    scaler.partial_fit(X[train])
+                    train_spill.append(X[train], y[train])
+                if validation.any():
+                    validation_spill.append(X[validation], y[validation])
+        train_spill.close()
+        validation_spill.close()
+        elapsed = time.monotonic() - started
+        samples = train_spill.count + validation_spill.count
+        self.report['extraction'] = {
+            'samples': samples,
+            'seconds': round(elapsed, 3),
+            'samples_per_sec': round(samples / elapsed, 1) if elapsed > 0 else 0.0
+        }
+        logging.info(f"U nxorën {samples} shembuj ({self.report['extraction']['samples_per_sec']} shembuj/s)")
+
+    def dataset(self, spill, scaler, shuffle, seed=0):
+        """Dataset tf.data që lexon copat nga disku, i shkallëzon dhe përgatit grupet e radhës paraprakisht"""
+        import tensorflow as tf
+
+        mean = scaler.mean_.astype(np.float32)
+        scale = scaler.scale_.astype(np.float32)
+        batch_size = self.batch_size
+        epoch = [seed]
+
+        def batches():
+            # Çdo epokë përzihet ndryshe
+            epoch[0] += 1
+            for X, y in spill.chunks(self.chunk_rows, shuffle=shuffle, seed=epoch[0]):
+                X = (X - mean) / scale
+                for start in range(0, len(y), batch_size):
+                    yield X[start:start + batch_size], y[start:start + batch_size]
+
+        n_features = len(self.feature_keys)
+        return tf.data.Dataset.from_generator(
+            batches,
+            output_signature=(
+                tf.TensorSpec(shape=(None, n_features), dtype=tf.float32),
+                tf.TensorSpec(shape=(None,), dtype=tf.float32)
+            )
+        ).prefetch(tf.data.AUTOTUNE)
+
+    def validate(self, model, spill, scaler, threshold):
+        """Raporti i validimit mbi shembujt e lënë mënjanë: humbja, saktësia, precision/recall, F1"""
+        counts = {'tp': 0, 'fp': 0, 'tn': 0, 'fn': 0}
+        log_loss = 0.0
+        started = time.monotonic()
+        for X, y in spill.chunks(self.chunk_rows):
+            scores = model.predict(scaler.transform(X), batch_size=self.batch_size, verbose=0).reshape(-1)
+            predicted = scores > threshold
+            actual = y > 0.5
+            counts['tp'] += int(np.sum(predicted & actual))
+            counts['fp'] += int(np.sum(predicted & ~actual))
+            counts['tn'] += int(np.sum(~predicted & ~actual))
+            counts['fn'] += int(np.sum(~predicted & actual))
+            clipped = np.clip(scores, 1e-7, 1 - 1e-7)
+            log_loss -= float(np.sum(y * np.log(clipped) + (1 - y) * np.log(1 - clipped)))
+        elapsed = time.monotonic() - started
+
+        total = sum(counts.values())
+        precision = counts['tp'] / (counts['tp'] + counts['fp']) if counts['tp'] + counts['fp'] else 0.0
+        recall = counts['tp'] / (counts['tp'] + counts['fn']) if counts['tp'] + counts['fn'] else 0.0
+        return {
+            'samples': total,
+            'threshold': threshold,
+            'loss': round(log_loss / total, 6) if total else 0.0,
+            'accuracy': round((counts['tp'] + counts['tn']) / total, 6) if total else 0.0,
+            'precision': round(precision, 6),
+            'recall': round(recall, 6),
+            'f1': round(2 * precision * recall / (precision + recall), 6) if precision + recall else 0.0,
+            'confusion': counts,
+            'samples_per_sec': round(total / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+    def run(self, sources, output_path=None):
+        """Trajno nga burimet (iteratorë copash (X, y)) dhe ruaj modelin, scaler-in dhe raportin"""
+        from sklearn.preprocessing import StandardScaler
+        from ml_analyzer import NetworkBehaviorAnalyzer, SUSPICIOUS_THRESHOLD
+
+        spill_dir = tempfile.mkdtemp(prefix='firewall_training_', dir=self.spill_dir)
+        n_features = len(self.feature_keys)
+        train_spill = SampleSpill(os.path.join(spill_dir, 'train.f32'), n_features)
+        validation_spill = SampleSpill(os.path.join(spill_dir, 'validation.f32'), n_features)
+        try:
+            scaler = StandardScaler()
+            self.extract(sources, train_spill, validation_spill, scaler)
+            if train_spill.count == 0:
+                raise ValueError("Nuk u gjet asnjë shembull trajnimi")
+            self.report['dataset'] = {
+                'train_samples': train_spill.count,
+                'train_suspicious': train_spill.positives,
+                'validation_samples': validation_spill.count,
+                'validation_suspicious': validation_spill.positives
+            }
+
+            analyzer = NetworkBehaviorAnalyzer(feature_set=self.feature_set)
+            analyzer.initialize_model()
+            analyzer.set_scaler(scaler)
+            model = analyzer.model
+
+            started = time.monotonic()
+            history = model.fit(
+                self.dataset(train_spill, scaler, shuffle=True, seed=self.seed),
+                epochs=self.epochs,
+                verbose=0
+            )
+            elapsed = time.monotonic() - started
+            trained = train_spill.count * self.epochs
+            self.report['training'] = {
+                'epochs': self.epochs,
+                'batch_size': self.batch_size,
+                'seconds': round(elapsed, 3),
+                'samples_per_sec': round(trained / elapsed, 1) if elapsed > 0 else 0.0,
+                'loss': [round(float(value), 6) for value in history.history.get('loss', [])]
+            }
+            logging.info(f"Trajnimi përfundoi: {self.report['training']['samples_per_sec']} shembuj/s")
+
+            self.report['validation'] = self.validate(model, validation_spill, scaler, SUSPICIOUS_THRESHOLD)
+            output = output_path or analyzer.model_path
+            # Ruajtja logon gabimin dhe kthen False; raporti nuk duhet të tregojë sukses pa skedarë
+            saved = analyzer.save_model(output)
+            missing = [path for path in saved_model_paths(output) if not os.path.exists(path)]
+            if not saved or missing:
+                raise RuntimeError(f"Modeli nuk u ruajt në {output} (mungojnë: {', '.join(missing) or 'asnjë'})")
+            self.report['output'] = output
+            return self.report
+        finally:
+            for spill in (train_spill, validation_spill):
+                spill.close()
+                if os.path.exists(spill.path):
+                    os.remove(spill.path)
+            os.rmdir(spill_dir)
+
+def saved_model_paths(path):
+    """Skedarët që shkruan save_model(): modeli Keras, scaler-i dhe peshat për backend-in NumPy"""
+    return (f'{path}_model.keras', f'{path}_scaler.json', f'{path}_weights.npz')
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Trajnim offline nga skedarë pcap ose eksporte CSV të lidhjeve")
+    parser.add_argument('--csv', action='append', default=[],
+                        help="Eksport CSV me një kolonë për secilën karakteristikë dhe një kolonë etikete")
+    parser.add_argument('--label-column', default='label')
+    parser.add_argument('--pcap', action='append', default=[], help="Skedar pcap/pcapng për trajnim")
+    parser.add_argument('--labels', help="CSV me etiketat e lidhjeve (src_ip, dst_ip, sport, dport, proto, label)")
+    parser.add_argument('--default-label', choices=('0', '1'),
+                        help="Etiketa e paketave të pcap-it që nuk gjenden në --labels (përndryshe anashkalohen)")
+    parser.add_argument('--feature-set', choices=('packet', 'flow'), default='packet')
+    parser.add_argument('--output', help="Prefiksi i skedarëve të modelit (parazgjedhje: model ose model_flow)")
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--validation', type=float, default=0.1, help="Pjesa e shembujve për validim")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--report', default='training_report.json')
+    args = parser.parse_args()
+    if not args.csv and not args.pcap:
+        parser.error("Jep të paktën një --csv ose --pcap")
+
+    trainer = OfflineTrainer(
+        feature_set=args.feature_set,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        validation_fraction=args.validation,
+        workers=args.workers
+    )
+    labels = load_flow_labels(args.labels) if args.labels else None
+    default_label = parse_label(args.default_label) if args.default_label is not None else None
+    sources = [csv_samples(path, trainer.feature_keys, args.label_column, args.workers) for path in args.csv]
+    sources += [
+        pcap_samples(path, labels, default_label, args.feature_set, args.workers)
+        for path in args.pcap
+    ]
+    try:
+        report = trainer.run(sources, args.output)
+    except (RuntimeError, ValueError) as e:
+        logging.error(f"Gabim gjatë trajnimit offline: {e}")
+        sys.exit(1)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Raporti i trajnimit u ruajt në {args.report}: {json.dumps(report['validation'])}")
+
+if __name__ == "__main__":
+    main()
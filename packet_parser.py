@@ -0,0 +1,134 @@
+import socket
+import struct
+from flow_table import PROTO_TCP, PROTO_UDP
+
+# Llojet e shtresës së lidhjes (DLT/LINKTYPE) që mbështeten
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8)
+
+ETHERNET_HEADER = struct.Struct('!12xH')
+VLAN_HEADER = struct.Struct('!2xH')
+SLL_HEADER = struct.Struct('!14xH')
+IPV4_HEADER = struct.Struct('!BxHxxxxBB2x4s4s')
+IPV6_HEADER = struct.Struct('!4xHBB16s16s')
+PORTS = struct.Struct('!HH')
+TCP_FLAGS_WINDOW = struct.Struct('!xBH')
+
+class PacketInfo:
+    """Fushat e kokës së paketës që nevojiten për gjurmimin e lidhjeve dhe analizën ML"""
+    __slots__ = ('timestamp', 'src_ip', 'dst_ip', 'sport', 'dport', 'proto',
+                 'length', 'ttl', 'window_size', 'tcp_flags')
+
+    def __init__(self, timestamp, src_ip, dst_ip, sport, dport, proto,
+                 length, ttl, window_size=0, tcp_flags=0):
+        self.timestamp = timestamp
+        self.src_ip = src_ip
+        self.dst_ip = dst_ip
+        self.sport = sport
+        self.dport = dport
+        self.proto = proto
+        self.length = length
+        self.ttl = ttl
+        self.window_size = window_size
+        self.tcp_flags = tcp_flags
+
+    def flow_key(self):
+        """Çelësi i lidhjes (src, dst, sport, dport, proto)"""
+        return (self.src_ip, self.dst_ip, self.sport, self.dport, self.proto)
+
+    def as_tuple(self):
+        return (self.timestamp, self.src_ip, self.dst_ip, self.sport, self.dport, self.proto,
+                self.length, self.ttl, self.window_size, self.tcp_flags)
+
+    @classmethod
+    def from_tuple(cls, values):
+        return cls(*values)
+
+def parse_ip(buf, offset, timestamp, length):
+    """Lexo kokën IPv4/IPv6 dhe TCP/UDP duke filluar nga offset-i i dhënë"""
+    if len(buf) < offset + 1:
+        return None
+    version = buf[offset] >> 4
+
+    if version == 4:
+        if len(buf) < offset + 20:
+            return None
+        ver_ihl, _, ttl, proto, src, dst = IPV4_HEADER.unpack_from(buf, offset)
+        transport = offset + (ver_ihl & 0x0F) * 4
+        src_ip = socket.inet_ntoa(src)
+        dst_ip = socket.inet_ntoa(dst)
+    elif version == 6:
+        if len(buf) < offset + 40:
+            return None
+        _, proto, ttl, src, dst = IPV6_HEADER.unpack_from(buf, offset)
+        transport = offset + 40
+        src_ip = socket.inet_ntop(socket.AF_INET6, src)
+        dst_ip = socket.inet_ntop(socket.AF_INET6, dst)
+    else:
+        return None
+
+    if proto == PROTO_TCP:
+        if len(buf) < transport + 16:
+            return None
+        sport, dport = PORTS.unpack_from(buf, transport)
+        tcp_flags, window_size = TCP_FLAGS_WINDOW.unpack_from(buf, transport + 12)
+        return PacketInfo(timestamp, src_ip, dst_ip, sport, dport, proto, length, ttl, window_size, tcp_flags)
+    if proto == PROTO_UDP:
+        if len(buf) < transport + 4:
+            return None
+        sport, dport = PORTS.unpack_from(buf, transport)
+        return PacketInfo(timestamp, src_ip, dst_ip, sport, dport, proto, length, ttl)
+    return None
+
+def parse_frame(buf, linktype=LINKTYPE_ETHERNET, timestamp=0.0, length=None):
+    """Lexo vetëm fushat e nevojshme të kokave nga një kornizë e papërpunuar"""
+    if length is None:
+        length = len(buf)
+    try:
+        if linktype == LINKTYPE_ETHERNET:
+            ethertype, = ETHERNET_HEADER.unpack_from(buf, 0)
+            offset = 14
+            while ethertype in ETHERTYPE_VLAN:
+                ethertype, = VLAN_HEADER.unpack_from(buf, offset)
+                offset += 4
+            if ethertype not in (ETHERTYPE_IPV4, ETHERTYPE_IPV6):
+                return None
+        elif linktype == LINKTYPE_LINUX_SLL:
+            ethertype, = SLL_HEADER.unpack_from(buf, 0)
+            if ethertype not in (ETHERTYPE_IPV4, ETHERTYPE_IPV6):
+                return None
+            offset = 16
+        elif linktype == LINKTYPE_NULL:
+            offset = 4
+        elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+            offset = 0
+        else:
+            return None
+        return parse_ip(buf, offset, timestamp, length)
+    except struct.error:
+        return None
+
+def packet_info_from_scapy(packet):
+    """Ndërto PacketInfo nga një paketë scapy (IPv4 me TCP/UDP)"""
+    from scapy.layers.inet import IP, TCP, UDP
+
+    if IP not in packet:
+        return None
+    ip = packet[IP]
+    if TCP in packet:
+        tcp = packet[TCP]
+        return PacketInfo(float(packet.time), ip.src, ip.dst, tcp.sport, tcp.dport, PROTO_TCP,
+                          len(packet), ip.ttl, tcp.window, int(tcp.flags))
+    if UDP in packet:
+        udp = packet[UDP]
+        return PacketInfo(float(packet.time), ip.src, ip.dst, udp.sport, udp.dport, PROTO_UDP,
+                          len(packet), ip.ttl)
+    return None
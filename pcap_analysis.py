@@ -0,0 +1,258 @@
+import os
+import csv
+import json
+import time
+import queue
+import shutil
+import logging
+import multiprocessing
+import numpy as np
+from flow_table import FlowTable, packet_feature_row
+from packet_parser import PacketInfo, parse_frame, LINKTYPE_ETHERNET
+
+# Kolonat e raportit për çdo paketë dhe për çdo lidhje
+PACKET_FIELDS = ('index', 'timestamp', 'src_ip', 'dst_ip', 'sport', 'dport', 'proto',
+                 'length', 'score', 'suspicious')
+FLOW_FIELDS = ('src_ip', 'dst_ip', 'sport', 'dport', 'proto', 'packets', 'bytes',
+               'first_seen', 'last_seen', 'max_score', 'mean_score', 'suspicious_packets')
+
+# Sa pritet te një radhë para se të kontrollohet nëse proceset punëtore janë ende gjallë
+WORKER_POLL = 1.0
+
+def frame_timestamp(metadata, nano=False):
+    """Koha e kornizës në sekonda nga metadatat e RawPcapReader/RawPcapNgReader"""
+    if hasattr(metadata, 'sec'):
+        return metadata.sec + metadata.usec / (1e9 if nano else 1e6)
+    tsresol = getattr(metadata, 'tsresol', 1000000) or 1000000
+    return ((metadata.tshigh << 32) | metadata.tslow) / tsresol
+
+def flow_shard(info, workers):
+    """Zgjidh procesin për paketën sipas hash-it të lidhjes, i njëjtë për të dy drejtimet"""
+    a = (info.src_ip, info.sport)
+    b = (info.dst_ip, info.dport)
+    endpoints = (a, b) if a <= b else (b, a)
+    return hash((endpoints, info.proto)) % workers
+
+def open_report_writer(f, report_format, fields, header):
+    """Kthe një funksion që shkruan një rresht (dict) në formatin e kërkuar"""
+    if report_format == 'csv':
+        writer = csv.DictWriter(f, fieldnames=fields)
+        if header:
+            writer.writeheader()
+        return writer.writerow
+    return lambda row: f.write(json.dumps(row) + '\n')
+
+def score_worker(chunk_queue, result_queue, part_path, report_format, report_mode, flow_options):
+    """Procesi i pikëzimit: zotëron një pjesë të lidhjeve dhe pikëzon paketat në grupe"""
+    from ml_analyzer import NetworkBehaviorAnalyzer, SUSPICIOUS_THRESHOLD
+
+    analyzer = NetworkBehaviorAnalyzer()
+    flow_table = FlowTable(**flow_options)
+    flows = {}
+    stats = {'packets': 0, 'suspicious': 0, 'flows': 0}
+    # Matrica e karakteristikave ripërdoret për çdo copë; rritet vetëm nëse copa është më e madhe
+    matrix = np.zeros((0, len(analyzer.feature_keys)), dtype=np.float64)
+
+    with open(part_path, 'w', newline='') as f:
+        write_row = open_report_writer(f, report_format, PACKET_FIELDS, header=False)
+        while True:
+            chunk = chunk_queue.get()
+            if chunk is None:
+                break
+
+            infos = [PacketInfo.from_tuple(values[1:]) for values in chunk]
+            if len(infos) > len(matrix):
+                matrix = np.zeros((len(infos), matrix.shape[1]), dtype=np.float64)
+            for row, info in enumerate(infos):
+                # Koha e paketës nga skedari përdoret si orë e tabelës së lidhjeve
+                flow = flow_table.update(info.flow_key(), info.length, now=info.timestamp)
+                matrix[row] = packet_feature_row(flow, info)
+            scores = analyzer.analyze_matrix(matrix[:len(infos)]).tolist()
+
+            for values, info, score in zip(chunk, infos, scores):
+                suspicious = score > SUSPICIOUS_THRESHOLD
+                stats['packets'] += 1
+                stats['suspicious'] += suspicious
+                if report_mode == 'flow':
+                    key = info.flow_key()
+                    summary = flows.get(key)
+                    if summary is None:
+                        summary = flows[key] = [0, 0, info.timestamp, info.timestamp, 0.0, 0.0, 0]
+                    summary[0] += 1
+                    summary[1] += info.length
+                    summary[3] = info.timestamp
+                    summary[4] = max(summary[4], score)
+                    summary[5] += score
+                    summary[6] += suspicious
+                else:
+                    write_row({
+                        'index': values[0],
+                        'timestamp': info.timestamp,
+                        'src_ip': info.src_ip,
+                        'dst_ip': info.dst_ip,
+                        'sport': info.sport,
+                        'dport': info.dport,
+                        'proto': info.proto,
+                        'length': info.length,
+                        'score': round(score, 6),
+                        'suspicious': suspicious
+                    })
+
+        if report_mode == 'flow':
+            write_row = open_report_writer(f, report_format, FLOW_FIELDS, header=False)
+            for (src_ip, dst_ip, sport, dport, proto), summary in flows.items():
+                packets, total_bytes, first_seen, last_seen, max_score, score_sum, suspicious = summary
+                write_row({
+                    'src_ip': src_ip,
+                    'dst_ip': dst_ip,
+                    'sport': sport,
+                    'dport': dport,
+                    'proto': proto,
+                    'packets': packets,
+                    'bytes': total_bytes,
+                    'first_seen': first_seen,
+                    'last_seen': last_seen,
+                    'max_score': round(max_score, 6),
+                    'mean_score': round(score_sum / packets, 6),
+                    'suspicious_packets': suspicious
+                })
+
+    stats['flows'] = flow_table.counters['created']
+    result_queue.put(stats)
+
+def check_worker(process):
+    """Ngri gabim nëse procesi punëtor ka përfunduar para kohe (OOM, përjashtim)"""
+    if not process.is_alive():
+        raise RuntimeError(f"Procesi {process.name} përfundoi papritur (kodi {process.exitcode})")
+
+def put_chunk(chunk_queue, chunk, process, poll=WORKER_POLL):
+    """Vendos copën në radhën e kufizuar pa bllokuar përgjithmonë kur procesi ka vdekur"""
+    while True:
+        try:
+            chunk_queue.put(chunk, timeout=poll)
+            return
+        except queue.Full:
+            check_worker(process)
+
+def collect_results(result_queue, processes, poll=WORKER_POLL):
+    """Mblidh statistikat e çdo procesi; ndërpre nëse një proces vdes pa i dërguar ato"""
+    results = []
+    while len(results) < len(processes):
+        try:
+            results.append(result_queue.get(timeout=poll))
+            continue
+        except queue.Empty:
+            pass
+        for process in processes:
+            if process.exitcode not in (None, 0):
+                check_worker(process)
+        if all(not process.is_alive() for process in processes):
+            # Proceset shkruajnë rezultatin para daljes: një pritje e fundit për të dhënat në tub
+            try:
+                results.append(result_queue.get(timeout=poll))
+            except queue.Empty:
+                raise RuntimeError(
+                    f"Proceset punëtore përfunduan pa dërguar rezultatet ({len(results)}/{len(processes)})"
+                )
+    return results
+
+def abort_workers(processes, chunk_queues, part_paths, poll=WORKER_POLL):
+    """Ndalo proceset dhe fshi pjesët e raportit pas një gabimi"""
+    for chunk_queue in chunk_queues:
+        # Thread-i ushqyes i radhës nuk duhet të bllokojë daljen duke pritur një proces të vdekur
+        chunk_queue.cancel_join_thread()
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(poll)
+    for part_path in part_paths:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+def run_pcap_analysis(pcap_path, report_path, workers=None, chunk_size=1024, report_format='jsonl',
+                      report_mode='packet', queue_chunks=8, flow_options=None):
+    """Analizo një skedar pcap/pcapng pa sniff() dhe pa input(), duke e lexuar si rrjedhë"""
+    from scapy.utils import RawPcapReader
+
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    flow_options = flow_options or {}
+    context = multiprocessing.get_context()
+    # Radhët e kufizuara mbajnë memorien konstante kur leximi është më i shpejtë se pikëzimi
+    chunk_queues = [context.Queue(maxsize=queue_chunks) for _ in range(workers)]
+    result_queue = context.Queue()
+    part_paths = [f"{report_path}.part{i}" for i in range(workers)]
+    processes = [
+        context.Process(
+            target=score_worker,
+            args=(chunk_queues[i], result_queue, part_paths[i], report_format, report_mode, flow_options),
+            name=f"PcapScorer-{i}",
+            daemon=True
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    started = time.monotonic()
+    frames = 0
+    skipped = 0
+    pending = [[] for _ in range(workers)]
+    try:
+        with RawPcapReader(pcap_path) as reader:
+            default_linktype = getattr(reader, 'linktype', LINKTYPE_ETHERNET)
+            nano = getattr(reader, 'nano', False)
+            for data, metadata in reader:
+                index = frames
+                frames += 1
+                info = parse_frame(
+                    data,
+                    getattr(metadata, 'linktype', default_linktype),
+                    frame_timestamp(metadata, nano),
+                    getattr(metadata, 'wirelen', None) or len(data)
+                )
+                if info is None:
+                    skipped += 1
+                    continue
+
+                shard = flow_shard(info, workers)
+                bucket = pending[shard]
+                bucket.append((index,) + info.as_tuple())
+                if len(bucket) >= chunk_size:
+                    put_chunk(chunk_queues[shard], bucket, processes[shard])
+                    pending[shard] = []
+
+        for shard, bucket in enumerate(pending):
+            if bucket:
+                put_chunk(chunk_queues[shard], bucket, processes[shard])
+            put_chunk(chunk_queues[shard], None, processes[shard])
+        results = collect_results(result_queue, processes)
+    except BaseException:
+        abort_workers(processes, chunk_queues, part_paths)
+        raise
+
+    summary = {'frames': frames, 'skipped': skipped, 'packets': 0, 'suspicious': 0, 'flows': 0}
+    for stats in results:
+        for key in ('packets', 'suspicious', 'flows'):
+            summary[key] += stats[key]
+    for process in processes:
+        process.join()
+
+    # Bashko pjesët e raportit të secilit proces në një skedar të vetëm
+    with open(report_path, 'w', newline='') as report:
+        if report_format == 'csv':
+            fields = FLOW_FIELDS if report_mode == 'flow' else PACKET_FIELDS
+            open_report_writer(report, report_format, fields, header=True)
+        for part_path in part_paths:
+            with open(part_path, 'r', newline='') as part:
+                shutil.copyfileobj(part, report)
+            os.remove(part_path)
+
+    elapsed = time.monotonic() - started
+    summary['elapsed'] = round(elapsed, 3)
+    summary['packets_per_sec'] = round(summary['packets'] / elapsed, 1) if elapsed > 0 else 0.0
+    logging.info(
+        f"Analiza e {pcap_path} përfundoi: {summary['packets']} paketa, "
+        f"{summary['suspicious']} të dyshimta, {summary['packets_per_sec']} paketa/s"
+    )
+    return summary
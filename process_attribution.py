@@ -0,0 +1,279 @@
+import os
+import socket
+import threading
+import time
+import logging
+import psutil
+from flow_table import PROTO_TCP, PROTO_UDP
+
+# Tabelat e socket-eve në /proc/net dhe protokolli/familja përkatëse
+PROC_NET_TABLES = (
+    ('tcp', PROTO_TCP, socket.AF_INET),
+    ('tcp6', PROTO_TCP, socket.AF_INET6),
+    ('udp', PROTO_UDP, socket.AF_INET),
+    ('udp6', PROTO_UDP, socket.AF_INET6)
+)
+
+# Adresat e lidhjes me të gjitha ndërfaqet
+WILDCARD_ADDRESSES = ('0.0.0.0', '::')
+
+def local_interface_addresses():
+    """Adresat IPv4/IPv6 të ndërfaqeve të këtij hosti, përfshirë loopback"""
+    addresses = {'127.0.0.1', '::1'}
+    try:
+        interfaces = psutil.net_if_addrs()
+    except OSError as e:
+        logging.error(f"Gabim gjatë leximit të adresave të ndërfaqeve: {e}")
+        return addresses
+    for entries in interfaces.values():
+        for entry in entries:
+            if entry.family in (socket.AF_INET, socket.AF_INET6):
+                # Adresat link-local IPv6 vijnë me zonën e ndërfaqes (fe80::1%eth0)
+                addresses.add(entry.address.split('%')[0])
+    return addresses
+
+def parse_proc_address(hex_address, family):
+    """Konverto adresën 'HEXIP:HEXPORT' nga /proc/net në (ip, port)"""
+    hex_ip, hex_port = hex_address.split(':')
+    raw = bytes.fromhex(hex_ip)
+    # Kerneli i shkruan adresat si fjalë 32-bitëshe në renditjen e hostit (little-endian)
+    raw = b''.join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+    ip = socket.inet_ntop(family, raw)
+    if family == socket.AF_INET6 and ip.startswith('::ffff:') and '.' in ip:
+        # Adresat IPv4 të mapuara në socket-e IPv6
+        ip = ip[7:]
+    return ip, int(hex_port, 16)
+
+def read_socket_table(proc_root='/proc'):
+    """Lexo socket-et lokale nga /proc/net/{tcp,udp}{,6} si {inode: (ip, port, proto)}"""
+    sockets = {}
+    for name, proto, family in PROC_NET_TABLES:
+        try:
+            with open(os.path.join(proc_root, 'net', name), 'r') as f:
+                next(f, None)
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 10:
+                        continue
+                    inode = int(fields[9])
+                    if inode == 0:
+                        continue
+                    ip, port = parse_proc_address(fields[1], family)
+                    sockets[inode] = (ip, port, proto)
+        except (OSError, ValueError):
+            continue
+    return sockets
+
+def iter_process_socket_inodes(proc_root='/proc'):
+    """Gjenero çiftet (pid, inode) për çdo socket të hapur nga proceset në /proc/*/fd"""
+    try:
+        entries = os.listdir(proc_root)
+    except OSError:
+        return
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        fd_dir = os.path.join(proc_root, entry, 'fd')
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        pid = int(entry)
+        for fd in fds:
+            try:
+                target = os.readlink(os.path.join(fd_dir, fd))
+            except OSError:
+                continue
+            if target.startswith('socket:['):
+                yield pid, int(target[8:-1])
+
+class SocketProcessIndex:
+    """Indeks nga socket-i lokal (ip, port, proto) te procesi pronar, i rifreskuar në sfond"""
+
+    def __init__(self, refresh_interval=1.0, metadata_ttl=30.0, proc_root='/proc',
+                 miss_refresh_interval=0.5, local_addresses=(), orphan_retry_refreshes=10):
+        self.refresh_interval = refresh_interval
+        self.metadata_ttl = metadata_ttl
+        self.proc_root = proc_root
+        self.use_procfs = os.path.isdir(os.path.join(proc_root, 'net'))
+        # Kërkimet pa rezultat kërkojnë rifreskim, por jo më shpesh se ky interval
+        self.miss_refresh_interval = miss_refresh_interval
+        self.last_miss_refresh = float('-inf')
+        # Socket-et pa pronar riskanohen pas kaq rifreskimesh: skanimi mund t'i ketë humbur nga një garë
+        # me krijimin e socket-it ose nga një gabim kalimtar leje
+        self.orphan_retry_refreshes = max(1, int(orphan_retry_refreshes))
+        # Adresat shtesë që trajtohen si lokale (p.sh. adresa publike e NAT-it ose në teste)
+        self.extra_local = frozenset(local_addresses)
+        self.local_ips = frozenset(self.extra_local)
+        self.endpoints = {}
+        self.inode_pids = {}
+        # inode -> numri i rifreskimit kur u shënua pa pronar
+        self.orphan_inodes = {}
+        self.metadata = {}
+        self.metadata_lock = threading.Lock()
+        self.refresh_requested = threading.Event()
+        self.stop_event = threading.Event()
+        self.worker = None
+        self.stats = {
+            'refreshes': 0,
+            'fd_scans': 0,
+            'lookups': 0,
+            'hits': 0,
+            'misses': 0,
+            'miss_refreshes': 0,
+            'metadata_hits': 0,
+            'metadata_misses': 0
+        }
+
+    def start(self):
+        """Ndërto indeksin dhe nis rifreskimin në sfond"""
+        self.refresh()
+        self.stop_event.clear()
+        self.worker = threading.Thread(target=self.run, name="SocketProcessIndex", daemon=True)
+        self.worker.start()
+
+    def stop(self, timeout=2.0):
+        """Ndalo rifreskimin në sfond"""
+        self.stop_event.set()
+        self.refresh_requested.set()
+        if self.worker is not None:
+            self.worker.join(timeout)
+            self.worker = None
+
+    def run(self):
+        """Rifresko indeksin periodikisht ose kur një kërkim nuk gjen socket-in"""
+        while not self.stop_event.is_set():
+            self.refresh_requested.wait(self.refresh_interval)
+            self.refresh_requested.clear()
+            if self.stop_event.is_set():
+                break
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Gabim gjatë rifreskimit të indeksit të socket-eve: {e}")
+
+    def refresh(self):
+        """Rifresko indeksin; /proc/*/fd skanohet vetëm kur shfaqen socket-e të reja"""
+        self.local_ips = frozenset(local_interface_addresses() | self.extra_local)
+        if not self.use_procfs:
+            self.refresh_from_psutil()
+            return
+
+        sockets = read_socket_table(self.proc_root)
+        generation = self.stats['refreshes']
+        # Mbaj pronarët e njohur vetëm për socket-et që ekzistojnë ende
+        inode_pids = {inode: pid for inode, pid in self.inode_pids.items() if inode in sockets}
+        orphan_inodes = {
+            inode: marked for inode, marked in self.orphan_inodes.items()
+            if inode in sockets and generation - marked < self.orphan_retry_refreshes
+        }
+        unresolved = set(sockets) - set(inode_pids) - set(orphan_inodes)
+        if unresolved:
+            self.stats['fd_scans'] += 1
+            for pid, inode in iter_process_socket_inodes(self.proc_root):
+                if inode in unresolved:
+                    inode_pids[inode] = pid
+                    unresolved.discard(inode)
+                    if not unresolved:
+                        break
+            # Socket-et pa pronar (p.sh. të kernelit) nuk riskanohen në çdo rifreskim
+            for inode in unresolved:
+                orphan_inodes[inode] = generation
+
+        endpoints = {}
+        for inode, endpoint in sockets.items():
+            pid = inode_pids.get(inode)
+            if pid is not None:
+                endpoints[endpoint] = pid
+
+        # Zëvendësim atomik: kërkimet në thread-in e kapjes shohin gjithmonë një indeks të plotë
+        self.inode_pids = inode_pids
+        self.orphan_inodes = orphan_inodes
+        self.endpoints = endpoints
+        self.stats['refreshes'] += 1
+
+    def refresh_from_psutil(self):
+        """Ndërto indeksin me psutil në sistemet pa /proc (p.sh. Windows)"""
+        endpoints = {}
+        try:
+            connections = psutil.net_connections(kind='inet')
+        except (psutil.AccessDenied, OSError) as e:
+            logging.error(f"Gabim gjatë leximit të lidhjeve të sistemit: {e}")
+            return
+        for conn in connections:
+            if not conn.laddr or conn.pid is None:
+                continue
+            proto = PROTO_TCP if conn.type == socket.SOCK_STREAM else PROTO_UDP
+            endpoints[(conn.laddr.ip, conn.laddr.port, proto)] = conn.pid
+        self.endpoints = endpoints
+        self.stats['refreshes'] += 1
+
+    def is_local(self, ip):
+        """A i përket adresa këtij hosti"""
+        return ip in self.local_ips
+
+    def find_pid(self, ip, port, proto):
+        """Gjej PID-in që zotëron socket-in lokal; adresat wildcard provohen vetëm për IP lokale"""
+        endpoints = self.endpoints
+        pid = endpoints.get((ip, port, proto))
+        if pid is None and self.is_local(ip):
+            for wildcard in WILDCARD_ADDRESSES:
+                pid = endpoints.get((wildcard, port, proto))
+                if pid is not None:
+                    break
+        return pid
+
+    def lookup(self, src_ip, sport, dst_ip, dport, proto):
+        """Kthe informacionin e procesit që zotëron njërin skaj lokal të paketës"""
+        self.stats['lookups'] += 1
+        endpoints = self.endpoints
+        # Përputhjet e sakta në të dy skajet para wildcard-eve: përgjigja nga remote:22 i përket
+        # klientit lokal, jo sshd-së që dëgjon në 0.0.0.0:22
+        pid = endpoints.get((src_ip, sport, proto))
+        if pid is None:
+            pid = endpoints.get((dst_ip, dport, proto))
+        if pid is None:
+            pid = self.find_pid(src_ip, sport, proto)
+        if pid is None:
+            pid = self.find_pid(dst_ip, dport, proto)
+        if pid is None:
+            self.stats['misses'] += 1
+            # Socket-i mund të jetë i ri: kërko rifreskim pa bllokuar thread-in e kapjes, me kufizim
+            # që trafiku i pa-atribueshëm të mos rilexojë /proc/net pa pushim
+            now = time.monotonic()
+            if now - self.last_miss_refresh >= self.miss_refresh_interval:
+                self.last_miss_refresh = now
+                self.stats['miss_refreshes'] += 1
+                self.refresh_requested.set()
+            return None
+        self.stats['hits'] += 1
+        return self.process_info(pid)
+
+    def process_info(self, pid):
+        """Kthe metadatat e procesit nga cache-i me TTL, ose lexoji me psutil"""
+        now = time.monotonic()
+        with self.metadata_lock:
+            cached = self.metadata.get(pid)
+            if cached is not None and cached[0] > now:
+                self.stats['metadata_hits'] += 1
+                return cached[1]
+
+        self.stats['metadata_misses'] += 1
+        try:
+            process = psutil.Process(pid)
+            with process.oneshot():
+                info = {
+                    'pid': pid,
+                    'name': process.name(),
+                    'path': process.exe(),
+                    'cmdline': process.cmdline()
+                }
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            info = None
+
+        with self.metadata_lock:
+            self.metadata[pid] = (now + self.metadata_ttl, info)
+            if len(self.metadata) > 4096:
+                # Largo hyrjet e skaduara që cache-i të mos rritet pa kufi
+                self.metadata = {p: entry for p, entry in self.metadata.items() if entry[0] > now}
+        return info
@@ -0,0 +1,387 @@
+import time
+import queue
+import struct
+import logging
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from flow_table import FlowTable, packet_feature_row
+from flow_features import FlowFeatureTracker
+from packet_parser import PacketInfo
+from capture_filter import AdaptiveSampler
+from verdict_cache import VerdictCache, VERDICT_ALLOW, VERDICT_SUSPICIOUS
+from pcap_analysis import flow_shard
+
+# Rekordi fiks i kokës së paketës në unazë: koha, IP-të si tekst, portat, protokolli,
+# gjatësia, TTL, dritarja dhe flamujt TCP
+RECORD = struct.Struct('=d46s46sHHBIBHB')
+
+# Koka e unazës: head (konsumatori) dhe tail (prodhuesi) në rreshta të ndryshëm cache-i
+RING_HEADER = 128
+HEAD = 0
+TAIL = 8
+CLOSED = 9
+
+# Mesazhet nga proceset punëtore te mbledhësi qendror
+MESSAGE_READY = 'ready'
+MESSAGE_FAILED = 'failed'
+MESSAGE_VERDICTS = 'verdicts'
+MESSAGE_STATS = 'stats'
+MESSAGE_DONE = 'done'
+
+class PacketRing:
+    """Unazë me një prodhues dhe një konsumator në memorie të përbashkët, me rekorde kokash fikse"""
+
+    def __init__(self, slots=65536, name=None):
+        self.slots = max(1, int(slots))
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=RING_HEADER + self.slots * RECORD.size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+        # Indekset lexohen/shkruhen si fjalë 64-bitëshe të rreshtuara
+        self.index = self.buf[:RING_HEADER].cast('Q')
+        if self.owner:
+            self.index[HEAD] = self.index[TAIL] = self.index[CLOSED] = 0
+        # Prodhuesi rilexon head-in e konsumatorit vetëm kur unaza duket plot
+        self.head_seen = 0
+        self.dropped = 0
+
+    def push(self, info):
+        """Shkruaj kokën e paketës në unazë; kthen False (dhe e numëron) kur unaza është plot"""
+        index = self.index
+        tail = index[TAIL]
+        if tail - self.head_seen >= self.slots:
+            self.head_seen = index[HEAD]
+            if tail - self.head_seen >= self.slots:
+                self.dropped += 1
+                return False
+        RECORD.pack_into(
+            self.buf, RING_HEADER + (tail % self.slots) * RECORD.size,
+            info.timestamp, info.src_ip.encode(), info.dst_ip.encode(), info.sport, info.dport,
+            info.proto, info.length, info.ttl, info.window_size, info.tcp_flags
+        )
+        # Tail publikohet pasi rekordi është shkruar i plotë
+        index[TAIL] = tail + 1
+        return True
+
+    def pop_batch(self, limit):
+        """Lexo deri në limit rekorde të njëpasnjëshme (pa kaluar fundin e unazës)"""
+        index = self.index
+        head = index[HEAD]
+        available = min(index[TAIL] - head, limit)
+        if available <= 0:
+            return []
+        start = head % self.slots
+        count = min(available, self.slots - start)
+        offset = RING_HEADER + start * RECORD.size
+        with self.buf[offset:offset + count * RECORD.size] as view:
+            records = list(RECORD.iter_unpack(view))
+        index[HEAD] = head + count
+        return records
+
+    def pending(self):
+        return self.index[TAIL] - self.index[HEAD]
+
+    def close_writer(self):
+        """Shëno që prodhuesi mbaroi; konsumatori del pasi të zbrazë unazën"""
+        self.index[CLOSED] = 1
+
+    def closed(self):
+        return self.index[CLOSED] == 1
+
+    def close(self):
+        """Liro pamjet e memories; pronari e fshin edhe segmentin"""
+        self.index.release()
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+def record_info(record):
+    """Ndërto PacketInfo nga një rekord i unazës"""
+    timestamp, src_ip, dst_ip, sport, dport, proto, length, ttl, window_size, tcp_flags = record
+    return PacketInfo(timestamp, src_ip.rstrip(b'\0').decode(), dst_ip.rstrip(b'\0').decode(),
+                      sport, dport, proto, length, ttl, window_size, tcp_flags)
+
+class ShardWorker:
+    """Procesi punëtor: zotëron pjesën e vet të lidhjeve, cache-in e vendimeve dhe modelin"""
+
+    def __init__(self, shard, ring, result_queue, options, generation=None):
+        from ml_analyzer import NetworkBehaviorAnalyzer, SUSPICIOUS_THRESHOLD
+
+        self.shard = shard
+        self.ring = ring
+        self.result_queue = result_queue
+        self.batch_size = options['batch_size']
+        self.stats_interval = options['stats_interval']
+        self.idle_sleep = options['idle_sleep']
+        self.threshold = SUSPICIOUS_THRESHOLD
+        # Numëruesi i ringarkimeve të modelit, i përbashkët me procesin kryesor
+        self.generation = generation
+        self.loaded_generation = generation.value if generation is not None else 0
+        self.analyzer = NetworkBehaviorAnalyzer(feature_set=options['feature_set'])
+        self.flow_table = FlowTable(**options['flow_options'])
+        self.flow_features = None
+        if options['feature_set'] == 'flow':
+            self.flow_features = FlowFeatureTracker(**options['flow_feature_options'])
+        self.verdicts = VerdictCache(**options['verdict_options'])
+        self.sampler = AdaptiveSampler(**options['sampler_options'])
+        # Matrica e karakteristikave ripërdoret për çdo grup
+        self.matrix = np.zeros((self.batch_size, len(self.analyzer.feature_keys)), dtype=np.float64)
+        self.stats = {
+            'packets': 0,
+            'scored': 0,
+            'suspicious': 0,
+            'cached': 0,
+            'shed': 0,
+            'batches': 0,
+            'inference_seconds': 0.0,
+            'flows': 0,
+            'backlog': 0,
+            'reloads': 0,
+            'reload_errors': 0
+        }
+
+    def run(self):
+        """Lexo unazën deri sa prodhuesi ta mbyllë dhe ta zbrazë"""
+        self.result_queue.put((MESSAGE_READY, self.shard, None))
+        last_report = time.monotonic()
+        while True:
+            if self.generation is not None and self.generation.value != self.loaded_generation:
+                self.reload()
+            records = self.ring.pop_batch(self.batch_size)
+            if records:
+                self.process(records)
+            elif self.ring.closed() and not self.ring.pending():
+                break
+            else:
+                time.sleep(self.idle_sleep)
+            now = time.monotonic()
+            if now - last_report >= self.stats_interval:
+                self.report_stats()
+                last_report = now
+        self.report_stats()
+        self.result_queue.put((MESSAGE_DONE, self.shard, None))
+
+    def reload(self):
+        """Ringarko modelin midis dy grupeve; lidhjet ruhen, vendimet e vjetra të modelit jo"""
+        self.loaded_generation = self.generation.value
+        if self.analyzer.reload_weights():
+            self.verdicts.clear()
+            self.stats['reloads'] += 1
+        else:
+            self.stats['reload_errors'] += 1
+        self.report_stats()
+
+    def process(self, records):
+        """Përditëso lidhjet e grupit dhe pikëzo me një thirrje të vetme të modelit"""
+        candidates = []
+        stats = self.stats
+        stats['packets'] += len(records)
+        if self.flow_features is not None:
+            for record in records:
+                info = record_info(record)
+                for initiator, features in self.flow_features.update(info):
+                    if self.verdicts.lookup(initiator.flow_key(), initiator.dst_ip) is not None:
+                        stats['cached'] += 1
+                        continue
+                    candidates.append((initiator, features))
+        else:
+            backlog = self.ring.pending()
+            for record in records:
+                info = record_info(record)
+                flow = self.flow_table.update(info.flow_key(), info.length)
+                if self.verdicts.lookup(info.flow_key(), info.dst_ip) is not None:
+                    stats['cached'] += 1
+                    continue
+                if not self.sampler.should_score(flow.packet_count, backlog):
+                    stats['shed'] += 1
+                    continue
+                candidates.append((info, packet_feature_row(flow, info)))
+        if candidates:
+            self.score(candidates)
+
+    def score(self, candidates):
+        """Pikëzo kandidatët dhe dërgo te mbledhësi vetëm vendimet e dyshimta"""
+        if len(candidates) > len(self.matrix):
+            self.matrix = np.zeros((len(candidates), self.matrix.shape[1]), dtype=np.float64)
+        for row, (_, features) in enumerate(candidates):
+            self.matrix[row] = features
+        started = time.perf_counter()
+        scores = self.analyzer.analyze_matrix(self.matrix[:len(candidates)]).tolist()
+        self.stats['inference_seconds'] += time.perf_counter() - started
+        self.stats['batches'] += 1
+        self.stats['scored'] += len(candidates)
+
+        suspicious = []
+        for (info, features), score in zip(candidates, scores):
+            if score > self.threshold:
+                self.verdicts.store_flow(info.flow_key(), VERDICT_SUSPICIOUS, score)
+                suspicious.append((info.as_tuple(), score, tuple(features)))
+            else:
+                self.verdicts.store_flow(info.flow_key(), VERDICT_ALLOW, score)
+        if suspicious:
+            self.stats['suspicious'] += len(suspicious)
+            self.result_queue.put((MESSAGE_VERDICTS, self.shard, suspicious))
+
+    def report_stats(self):
+        self.stats['flows'] = len(self.flow_features if self.flow_features is not None else self.flow_table)
+        self.stats['backlog'] = self.ring.pending()
+        self.result_queue.put((MESSAGE_STATS, self.shard, dict(self.stats)))
+
+def shard_worker(shard, ring_name, ring_slots, result_queue, options, generation=None):
+    """Pika hyrëse e procesit punëtor"""
+    ring = PacketRing(ring_slots, name=ring_name)
+    try:
+        worker = ShardWorker(shard, ring, result_queue, options, generation)
+    except Exception as e:
+        logging.error(f"Gabim gjatë nisjes së procesit punëtor {shard}: {e}")
+        result_queue.put((MESSAGE_FAILED, shard, str(e)))
+        ring.close()
+        return
+    try:
+        worker.run()
+    finally:
+        ring.close()
+
+class ShardedPipeline:
+    """Shpërndan kokat e paketave sipas lidhjes te N procese dhe mbledh vendimet në qendër"""
+
+    def __init__(self, workers, on_verdict, feature_set='packet', ring_slots=65536, batch_size=256,
+                 flow_options=None, flow_feature_options=None, verdict_options=None,
+                 sampler_options=None, stats_interval=1.0, idle_sleep=0.0005):
+        self.workers = max(1, int(workers))
+        self.on_verdict = on_verdict
+        self.ring_slots = ring_slots
+        self.options = {
+            'feature_set': feature_set,
+            'batch_size': batch_size,
+            'stats_interval': stats_interval,
+            'idle_sleep': idle_sleep,
+            'flow_options': flow_options or {},
+            'flow_feature_options': flow_feature_options or {},
+            'verdict_options': verdict_options or {},
+            'sampler_options': sampler_options or {}
+        }
+        self.rings = []
+        self.processes = []
+        self.result_queue = None
+        self.generation = None
+        self.gatherer = None
+        self.ready = threading.Event()
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.shard_stats = [{} for _ in range(self.workers)]
+        self.stats = {
+            'dispatched': 0,
+            'verdicts': 0,
+            'verdict_errors': 0
+        }
+
+    def start(self):
+        """Krijo unazat dhe nis proceset punëtore dhe thread-in mbledhës"""
+        # Procesi kryesor ka thread-e aktive (kapja, logimi), prandaj nuk përdoret fork
+        context = multiprocessing.get_context('spawn')
+        self.result_queue = context.Queue()
+        self.generation = context.Value('i', 0, lock=False)
+        self.rings = [PacketRing(self.ring_slots) for _ in range(self.workers)]
+        self.processes = [
+            context.Process(
+                target=shard_worker,
+                args=(shard, ring.name, ring.slots, self.result_queue, self.options, self.generation),
+                name=f"ShardWorker-{shard}",
+                daemon=True
+            )
+            for shard, ring in enumerate(self.rings)
+        ]
+        for process in self.processes:
+            process.start()
+        self.gatherer = threading.Thread(target=self.gather, name="ShardGatherer", daemon=True)
+        self.gatherer.start()
+
+    def wait_ready(self, timeout=None):
+        """Prit derisa të gjitha proceset të kenë ngarkuar modelin; kthen False nëse ndonjë dështoi"""
+        return self.ready.wait(timeout) and self.failed == 0
+
+    def reload_model(self):
+        """Kërko nga proceset të ringarkojnë modelin pa humbur lidhjet e tyre"""
+        if self.generation is not None:
+            self.generation.value += 1
+
+    def submit(self, info):
+        """Dërgo kokën e paketës te procesi që zotëron lidhjen e saj; False nëse unaza është plot"""
+        self.stats['dispatched'] += 1
+        return self.rings[flow_shard(info, self.workers)].push(info)
+
+    def gather(self):
+        """Merr vendimet dhe statistikat nga proceset derisa të gjitha të kenë mbaruar"""
+        while self.finished + self.failed < self.workers:
+            try:
+                kind, shard, payload = self.result_queue.get(timeout=0.5)
+            except queue.Empty:
+                if not any(process.is_alive() for process in self.processes):
+                    break
+                continue
+            if kind == MESSAGE_VERDICTS:
+                for values, score, features in payload:
+                    self.stats['verdicts'] += 1
+                    try:
+                        self.on_verdict(PacketInfo.from_tuple(values), score, features)
+                    except Exception as e:
+                        self.stats['verdict_errors'] += 1
+                        logging.error(f"Gabim gjatë trajtimit të vendimit nga procesi {shard}: {e}")
+            elif kind == MESSAGE_STATS:
+                self.shard_stats[shard] = payload
+            elif kind == MESSAGE_READY:
+                self.started += 1
+                if self.started + self.failed == self.workers:
+                    self.ready.set()
+            elif kind == MESSAGE_FAILED:
+                self.failed += 1
+                self.ready.set()
+            elif kind == MESSAGE_DONE:
+                self.finished += 1
+        self.ready.set()
+
+    def stop(self, timeout=5.0):
+        """Mbyll unazat, prit që proceset t'i zbrazin dhe liro memorien e përbashkët"""
+        for ring in self.rings:
+            ring.close_writer()
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logging.warning(f"Procesi {process.name} nuk u ndal në kohë; duke e përfunduar")
+                process.terminate()
+                process.join(1.0)
+        if self.gatherer is not None:
+            self.gatherer.join(max(0.5, deadline - time.monotonic()))
+            self.gatherer = None
+        for ring in self.rings:
+            ring.close()
+        self.processes = []
+
+    def backlog(self):
+        """Paketat në unaza që proceset ende nuk i kanë lexuar"""
+        return sum(ring.pending() for ring in self.rings) if self.processes else 0
+
+    def dropped(self):
+        """Paketat e hedhura sepse unaza e procesit ishte plot"""
+        return sum(ring.dropped for ring in self.rings)
+
+    def totals(self):
+        """Shuma e statistikave të fundit të raportuara nga proceset"""
+        totals = dict(self.stats)
+        totals['ring_dropped'] = self.dropped()
+        for stats in self.shard_stats:
+            for name, value in stats.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
@@ -0,0 +1,333 @@
+import time
+import heapq
+import threading
+from collections import OrderedDict
+import numpy as np
+from flow_table import PROTO_TCP
+from flow_features import TCP_SYN, TCP_ACK
+
+# Llojet e zbulimeve
+SCAN_PORTS = 'port_scan'
+SCAN_HOSTS = 'host_sweep'
+FLOOD_SOURCE = 'source_flood'
+FLOOD_DESTINATION = 'destination_flood'
+
+# Numëruesit HyperLogLog për çdo burim: portat dhe hostet e ndryshme të destinacionit
+HLL_PORTS = 0
+HLL_HOSTS = 1
+
+# Memoria e përafërt e një hyrjeje në tabelën burim -> slot (OrderedDict + çelësi)
+SLOT_OVERHEAD = 200
+
+# Pjesa e buxhetit për tabelën e lidhjeve jo-TCP të para së fundi (dallon paketën e parë nga përgjigjet)
+SEEN_FLOWS_SHARE = 4
+
+MASK64 = (1 << 64) - 1
+
+def mix64(value):
+    """Përzierje splitmix64: hash-i i Python-it për int-et është vetë numri"""
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+def hll_estimate(registers):
+    """Vlerësimi HyperLogLog me korrigjimin për vlera të vogla (linear counting)"""
+    m = len(registers)
+    alpha = 0.673 if m == 16 else 0.697 if m == 32 else 0.709 if m == 64 else 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -registers.astype(np.int32))))
+    zeros = m - np.count_nonzero(registers)
+    if estimate <= 2.5 * m and zeros:
+        return m * np.log(m / zeros)
+    return estimate
+
+class CountMinSketch:
+    """Count-min me numërues int32 të para-alokuar dhe me top-K të çelësave më të shpeshtë"""
+
+    def __init__(self, width=4096, depth=4, top_k=16):
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.table = np.zeros(depth * width, dtype=np.int32)
+        # memoryview jep qasje me int Python pa krijuar skalarë NumPy në rrugën e paketave
+        self.cells = memoryview(self.table)
+        self.top = {}
+        self.heap = []
+
+    def add(self, key, count=1):
+        """Shto count te çelësi dhe kthe vlerësimin e ri (kufi i sipërm)"""
+        hashed = mix64(hash(key) & MASK64)
+        h1 = hashed & 0xFFFFFFFF
+        h2 = (hashed >> 32) | 1
+        cells = self.cells
+        width = self.width
+        estimate = None
+        for row in range(self.depth):
+            index = row * width + (h1 + row * h2) % width
+            value = cells[index] + count
+            cells[index] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        self.track(key, estimate)
+        return estimate
+
+    def track(self, key, estimate):
+        top = self.top
+        if key in top:
+            # Hyrja në heap mbetet me vlerën e vjetër dhe rregullohet vetëm kur del në majë
+            top[key] = estimate
+            return
+        heap = self.heap
+        if len(top) < self.top_k:
+            top[key] = estimate
+            heapq.heappush(heap, (estimate, key))
+            return
+        # Vlera në majë të heap-it nuk është kurrë më e madhe se minimumi i vërtetë i top-K
+        if estimate <= heap[0][0]:
+            return
+        while True:
+            value, smallest = heap[0]
+            current = top[smallest]
+            if current == value:
+                break
+            heapq.heapreplace(heap, (current, smallest))
+        if estimate > heap[0][0]:
+            del top[smallest]
+            top[key] = estimate
+            heapq.heapreplace(heap, (estimate, key))
+
+    def decay(self):
+        """Përgjysmo numëruesit në fund të dritares që trafiku i vjetër të humbasë peshë"""
+        np.right_shift(self.table, 1, out=self.table)
+        self.top = {key: value >> 1 for key, value in self.top.items() if value > 1}
+        self.heap = [(value, key) for key, value in self.top.items()]
+        heapq.heapify(self.heap)
+
+    def heavy_hitters(self):
+        """Çelësat më të shpeshtë me vlerësimet e tyre, nga më i madhi"""
+        return sorted(self.top.items(), key=lambda item: item[1], reverse=True)
+
+    def nbytes(self):
+        return self.table.nbytes
+
+class SketchScanDetector:
+    """Zbulon skanimet dhe flood-et me skica me memorie fikse, pa gjendje për çdo lidhje"""
+
+    def __init__(self, memory_budget=1 << 20, window_seconds=10.0, hll_precision=6,
+                 cms_width=4096, cms_depth=4, top_k=16, port_threshold=64, host_threshold=32,
+                 local_host_threshold=256, source_flood_packets=20000, destination_flood_packets=20000,
+                 is_local=None):
+        self.window_seconds = window_seconds
+        self.registers = 1 << hll_precision
+        self.precision = hll_precision
+        self.port_threshold = port_threshold
+        self.host_threshold = host_threshold
+        # Hosti lokal lidhet natyrshëm me shumë servera (shfletimi), prandaj ka pragun e vet për sweep
+        self.local_host_threshold = local_host_threshold
+        self.is_local = is_local
+        self.source_flood_packets = source_flood_packets
+        self.destination_flood_packets = destination_flood_packets
+        self.sources = CountMinSketch(cms_width, cms_depth, top_k)
+        self.destinations = CountMinSketch(cms_width, cms_depth, top_k)
+
+        # Tabelë me adresim direkt të hash-eve të lidhjeve jo-TCP: paketa e parë e një lidhjeje numërohet,
+        # përgjigjet dhe paketat e mëvonshme jo
+        seen_slots = 1 << max(10, (memory_budget // SEEN_FLOWS_SHARE // 8).bit_length() - 1)
+        self.seen = np.zeros(seen_slots, dtype=np.uint64)
+        self.seen_flows = memoryview(self.seen)
+        self.seen_mask = seen_slots - 1
+
+        # Buxheti që mbetet pas count-min ndahet në slote HLL: 2 dritare x 2 numërues për burim
+        slot_bytes = 2 * 2 * self.registers + SLOT_OVERHEAD
+        available = memory_budget - self.sources.nbytes() - self.destinations.nbytes() - self.seen.nbytes
+        self.capacity = max(16, available // slot_bytes)
+        self.hll = bytearray(2 * self.capacity * 2 * self.registers)
+        self.hll_view = np.frombuffer(self.hll, dtype=np.uint8).reshape(2, self.capacity, 2, self.registers)
+        self.slots = OrderedDict()
+        self.free_slots = list(range(self.capacity - 1, -1, -1))
+        # Dritarja në të cilën u raportua secili slot/çelës, që alarmi të jepet një herë për dritare
+        self.alerted = [[-1, -1] for _ in range(self.capacity)]
+        # Regjistrat jo-zero të dritares aktuale: vlerësimi llogaritet vetëm kur mund ta kalojë pragun
+        self.filled = [0] * (self.capacity * 2)
+        self.min_filled = [
+            self.filled_for(port_threshold),
+            self.filled_for(min(host_threshold, local_host_threshold))
+        ]
+        self.flooded = {}
+        self.flood_capacity = top_k * 64
+
+        self.generation = 0
+        self.current = 0
+        self.window_started = None
+        self.lock = threading.Lock()
+        self.counters = {
+            'packets': 0,
+            'initiating': 0,
+            'port_scans': 0,
+            'host_sweeps': 0,
+            'source_floods': 0,
+            'destination_floods': 0,
+            'evicted_sources': 0,
+            'windows': 0
+        }
+
+    def filled_for(self, threshold):
+        """Numri minimal i regjistrave jo-zero që vlerësimi të arrijë pragun (nga linear counting)"""
+        m = self.registers
+        if threshold > 2.5 * m:
+            return 1
+        return max(1, int(m - m * np.exp(-threshold / m)))
+
+    def update(self, info, now=None):
+        """Përditëso skicat me paketën; kthe (lloji, çelësi, vlerësimi) kur kalohet një prag, përndryshe None"""
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            if self.window_started is None:
+                self.window_started = now
+            elif now - self.window_started >= self.window_seconds:
+                self.rotate(now)
+            self.counters['packets'] += 1
+
+            # Vetëm paketat që hapin lidhje numërohen, me iniciatorin si burim: përgjigjet (ACK nga një
+            # CDN drejt shumë portave lokale, trafiku kthyes i shfletimit) nuk janë skanime as flood-e
+            if info.proto == PROTO_TCP:
+                if info.tcp_flags & (TCP_SYN | TCP_ACK) != TCP_SYN:
+                    return None
+            elif not self.first_packet(info):
+                return None
+            self.counters['initiating'] += 1
+
+            src = info.src_ip
+            slot = self.slots.get(src)
+            if slot is None:
+                slot = self.assign_slot(src)
+            else:
+                self.slots.move_to_end(src)
+
+            detection = None
+            if self.add_register(slot, HLL_PORTS, info.dport):
+                detection = self.check_distinct(slot, HLL_PORTS, src, self.port_threshold, SCAN_PORTS, 'port_scans')
+            if self.add_register(slot, HLL_HOSTS, hash(info.dst_ip)):
+                threshold = self.host_threshold
+                if self.is_local is not None and self.is_local(src):
+                    threshold = self.local_host_threshold
+                detection = detection or self.check_distinct(
+                    slot, HLL_HOSTS, src, threshold, SCAN_HOSTS, 'host_sweeps'
+                )
+
+            packets = self.sources.add(src)
+            if packets >= self.source_flood_packets:
+                detection = detection or self.check_flood(src, packets, FLOOD_SOURCE, 'source_floods')
+            packets = self.destinations.add(info.dst_ip)
+            if packets >= self.destination_flood_packets:
+                detection = detection or self.check_flood(
+                    info.dst_ip, packets, FLOOD_DESTINATION, 'destination_floods'
+                )
+            return detection
+
+    def first_packet(self, info):
+        """A hap paketa një lidhje jo-TCP: as ajo, as drejtimi i kundërt nuk janë parë së fundi"""
+        seen = self.seen_flows
+        mask = self.seen_mask
+        # Çdo lidhje ka dy pozicione të mundshme, që përplasjet të mos fshijnë lidhjet aktive
+        reverse = mix64(hash((info.dst_ip, info.src_ip, info.dport, info.sport, info.proto)) & MASK64) | 1
+        if seen[reverse & mask] == reverse or seen[(reverse >> 32) & mask] == reverse:
+            return False
+        forward = mix64(hash((info.src_ip, info.dst_ip, info.sport, info.dport, info.proto)) & MASK64) | 1
+        first = forward & mask
+        second = (forward >> 32) & mask
+        if seen[first] == forward or seen[second] == forward:
+            return False
+        seen[second if seen[first] and not seen[second] else first] = forward
+        return True
+
+    def assign_slot(self, src):
+        """Jep një slot burimit të ri; kur tabela është plot ripërdoret slot-i i burimit më të vjetër"""
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            _, slot = self.slots.popitem(last=False)
+            self.hll_view[:, slot] = 0
+            self.alerted[slot] = [-1, -1]
+            self.filled[2 * slot] = self.filled[2 * slot + 1] = 0
+            self.counters['evicted_sources'] += 1
+        self.slots[src] = slot
+        return slot
+
+    def add_register(self, slot, counter, value):
+        """Përditëso regjistrin HLL të dritares aktuale; kthen True nëse vlera e tij u rrit"""
+        hashed = mix64((hash(value) & MASK64) ^ counter)
+        index = hashed & (self.registers - 1)
+        remaining = hashed >> self.precision
+        rank = 64 - self.precision - remaining.bit_length() + 1
+        offset = ((self.current * self.capacity + slot) * 2 + counter) * self.registers + index
+        previous = self.hll[offset]
+        if rank <= previous:
+            return False
+        self.hll[offset] = rank
+        if previous == 0:
+            self.filled[2 * slot + counter] += 1
+        return True
+
+    def distinct(self, slot, counter):
+        """Vlerësimi i numrit të vlerave të ndryshme në dritaren aktuale dhe atë të mëparshme"""
+        registers = np.maximum(self.hll_view[0, slot, counter], self.hll_view[1, slot, counter])
+        return hll_estimate(registers)
+
+    def check_distinct(self, slot, counter, src, threshold, kind, counter_name):
+        if self.alerted[slot][counter] == self.generation:
+            return None
+        if self.filled[2 * slot + counter] < self.min_filled[counter]:
+            return None
+        estimate = self.distinct(slot, counter)
+        if estimate < threshold:
+            return None
+        self.alerted[slot][counter] = self.generation
+        self.counters[counter_name] += 1
+        return kind, src, int(estimate)
+
+    def check_flood(self, key, packets, kind, counter_name):
+        flooded = self.flooded.get(kind)
+        if flooded is None:
+            flooded = self.flooded[kind] = OrderedDict()
+        if key in flooded:
+            flooded.move_to_end(key)
+            return None
+        # Raportimet mbahen si LRU e kufizuar: një flood i shpërndarë nuk rrit memorien, dhe çelësi
+        # i raportuar largohet vetëm pasi nuk është parë nga shumë çelësa të tjerë
+        flooded[key] = True
+        if len(flooded) > self.flood_capacity:
+            flooded.popitem(last=False)
+        self.counters[counter_name] += 1
+        return kind, key, packets
+
+    def rotate(self, now):
+        """Fillo dritare të re: regjistrat më të vjetër fshihen dhe count-min përgjysmohet"""
+        self.generation += 1
+        self.current ^= 1
+        self.hll_view[self.current] = 0
+        self.filled = [0] * (self.capacity * 2)
+        if now - self.window_started >= 2 * self.window_seconds:
+            # Pa trafik për më shumë se një dritare: edhe dritarja e mëparshme është e vjetëruar
+            self.hll_view[self.current ^ 1] = 0
+        self.sources.decay()
+        self.destinations.decay()
+        self.flooded = {}
+        self.window_started = now
+        self.counters['windows'] += 1
+
+    def nbytes(self):
+        """Memoria e skicave: regjistrat HLL, count-min, lidhjet jo-TCP dhe tabela e sloteve"""
+        return (len(self.hll) + self.sources.nbytes() + self.destinations.nbytes() + self.seen.nbytes
+                + self.capacity * SLOT_OVERHEAD)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['tracked_sources'] = len(self.slots)
+            stats['capacity'] = self.capacity
+            stats['memory_bytes'] = self.nbytes()
+            stats['top_sources'] = self.sources.heavy_hitters()
+            stats['top_destinations'] = self.destinations.heavy_hitters()
+        return stats
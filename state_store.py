@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+STATE_FILE = 'firewall_state.db'
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS apps (name TEXT PRIMARY KEY, data TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS destinations (ip TEXT PRIMARY KEY, status TEXT NOT NULL, updated REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS rules (ip TEXT PRIMARY KEY, action TEXT NOT NULL, updated REAL NOT NULL)"
+)
+
+# Tabela dhe kolonat e çelësit për secilin lloj shkrimi
+TABLE_KEYS = {
+    'apps': 'name',
+    'destinations': 'ip',
+    'rules': 'ip'
+}
+
+def connect(path):
+    """Hap bazën SQLite në mënyrën WAL dhe krijo tabelat nëse mungojnë"""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Me WAL, NORMAL nuk e prish bazën pas një rrëzimi; humbasin vetëm transaksionet e fundit
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+class StateStore:
+    """Ruajtje e aplikacioneve, destinacioneve të bllokuara dhe rregullave me shkrime në grup"""
+
+    def __init__(self, path=STATE_FILE, flush_interval=0.5, max_batch=512, compact_interval=3600.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, int(max_batch))
+        self.compact_interval = compact_interval
+        self.conn = connect(path)
+        self.db_lock = threading.Lock()
+        # Shkrimet në pritje, të bashkuara sipas çelësit: shkrimi i fundit fiton
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = False
+        self.worker = None
+        self.last_compaction = time.monotonic()
+        self.stats = {
+            'writes': 0,
+            'coalesced': 0,
+            'commits': 0,
+            'committed_rows': 0,
+            'compactions': 0,
+            'failed_commits': 0
+        }
+
+    def start(self):
+        """Nis thread-in që bën commit të shkrimeve në grup"""
+        self.running = True
+        self.worker = threading.Thread(target=self.run, name="StateStore", daemon=True)
+        self.worker.start()
+
+    def stop(self, timeout=5.0):
+        """Shkruaj çdo gjë në pritje dhe mbyll bazën"""
+        self.running = False
+        self.wakeup.set()
+        if self.worker is not None:
+            self.worker.join(timeout)
+            self.worker = None
+        self.flush()
+        self.compact()
+        with self.db_lock:
+            self.conn.close()
+
+    def put(self, table, key, value):
+        """Vendos një shkrim në radhë (value=None e fshin rreshtin)"""
+        with self.lock:
+            if (table, key) in self.pending:
+                self.stats['coalesced'] += 1
+            self.pending[(table, key)] = value
+            self.stats['writes'] += 1
+            if len(self.pending) >= self.max_batch:
+                self.wakeup.set()
+        if not self.running:
+            self.flush()
+
+    def put_app(self, name, app):
+        self.put('apps', name, json.dumps(app))
+
+    def delete_app(self, name):
+        self.put('apps', name, None)
+
+    def put_destination(self, ip, status):
+        """Ruaj statusin e një destinacioni (deny ose quarantine)"""
+        self.put('destinations', ip, status)
+
+    def delete_destination(self, ip):
+        self.put('destinations', ip, None)
+
+    def put_rule(self, ip, action):
+        self.put('rules', ip, action)
+
+    def delete_rule(self, ip):
+        self.put('rules', ip, None)
+
+    def run(self):
+        """Bëj commit periodikisht ose kur radha mbushet"""
+        while self.running:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+            if time.monotonic() - self.last_compaction >= self.compact_interval:
+                self.compact()
+
+    def flush(self):
+        """Shkruaj të gjitha shkrimet në pritje në një transaksion të vetëm"""
+        with self.lock:
+            if not self.pending:
+                return
+            batch = self.pending
+            self.pending = {}
+        now = time.time()
+        try:
+            with self.db_lock, self.conn:
+                for (table, key), value in batch.items():
+                    column = TABLE_KEYS[table]
+                    if value is None:
+                        self.conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (key,))
+                    elif table == 'apps':
+                        self.conn.execute(
+                            "INSERT OR REPLACE INTO apps (name, data) VALUES (?, ?)", (key, value)
+                        )
+                    else:
+                        value_column = 'status' if table == 'destinations' else 'action'
+                        self.conn.execute(
+                            f"INSERT OR REPLACE INTO {table} ({column}, {value_column}, updated) VALUES (?, ?, ?)",
+                            (key, value, now)
+                        )
+            self.stats['commits'] += 1
+            self.stats['committed_rows'] += len(batch)
+        except Exception as e:
+            self.stats['failed_commits'] += 1
+            logging.error(f"Gabim gjatë ruajtjes së gjendjes: {e}")
+            # Kthe shkrimet në radhë pa mbishkruar ato më të rejat
+            with self.lock:
+                for item, value in batch.items():
+                    self.pending.setdefault(item, value)
+
+    def compact(self):
+        """Transfero WAL-in në bazë dhe shkurtoje skedarin e tij"""
+        try:
+            with self.db_lock:
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.stats['compactions'] += 1
+        except Exception as e:
+            logging.error(f"Gabim gjatë kompaktimit të bazës së gjendjes: {e}")
+        self.last_compaction = time.monotonic()
+
+    def load(self):
+        """Ngarko gjendjen: (aplikacionet, destinacionet sipas statusit, rregullat)"""
+        with self.db_lock:
+            apps = {name: json.loads(data) for name, data in self.conn.execute("SELECT name, data FROM apps")}
+            destinations = dict(self.conn.execute("SELECT ip, status FROM destinations"))
+            rules = dict(self.conn.execute("SELECT ip, action FROM rules"))
+        return apps, destinations, rules
+
+    def is_empty(self):
+        with self.db_lock:
+            return self.conn.execute("SELECT 1 FROM apps LIMIT 1").fetchone() is None
+
+    def import_json(self, path='known_apps.json'):
+        """Importo aplikacionet nga formati ekzistues i known_apps.json"""
+        try:
+            with open(path, 'r') as f:
+                apps = json.load(f)
+            for name, app in apps.items():
+                self.put_app(name, app)
+            self.flush()
+            logging.info(f"U importuan {len(apps)} aplikacione nga {path}")
+            return len(apps)
+        except Exception as e:
+            logging.error(f"Gabim gjatë importimit të aplikacioneve: {e}")
+            return 0
+
+    def export_json(self, path='known_apps.json'):
+        """Eksporto aplikacionet në formatin e known_apps.json"""
+        try:
+            self.flush()
+            apps, _, _ = self.load()
+            # Shkruaj në një skedar të përkohshëm që një rrëzim të mos e prishë origjinalin
+            temporary = f"{path}.tmp"
+            with open(temporary, 'w') as f:
+                json.dump(apps, f, indent=4)
+            os.replace(temporary, path)
+            logging.info(f"U eksportuan {len(apps)} aplikacione në {path}")
+            return len(apps)
+        except Exception as e:
+            logging.error(f"Gabim gjatë eksportimit të aplikacioneve: {e}")
+            return 0
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2 or sys.argv[1] not in ('import', 'export'):
+        print("Përdorimi: python state_store.py import|export [known_apps.json] [firewall_state.db]")
+        sys.exit(1)
+    json_path = sys.argv[2] if len(sys.argv) > 2 else 'known_apps.json'
+    store = StateStore(sys.argv[3] if len(sys.argv) > 3 else STATE_FILE)
+    if sys.argv[1] == 'import':
+        store.import_json(json_path)
+    else:
+        store.export_json(json_path)
+    store.stop()
+
+if __name__ == "__main__":
+    main()
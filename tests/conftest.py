@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modulet e projektit janë në rrënjë të repo-s, jo në një paketë
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
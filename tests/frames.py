@@ -0,0 +1,20 @@
+import socket
+import struct
+
+def ipv4_frame(src, dst, sport, dport, proto=6, flags=0x02, payload=b'', ttl=64, window=64240):
+    """Kornizë Ethernet/IPv4 me kokë TCP ose UDP"""
+    if proto == 6:
+        transport = struct.pack('!HHIIBBHHH', sport, dport, 0, 0, 5 << 4, flags, window, 0, 0)
+    else:
+        transport = struct.pack('!HHHH', sport, dport, 8 + len(payload), 0)
+    total = 20 + len(transport) + len(payload)
+    ip = struct.pack('!BBHHHBBH4s4s', 0x45, 0, total, 0, 0, ttl, proto, 0,
+                     socket.inet_aton(src), socket.inet_aton(dst))
+    return b'\x00' * 12 + b'\x08\x00' + ip + transport + payload
+
+def ipv6_frame(src, dst, sport, dport, flags=0x02, payload=b'', hop_limit=64):
+    """Kornizë Ethernet/IPv6 me kokë TCP"""
+    transport = struct.pack('!HHIIBBHHH', sport, dport, 0, 0, 5 << 4, flags, 65535, 0, 0)
+    ip = struct.pack('!IHBB16s16s', 6 << 28, len(transport) + len(payload), 6, hop_limit,
+                     socket.inet_pton(socket.AF_INET6, src), socket.inet_pton(socket.AF_INET6, dst))
+    return b'\x00' * 12 + b'\x86\xdd' + ip + transport + payload
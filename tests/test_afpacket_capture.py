@@ -0,0 +1,87 @@
+from afpacket_capture import (
+    AfPacketCapture, fill_block, iter_block_packets, BLOCK_HEADER, PACKET_HEADER, TP_STATUS_USER
+)
+from flow_table import PROTO_TCP, PROTO_UDP
+from frames import ipv4_frame, ipv6_frame
+
+BLOCK_SIZE = 1 << 16
+
+def test_block_round_trip_follows_next_offset_chain():
+    ring = bytearray(2 * BLOCK_SIZE)
+    frames = [
+        ipv4_frame('10.0.0.1', '10.0.0.2', 40000, 443, payload=b'x' * 100),
+        ipv4_frame('10.0.0.1', '9.9.9.9', 5353, 53, proto=17, payload=b'q' * 30),
+        ipv6_frame('2001:db8::1', '2001:db8::2', 41000, 22, flags=0x12)
+    ]
+    # Blloku i dytë, që offset-i i bllokut të merret parasysh
+    assert fill_block(ring, BLOCK_SIZE, BLOCK_SIZE, frames, timestamp=1700000000.25) == 3
+
+    _, _, status, num_pkts, first = BLOCK_HEADER.unpack_from(ring, BLOCK_SIZE)
+    assert (status, num_pkts) == (TP_STATUS_USER, 3)
+    # Regjistrimet kanë madhësi të ndryshme dhe janë të rreshtuara në 16 bajte
+    offsets = []
+    position = BLOCK_SIZE + first
+    while True:
+        offsets.append(position)
+        next_offset = PACKET_HEADER.unpack_from(ring, position)[0]
+        if next_offset == 0:
+            break
+        assert next_offset % 16 == 0
+        position += next_offset
+    assert len(offsets) == 3 and len(set(b - a for a, b in zip(offsets, offsets[1:]))) == 2
+
+    infos = list(iter_block_packets(ring, BLOCK_SIZE))
+    assert [(i.src_ip, i.dst_ip, i.sport, i.dport, i.proto) for i in infos] == [
+        ('10.0.0.1', '10.0.0.2', 40000, 443, PROTO_TCP),
+        ('10.0.0.1', '9.9.9.9', 5353, 53, PROTO_UDP),
+        ('2001:db8::1', '2001:db8::2', 41000, 22, PROTO_TCP)
+    ]
+    assert [i.length for i in infos] == [len(frame) for frame in frames]
+    assert infos[0].tcp_flags == 0x02 and infos[2].tcp_flags == 0x12
+    assert abs(infos[0].timestamp - 1700000000.25) < 1e-6
+
+def test_snaplen_truncated_packet_keeps_wire_length():
+    ring = bytearray(BLOCK_SIZE)
+    frame = ipv4_frame('10.0.0.1', '10.0.0.2', 40000, 443, payload=b'x' * 1400)
+    fill_block(ring, 0, BLOCK_SIZE, [frame], snaplen=64)
+    assert PACKET_HEADER.unpack_from(ring, 48)[3:5] == (64, len(frame))
+    info, = iter_block_packets(ring, 0)
+    assert (info.dport, info.length) == (443, len(frame))
+
+def test_snaplen_inside_headers_is_skipped():
+    ring = bytearray(BLOCK_SIZE)
+    frames = [
+        ipv4_frame('10.0.0.1', '10.0.0.2', 40000, 443),
+        ipv4_frame('10.0.0.3', '10.0.0.4', 40001, 80)
+    ]
+    fill_block(ring, 0, BLOCK_SIZE, frames, snaplen=30)
+    assert list(iter_block_packets(ring, 0)) == [None, None]
+
+    received = []
+    capture = AfPacketCapture(received.append)
+    capture.ring = ring
+    capture.process_block(0)
+    assert received == []
+    assert capture.stats['skipped'] == 2 and capture.stats['blocks'] == 1
+
+def test_process_block_passes_packets_to_callback():
+    ring = bytearray(BLOCK_SIZE)
+    frames = [ipv4_frame('10.0.0.1', f"10.0.1.{i}", 40000 + i, 443) for i in range(1, 6)]
+    fill_block(ring, 0, BLOCK_SIZE, frames)
+    received = []
+    capture = AfPacketCapture(received.append)
+    capture.ring = ring
+    capture.process_block(0)
+    assert [info.dst_ip for info in received] == [f"10.0.1.{i}" for i in range(1, 6)]
+    assert capture.stats['packets'] == 5
+
+def test_fill_block_stops_when_block_is_full():
+    ring = bytearray(1024)
+    frames = [ipv4_frame('10.0.0.1', '10.0.0.2', 40000, 443, payload=b'x' * 200) for _ in range(10)]
+    written = fill_block(ring, 0, 1024, frames)
+    assert 0 < written < 10
+    assert len(list(iter_block_packets(ring, 0))) == written
+
+def test_default_ring_is_sized_for_a_personal_host():
+    capture = AfPacketCapture(lambda info: None)
+    assert capture.block_size * capture.block_count <= 16 << 20
@@ -0,0 +1,92 @@
+import pytest
+from flow_table import PROTO_TCP
+from packet_parser import PacketInfo
+from decision_queue import POLICY_ALLOW, POLICY_DENY, POLICY_QUARANTINE
+from verdict_cache import VERDICT_BLOCK
+
+SYN, SYN_ACK, ACK, PSH_ACK = 0x02, 0x12, 0x10, 0x18
+LOCAL_IP = '192.168.1.10'
+SCANNER = '203.0.113.5'
+
+@pytest.fixture
+def make_firewall(tmp_path, monkeypatch):
+    # known_apps.json dhe capture_rules.json lexohen nga direktoria e punës
+    monkeypatch.chdir(tmp_path)
+    from main import ZeroTrustFirewall
+
+    created = []
+
+    def make(**options):
+        firewall = ZeroTrustFirewall(
+            interactive=False,
+            metrics_enabled=False,
+            state_path=str(tmp_path / 'firewall_state.db'),
+            local_addresses=[LOCAL_IP],
+            **options
+        )
+        created.append(firewall)
+        return firewall
+
+    yield make
+    for firewall in created:
+        firewall.state_store.stop()
+
+def tcp(src, dst, sport, dport, flags, length=60):
+    return PacketInfo(0.0, src, dst, sport, dport, PROTO_TCP, length, 64, 65535, flags)
+
+def test_inbound_syn_scan_quarantines_scanner_not_local_host(make_firewall):
+    firewall = make_firewall()
+    for port in range(1, 1025):
+        firewall.process_packet(tcp(SCANNER, LOCAL_IP, 40000, port, SYN))
+    assert firewall.quarantined_ips == {SCANNER}
+    assert [d.subject for d in firewall.decisions.pending_decisions()] == [SCANNER]
+
+def test_cdn_replies_do_not_quarantine_anything(make_firewall):
+    firewall = make_firewall()
+    for i in range(100):
+        firewall.process_packet(tcp('151.101.1.1', LOCAL_IP, 443, 50000 + i, ACK, 1500))
+    assert firewall.quarantined_ips == set()
+    assert firewall.stats.counters['alerts'] == 0
+
+def test_local_browsing_does_not_quarantine_web_servers(make_firewall):
+    firewall = make_firewall()
+    for i in range(40):
+        server = f"93.184.0.{i + 1}"
+        sport = 50000 + i
+        firewall.process_packet(tcp(LOCAL_IP, server, sport, 443, SYN))
+        firewall.process_packet(tcp(server, LOCAL_IP, 443, sport, SYN_ACK))
+        firewall.process_packet(tcp(LOCAL_IP, server, sport, 443, ACK))
+        firewall.process_packet(tcp(server, LOCAL_IP, 443, sport, PSH_ACK, 1400))
+    assert firewall.quarantined_ips == set()
+    assert firewall.stats.counters['alerts'] == 0
+
+def test_suspicious_inbound_verdict_targets_remote_source(make_firewall):
+    firewall = make_firewall(default_policy=POLICY_DENY, scan_detection=False)
+    firewall.handle_suspicious_connection(tcp(SCANNER, LOCAL_IP, 40000, 22, SYN), 0.9)
+    assert firewall.suspicious_ips == {SCANNER}
+    # Trafiku i mëvonshëm nga burimi i bllokuar nuk shkon më te ML
+    assert firewall.cached_verdict(tcp(SCANNER, LOCAL_IP, 40001, 23, SYN), None) is not None
+
+def test_local_address_is_never_quarantined(make_firewall):
+    firewall = make_firewall(default_policy=POLICY_QUARANTINE, scan_detection=False)
+    firewall.handle_suspicious_connection(tcp(SCANNER, LOCAL_IP, 40000, 22, SYN), 0.9, LOCAL_IP)
+    assert firewall.quarantined_ips == set()
+    assert firewall.stats.counters['alerts'] == 1
+
+def test_pending_app_follows_default_policy_until_operator_answers(make_firewall):
+    firewall = make_firewall(default_policy=POLICY_DENY, scan_detection=False)
+    process_info = {'pid': 1234, 'name': 'curl', 'path': '/usr/bin/curl', 'cmdline': ['curl']}
+    firewall.handle_new_application('curl', process_info)
+    packet = tcp(LOCAL_IP, '93.184.216.34', 50000, 443, SYN)
+    # Aplikacioni i ri bllokohet menjëherë, pa pritur përgjigjen e operatorit
+    assert firewall.cached_verdict(packet, process_info) == VERDICT_BLOCK
+
+    decision, = firewall.decisions.pending_decisions()
+    firewall.resolve_decision(decision, POLICY_ALLOW)
+    assert firewall.cached_verdict(packet, process_info) is None
+
+def test_pending_app_is_scored_under_quarantine(make_firewall):
+    firewall = make_firewall(default_policy=POLICY_QUARANTINE, scan_detection=False)
+    process_info = {'pid': 1234, 'name': 'curl', 'path': '/usr/bin/curl', 'cmdline': ['curl']}
+    firewall.handle_new_application('curl', process_info)
+    assert firewall.cached_verdict(tcp(LOCAL_IP, '93.184.216.34', 50000, 443, SYN), process_info) is None
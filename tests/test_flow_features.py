@@ -0,0 +1,80 @@
+from flow_features import FlowFeatureTracker, FLOW_FEATURE_KEYS
+from flow_table import PROTO_TCP
+from packet_parser import PacketInfo
+
+SYN, SYN_ACK, ACK, PSH_ACK, FIN_ACK, RST = 0x02, 0x12, 0x10, 0x18, 0x11, 0x04
+
+CLIENT = ('192.168.1.10', 51000)
+SERVER = ('93.184.216.34', 443)
+
+def packet(now, forward, flags, length=60):
+    src, dst = (CLIENT, SERVER) if forward else (SERVER, CLIENT)
+    return PacketInfo(now, src[0], dst[0], src[1], dst[1], PROTO_TCP, length, 64, 65535, flags)
+
+def feed(tracker, packets):
+    ready = []
+    for info in packets:
+        ready.extend(tracker.update(info, now=info.timestamp))
+    return ready
+
+def handshake(start=0.0):
+    return [
+        packet(start, True, SYN),
+        packet(start + 0.01, False, SYN_ACK),
+        packet(start + 0.02, True, ACK),
+        packet(start + 0.03, True, PSH_ACK, 400),
+        packet(start + 0.05, False, PSH_ACK, 1400)
+    ]
+
+def test_graceful_close_is_scored_once_without_fragments():
+    """FIN/ACK i palës tjetër dhe ACK i fundit nuk hapin lidhje të reja"""
+    tracker = FlowFeatureTracker()
+    ready = feed(tracker, handshake() + [
+        packet(0.10, True, FIN_ACK),
+        packet(0.11, False, FIN_ACK),
+        packet(0.12, True, ACK)
+    ])
+    assert len(ready) == 1
+    initiator, row = ready[0]
+    assert (initiator.src_ip, initiator.dport) == ('192.168.1.10', 443)
+    features = dict(zip(FLOW_FEATURE_KEYS, row))
+    # Rreshti përfshin të dy FIN-et, por jo ACK-un e fundit
+    assert features['packet_count'] == 7
+    assert tracker.counters['ended'] == 1 and tracker.counters['lingered'] == 1
+    assert len(tracker) == 1 and len(tracker.closing) == 1
+
+    # Pas pritjes hyrja largohet pa u pikëzuar përsëri
+    assert tracker.expire(now=10.0) == []
+    assert len(tracker) == 0 and len(tracker.closing) == 0
+
+def test_single_fin_waits_for_peer_then_scores_on_linger():
+    tracker = FlowFeatureTracker(close_linger=2.0)
+    ready = feed(tracker, handshake() + [packet(0.10, True, FIN_ACK)])
+    assert ready == []
+    # Pala tjetër ende dërgon të dhëna në lidhjen gjysmë të mbyllur
+    assert feed(tracker, [packet(1.5, False, PSH_ACK, 1400)]) == []
+    assert tracker.expire(now=3.0) == []
+    ended = tracker.expire(now=4.0)
+    assert len(ended) == 1 and dict(zip(FLOW_FEATURE_KEYS, ended[0][1]))['packet_count'] == 7
+    assert len(tracker) == 0
+
+def test_reset_scores_immediately_and_absorbs_late_packets():
+    tracker = FlowFeatureTracker()
+    ready = feed(tracker, handshake() + [packet(0.10, False, RST), packet(0.11, True, ACK)])
+    assert len(ready) == 1
+    assert tracker.counters['lingered'] == 1
+
+def test_new_syn_on_same_ports_starts_new_flow():
+    tracker = FlowFeatureTracker()
+    feed(tracker, handshake() + [packet(0.10, True, FIN_ACK), packet(0.11, False, FIN_ACK)])
+    ready = feed(tracker, [packet(0.5, True, SYN)])
+    assert ready == []
+    assert tracker.flows[next(iter(tracker.flows))].packet_count == 1
+    assert len(tracker.closing) == 0
+
+def test_capacity_evicts_without_rescoring_finished_flows():
+    tracker = FlowFeatureTracker(capacity=1)
+    feed(tracker, handshake() + [packet(0.10, True, FIN_ACK), packet(0.11, False, FIN_ACK)])
+    other = PacketInfo(0.2, '192.168.1.10', '1.1.1.1', 52000, 443, PROTO_TCP, 60, 64, 65535, SYN)
+    assert tracker.update(other, now=0.2) == []
+    assert tracker.counters['evicted'] == 1 and len(tracker.closing) == 0
@@ -0,0 +1,38 @@
+from flow_table import FlowTable
+
+def key(i):
+    return ('10.0.0.1', '10.0.0.2', 40000 + i, 443, 6)
+
+def test_capacity_evicts_least_recently_used():
+    table = FlowTable(capacity=3, sweep_interval=1e9)
+    for i in range(3):
+        table.update(key(i), 100, now=float(i))
+    # Paketa e re në lidhjen 0 e bën atë më të përdorurën; largohet lidhja 1
+    table.update(key(0), 100, now=3.0)
+    table.update(key(3), 100, now=4.0)
+    assert len(table) == 3
+    assert key(1) not in table and key(0) in table
+    assert table.counters['evicted_lru'] == 1
+
+def test_record_counts_packets_and_bytes():
+    table = FlowTable()
+    table.update(key(0), 100, app_name='curl', now=10.0)
+    record = table.update(key(0), 400, now=12.5)
+    assert (record.packet_count, record.total_bytes, record.app_name) == (2, 500, 'curl')
+    assert record.duration() == 2.5
+
+def test_idle_flow_restarts_and_sweep_expires():
+    table = FlowTable(idle_timeout=5.0, sweep_interval=1e9)
+    table.update(key(0), 100, now=0.0)
+    record = table.update(key(0), 100, now=10.0)
+    assert record.packet_count == 1 and table.counters['expired_idle'] == 1
+    table.update(key(1), 100, now=11.0)
+    assert table.expire(now=15.5) == 1
+    assert list(table.flows) == [key(1)]
+
+def test_active_timeout_splits_long_flows():
+    table = FlowTable(idle_timeout=100.0, active_timeout=30.0)
+    for now in range(0, 40, 5):
+        record = table.update(key(0), 100, now=float(now))
+    assert table.counters['expired_active'] == 1
+    assert record.start_time == 35.0
@@ -0,0 +1,52 @@
+import socket
+from ip_reputation import ReputationIndex, parse_prefix
+
+def make_index(feeds):
+    prefixes = []
+    for label, entries in enumerate(feeds.values()):
+        for entry in entries:
+            family, start, end = parse_prefix(entry)
+            prefixes.append((family, start, end, label))
+    return ReputationIndex(prefixes, list(feeds))
+
+def test_ipv4_longest_prefix_wins():
+    index = make_index({
+        'wide': ['10.0.0.0/8', '192.0.2.1'],
+        'narrow': ['10.1.0.0/16'],
+        'host': ['10.1.2.3']
+    })
+    assert index.lookup('10.9.9.9') == 'wide'
+    assert index.lookup('10.1.9.9') == 'narrow'
+    assert index.lookup('10.1.2.3') == 'host'
+    assert index.lookup('10.1.2.4') == 'narrow'
+    assert index.lookup('192.0.2.1') == 'wide'
+    assert index.lookup('192.0.2.2') is None
+    assert index.lookup('11.0.0.0') is None
+
+def test_ipv6_range_ending_in_zero_byte_matches():
+    """Fundi i intervalit që mbaron me 0x00 nuk humbet nga skalari S16 i NumPy-t"""
+    index = make_index({
+        'hosts': ['2001:db8::100', '2001:db8::', '2001:db8::1'],
+        'net': ['2001:db8:1::/48']
+    })
+    assert index.lookup('2001:db8::100') == 'hosts'
+    assert index.lookup('2001:db8::') == 'hosts'
+    assert index.lookup('2001:db8::1') == 'hosts'
+    assert index.lookup('2001:db8::101') is None
+    assert index.lookup('2001:db8::ff') is None
+    assert index.lookup('2001:db8:1:ffff::') == 'net'
+    assert index.lookup('2001:db8:2::') is None
+
+def test_ipv6_nested_prefixes():
+    index = make_index({'wide': ['2001:db8::/32'], 'narrow': ['2001:db8:0:100::/56']})
+    assert index.lookup('2001:db8:0:100::') == 'narrow'
+    assert index.lookup('2001:db8:0:1ff:ffff::1') == 'narrow'
+    assert index.lookup('2001:db8:0:200::') == 'wide'
+
+def test_invalid_input_returns_none():
+    index = make_index({'feed': ['192.0.2.0/24']})
+    assert index.lookup('') is None
+    assert index.lookup('not-an-ip') is None
+    assert index.lookup('2001:db8::1') is None
+    assert parse_prefix('192.0.2.0/33') is None
+    assert parse_prefix('192.0.2.0/24') == (socket.AF_INET, 0xC0000200, 0xC00002FF)
@@ -0,0 +1,40 @@
+import time
+import logging
+from log_pipeline import AlertLimiter
+
+def summaries(caplog):
+    return [r.getMessage() for r in caplog.records if 'u shtypën' in r.getMessage()]
+
+def test_repeated_alerts_are_suppressed_within_window(caplog):
+    limiter = AlertLimiter(window=60.0, burst=2)
+    with caplog.at_level(logging.WARNING):
+        results = [limiter.alert('scan', '1.2.3.4', None, 'skanim', now=100.0 + i) for i in range(5)]
+    assert results == [True, True, False, False, False]
+    assert limiter.stats['suppressed'] == 3
+
+def test_summary_emitted_after_flood_stops_without_new_alerts(caplog):
+    """Përmbledhja jepet nga sweep-i periodik, jo vetëm nga alarmi i radhës ose flush()"""
+    limiter = AlertLimiter(window=60.0, burst=1)
+    with caplog.at_level(logging.WARNING):
+        for i in range(10):
+            limiter.alert('flood', '1.2.3.4', '5.6.7.8', 'flood', now=100.0 + i * 0.1)
+        limiter.sweep_expired(now=130.0)
+        assert summaries(caplog) == []
+        limiter.sweep_expired(now=161.0)
+    assert summaries(caplog) == ['9 ngjarje të ngjashme u shtypën (flood: 1.2.3.4 -> 5.6.7.8)']
+    assert len(limiter.entries) == 0
+
+def test_sweeper_thread_logs_expired_windows(caplog):
+    limiter = AlertLimiter(window=0.1, burst=1, sweep_interval=0.02)
+    with caplog.at_level(logging.WARNING):
+        limiter.start()
+        try:
+            for _ in range(3):
+                limiter.alert('flood', '1.2.3.4', None, 'flood')
+            deadline = time.monotonic() + 5.0
+            while not summaries(caplog) and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            limiter.stop()
+    assert summaries(caplog) == ['2 ngjarje të ngjashme u shtypën (flood: 1.2.3.4 -> None)']
+    assert limiter.worker is None
@@ -0,0 +1,39 @@
+import os
+import numpy as np
+import pytest
+
+pytest.importorskip('tensorflow')
+pytest.importorskip('sklearn')
+
+import ml_analyzer
+from offline_training import OfflineTrainer, saved_model_paths
+
+def samples(n_features, rows=128):
+    rng = np.random.default_rng(0)
+    yield rng.random((rows, n_features)), (rng.random(rows) > 0.5).astype(np.float32)
+
+def test_failed_save_is_reported_as_error(tmp_path, monkeypatch):
+    """Gabimi i ruajtjes nuk kthehet si trajnim i suksesshëm me 'output' të plotësuar"""
+    monkeypatch.setattr(ml_analyzer.NetworkBehaviorAnalyzer, 'save_model', lambda self, path=None: False)
+    trainer = OfflineTrainer(epochs=1, batch_size=32, workers=1, spill_dir=str(tmp_path))
+    with pytest.raises(RuntimeError):
+        trainer.run([samples(len(trainer.feature_keys))], str(tmp_path / 'model'))
+    assert 'output' not in trainer.report
+    # Skedarët e përkohshëm të shembujve fshihen edhe pas gabimit
+    assert os.listdir(tmp_path) == []
+
+def test_trained_model_is_saved_and_reloaded(tmp_path):
+    spill_dir = tmp_path / 'spill'
+    spill_dir.mkdir()
+    output = str(tmp_path / 'model')
+    trainer = OfflineTrainer(epochs=1, batch_size=32, workers=1, spill_dir=str(spill_dir))
+    report = trainer.run([samples(len(trainer.feature_keys))], output)
+    assert report['output'] == output
+    assert all(os.path.exists(path) for path in saved_model_paths(output))
+
+    analyzer = ml_analyzer.NetworkBehaviorAnalyzer()
+    assert analyzer.load_model(output)
+    # Peshat NumPy rieksportohen nga modeli .keras kur ai është më i ri
+    os.remove(f'{output}_weights.npz')
+    assert analyzer.reload_weights(output)
+    assert os.path.exists(f'{output}_weights.npz')
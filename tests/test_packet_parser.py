@@ -0,0 +1,53 @@
+import struct
+from flow_table import PROTO_TCP, PROTO_UDP
+from packet_parser import PacketInfo, parse_frame, LINKTYPE_RAW, LINKTYPE_LINUX_SLL, LINKTYPE_NULL
+from frames import ipv4_frame, ipv6_frame
+
+def test_ipv4_tcp_fields():
+    frame = ipv4_frame('10.0.0.1', '93.184.216.34', 50000, 443, flags=0x18, ttl=57, window=1024)
+    info = parse_frame(frame, timestamp=12.5, length=1514)
+    assert info.as_tuple() == (12.5, '10.0.0.1', '93.184.216.34', 50000, 443, PROTO_TCP, 1514, 57, 1024, 0x18)
+
+def test_ipv4_udp_has_no_tcp_fields():
+    info = parse_frame(ipv4_frame('10.0.0.1', '8.8.8.8', 5353, 53, proto=PROTO_UDP, payload=b'q' * 20))
+    assert (info.proto, info.sport, info.dport) == (PROTO_UDP, 5353, 53)
+    assert (info.window_size, info.tcp_flags) == (0, 0)
+    # Pa gjatësi nga kapja përdoret gjatësia e kornizës
+    assert info.length == 14 + 20 + 8 + 20
+
+def test_ipv6_tcp():
+    info = parse_frame(ipv6_frame('2001:db8::1', '2001:db8::2', 40000, 22, flags=0x02, hop_limit=60))
+    assert (info.src_ip, info.dst_ip, info.dport, info.ttl, info.tcp_flags) == (
+        '2001:db8::1', '2001:db8::2', 22, 60, 0x02
+    )
+
+def test_vlan_and_other_link_types():
+    frame = ipv4_frame('10.0.0.1', '10.0.0.2', 1000, 2000)
+    ip = frame[14:]
+    vlan = frame[:12] + b'\x81\x00' + struct.pack('!HH', 7, 0x0800) + ip
+    sll = b'\x00' * 14 + b'\x08\x00' + ip
+    null = struct.pack('=I', 2) + ip
+    for buf, linktype in ((vlan, 1), (ip, LINKTYPE_RAW), (sll, LINKTYPE_LINUX_SLL), (null, LINKTYPE_NULL)):
+        info = parse_frame(buf, linktype)
+        assert info.flow_key() == ('10.0.0.1', '10.0.0.2', 1000, 2000, PROTO_TCP), linktype
+
+def test_options_in_ipv4_header_move_the_transport_offset():
+    frame = ipv4_frame('10.0.0.1', '10.0.0.2', 1000, 2000)
+    ip = bytearray(frame[14:34])
+    ip[0] = 0x46
+    info = parse_frame(frame[:14] + bytes(ip) + b'\x01\x01\x01\x00' + frame[34:])
+    assert (info.sport, info.dport) == (1000, 2000)
+
+def test_truncated_and_unsupported_frames_return_none():
+    frame = ipv4_frame('10.0.0.1', '10.0.0.2', 1000, 2000)
+    assert parse_frame(frame[:14 + 20 + 10]) is None
+    assert parse_frame(frame[:10]) is None
+    assert parse_frame(b'\x00' * 12 + b'\x08\x06' + b'\x00' * 28) is None
+    icmp = bytearray(frame)
+    icmp[14 + 9] = 1
+    assert parse_frame(bytes(icmp)) is None
+    assert parse_frame(frame, linktype=999) is None
+
+def test_tuple_round_trip():
+    info = PacketInfo(1.0, '10.0.0.1', '10.0.0.2', 1, 2, PROTO_UDP, 60, 64)
+    assert PacketInfo.from_tuple(info.as_tuple()).as_tuple() == info.as_tuple()
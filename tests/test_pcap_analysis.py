@@ -0,0 +1,37 @@
+import os
+import time
+import pytest
+import pcap_analysis
+
+scapy_all = pytest.importorskip('scapy.all')
+
+def write_pcap(path, count=64):
+    packets = [
+        scapy_all.Ether() / scapy_all.IP(src='10.0.0.1', dst=f"10.0.1.{i % 250 + 1}")
+        / scapy_all.TCP(sport=40000 + i, dport=443)
+        for i in range(count)
+    ]
+    scapy_all.wrpcap(path, packets)
+
+def crashing_worker(chunk_queue, result_queue, *args):
+    chunk_queue.get()
+    os._exit(3)
+
+def silent_worker(chunk_queue, result_queue, *args):
+    os._exit(0)
+
+@pytest.mark.parametrize('worker', [crashing_worker, silent_worker])
+def test_dead_worker_aborts_instead_of_hanging(tmp_path, monkeypatch, worker):
+    """Procesi që vdes nuk bllokon prindin te put() ose get() i radhëve"""
+    if pcap_analysis.multiprocessing.get_start_method() != 'fork':
+        pytest.skip('procesi zëvendësues kërkon fork')
+    pcap = str(tmp_path / 'trace.pcap')
+    report = str(tmp_path / 'report.jsonl')
+    write_pcap(pcap)
+    monkeypatch.setattr(pcap_analysis, 'score_worker', worker)
+
+    started = time.monotonic()
+    with pytest.raises(RuntimeError):
+        pcap_analysis.run_pcap_analysis(pcap, report, workers=2, chunk_size=1, queue_chunks=1)
+    assert time.monotonic() - started < 30
+    assert not any(name.startswith('report.jsonl.part') for name in os.listdir(tmp_path))
@@ -0,0 +1,59 @@
+import os
+from flow_table import PROTO_TCP, PROTO_UDP
+from process_attribution import SocketProcessIndex
+
+LOCAL_IP = '192.168.1.10'
+REMOTE_IP = '203.0.113.7'
+
+def make_index(endpoints):
+    index = SocketProcessIndex(local_addresses=[LOCAL_IP])
+    index.endpoints = endpoints
+    index.process_info = lambda pid: {'pid': pid}
+    return index
+
+def test_return_traffic_goes_to_client_not_wildcard_listener():
+    """Përgjigja nga remote:22 i përket klientit ssh lokal, jo sshd-së në 0.0.0.0:22"""
+    index = make_index({('0.0.0.0', 22, PROTO_TCP): 100, (LOCAL_IP, 51000, PROTO_TCP): 200})
+    assert index.lookup(REMOTE_IP, 22, LOCAL_IP, 51000, PROTO_TCP) == {'pid': 200}
+    assert index.lookup(LOCAL_IP, 51000, REMOTE_IP, 22, PROTO_TCP) == {'pid': 200}
+
+def test_wildcard_listener_matches_only_local_endpoint():
+    index = make_index({('0.0.0.0', 443, PROTO_TCP): 100})
+    # Lidhje hyrëse te serveri lokal
+    assert index.lookup(REMOTE_IP, 40000, LOCAL_IP, 443, PROTO_TCP) == {'pid': 100}
+    # Trafik nga remote:443 te një port lokal pa socket nuk i atribuohet serverit
+    assert index.lookup(REMOTE_IP, 443, LOCAL_IP, 40000, PROTO_TCP) is None
+
+def test_unconnected_udp_socket_on_wildcard():
+    index = make_index({('0.0.0.0', 45000, PROTO_UDP): 300})
+    assert index.lookup('9.9.9.9', 53, LOCAL_IP, 45000, PROTO_UDP) == {'pid': 300}
+
+def test_miss_refresh_is_rate_limited():
+    index = make_index({})
+    for _ in range(1000):
+        assert index.lookup(REMOTE_IP, 443, LOCAL_IP, 40000, PROTO_TCP) is None
+    assert index.stats['misses'] == 1000
+    assert index.stats['miss_refreshes'] == 1
+    assert index.refresh_requested.is_set()
+
+def test_orphan_socket_is_rescanned_after_retry_interval(tmp_path):
+    (tmp_path / 'net').mkdir()
+    # 192.168.1.10:51000, inode 4242
+    (tmp_path / 'net' / 'tcp').write_text(
+        "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+        "   0: 0A01A8C0:C738 077100CB:0016 01 00000000:00000000 00:00000000 00000000  1000        0 4242\n"
+    )
+    index = SocketProcessIndex(proc_root=str(tmp_path), orphan_retry_refreshes=3)
+    index.refresh()
+    assert index.endpoints == {} and 4242 in index.orphan_inodes
+
+    # Procesi bëhet i dukshëm pas skanimit të parë (garë me krijimin e socket-it)
+    (tmp_path / '1234' / 'fd').mkdir(parents=True)
+    os.symlink('socket:[4242]', tmp_path / '1234' / 'fd' / '3')
+    scans = index.stats['fd_scans']
+    index.refresh()
+    index.refresh()
+    assert index.endpoints == {} and index.stats['fd_scans'] == scans
+    index.refresh()
+    assert index.endpoints == {(LOCAL_IP, 51000, PROTO_TCP): 1234}
+    assert index.orphan_inodes == {}
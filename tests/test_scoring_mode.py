@@ -0,0 +1,37 @@
+import pytest
+import main
+from flow_table import PROTO_TCP
+from packet_parser import PacketInfo
+
+LOCAL_IP = '192.168.1.10'
+
+def tcp(src, dst, sport, dport, flags, length=60):
+    return PacketInfo(0.0, src, dst, sport, dport, PROTO_TCP, length, 64, 65535, flags)
+
+def test_flow_scoring_does_not_build_packet_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    firewall = main.ZeroTrustFirewall(
+        interactive=False,
+        metrics_enabled=False,
+        state_path=str(tmp_path / 'firewall_state.db'),
+        local_addresses=[LOCAL_IP],
+        scoring_mode='flow',
+        scan_detection=False
+    )
+    try:
+        # process_packet kap gabimet, prandaj thirrjet numërohen në vend që të ngrihet përjashtim
+        calls = []
+        monkeypatch.setattr(main, 'packet_feature_row', lambda flow, info: calls.append(info))
+        for i in range(10):
+            firewall.process_packet(tcp(LOCAL_IP, '93.184.216.34', 50000, 443, 0x18, 400))
+        assert calls == []
+        assert len(firewall.flow_table) == 1 and len(firewall.flow_features) == 1
+    finally:
+        firewall.state_store.stop()
+
+def test_pcap_analysis_rejects_flow_scoring(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main.parse_args(['--pcap', 'trafik.pcap', '--scoring', 'flow'])
+    assert exit_info.value.code == 2
+    assert '--scoring flow' in capsys.readouterr().err
+    assert main.parse_args(['--pcap', 'trafik.pcap']).scoring == 'packet'
@@ -0,0 +1,100 @@
+from flow_table import PROTO_TCP, PROTO_UDP
+from packet_parser import PacketInfo
+from sketch_detector import (
+    SketchScanDetector, CountMinSketch, SCAN_PORTS, SCAN_HOSTS, FLOOD_SOURCE
+)
+
+SYN, SYN_ACK, ACK = 0x02, 0x12, 0x10
+LOCAL_IP = '192.168.1.10'
+SCANNER = '203.0.113.5'
+
+def tcp(src, dst, sport, dport, flags, now=0.0):
+    return PacketInfo(now, src, dst, sport, dport, PROTO_TCP, 60, 64, 65535, flags)
+
+def udp(src, dst, sport, dport, now=0.0):
+    return PacketInfo(now, src, dst, sport, dport, PROTO_UDP, 80, 64)
+
+def detector(**options):
+    return SketchScanDetector(is_local=lambda ip: ip == LOCAL_IP, **options)
+
+def run(sketches, packets):
+    return [d for d in (sketches.update(info, now=info.timestamp) for info in packets) if d is not None]
+
+def test_inbound_syn_scan_is_keyed_on_scanner():
+    sketches = detector()
+    detections = run(sketches, [tcp(SCANNER, LOCAL_IP, 40000, port, SYN) for port in range(1, 1025)])
+    assert detections and detections[0][:2] == (SCAN_PORTS, SCANNER)
+    # Portat e mbyllura përgjigjen me RST/ACK dhe portat e hapura me SYN/ACK: asnjë nuk numërohet
+    replies = [tcp(LOCAL_IP, SCANNER, port, 40000, SYN_ACK) for port in range(1, 1025)]
+    assert run(sketches, replies) == []
+
+def test_cdn_acks_to_many_local_ports_are_not_a_port_scan():
+    sketches = detector()
+    packets = [tcp('151.101.1.1', LOCAL_IP, 443, 50000 + i, ACK) for i in range(100)]
+    assert run(sketches, packets) == []
+    assert sketches.counters['initiating'] == 0
+
+def test_local_browsing_is_not_a_host_sweep():
+    sketches = detector()
+    packets = []
+    for i in range(40):
+        server = f"93.184.0.{i + 1}"
+        packets.append(tcp(LOCAL_IP, server, 50000 + i, 443, SYN))
+        packets.append(tcp(server, LOCAL_IP, 443, 50000 + i, SYN_ACK))
+        packets.append(tcp(LOCAL_IP, server, 50000 + i, 443, ACK))
+    assert run(sketches, packets) == []
+
+def test_local_host_sweep_uses_its_own_threshold():
+    sketches = detector(local_host_threshold=128)
+    packets = [tcp(LOCAL_IP, f"10.0.{i // 250}.{i % 250 + 1}", 50000 + i, 445, SYN) for i in range(1000)]
+    detections = run(sketches, packets)
+    assert detections[0][:2] == (SCAN_HOSTS, LOCAL_IP)
+    assert detections[0][2] >= 128
+
+def test_remote_host_sweep_is_detected():
+    sketches = detector()
+    packets = [tcp(SCANNER, f"192.168.1.{i}", 40000, 22, SYN) for i in range(1, 255)]
+    assert run(sketches, packets)[0][:2] == (SCAN_HOSTS, SCANNER)
+
+def test_udp_replies_are_not_counted_but_first_packets_are():
+    sketches = detector()
+    queries = [udp(LOCAL_IP, '9.9.9.9', 40000 + i, 53) for i in range(200)]
+    answers = [udp('9.9.9.9', LOCAL_IP, 53, 40000 + i) for i in range(200)]
+    assert run(sketches, queries + answers) == []
+    # Tabela e lidhjeve është me hash: një përplasje e rrallë mund të numërojë një përgjigje
+    assert 200 <= sketches.counters['initiating'] <= 205
+    # Një skanim UDP numërohet nga paketa e parë e secilës lidhje
+    probes = [udp(SCANNER, LOCAL_IP, 40000, port) for port in range(1, 200)]
+    assert run(sketches, probes)[0][:2] == (SCAN_PORTS, SCANNER)
+
+def test_syn_flood_from_one_source():
+    sketches = detector(source_flood_packets=500, destination_flood_packets=10 ** 9)
+    packets = [tcp(SCANNER, LOCAL_IP, 1024 + i % 60000, 80, SYN) for i in range(600)]
+    kinds = [d[0] for d in run(sketches, packets)]
+    assert FLOOD_SOURCE in kinds
+
+def test_every_flooding_source_is_reported_once_per_window():
+    # top_k=1 kufizon raportimet në 64 çelësa; burimet e tjera largojnë më të vjetrit
+    sketches = detector(top_k=1, source_flood_packets=5, destination_flood_packets=10 ** 9)
+    packets = []
+    for source in range(100):
+        packets.extend(tcp(f"198.51.100.{source}", LOCAL_IP, 40000 + i, 80, SYN) for i in range(20))
+    detections = run(sketches, packets)
+    assert [d[0] for d in detections] == [FLOOD_SOURCE] * 100
+    assert sketches.counters['source_floods'] == 100
+
+def test_memory_stays_within_budget():
+    sketches = detector(memory_budget=1 << 20)
+    assert sketches.nbytes() <= 1 << 20
+    run(sketches, [tcp(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", LOCAL_IP, 1, 80, SYN) for i in range(20000)])
+    assert len(sketches.slots) <= sketches.capacity
+    assert sketches.counters['evicted_sources'] > 0
+
+def test_count_min_heavy_hitters():
+    sketch = CountMinSketch(width=256, depth=4, top_k=2)
+    for key, count in (('a', 50), ('b', 30), ('c', 5)):
+        for _ in range(count):
+            sketch.add(key)
+    assert [key for key, _ in sketch.heavy_hitters()] == ['a', 'b']
+    sketch.decay()
+    assert dict(sketch.heavy_hitters())['a'] == 25
@@ -0,0 +1,38 @@
+import os
+import sys
+import random
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+import traffic_suite
+
+@pytest.fixture
+def firewall(tmp_path, monkeypatch):
+    # Modeli i trajnuar lexohet nga rrënja e repo-s
+    monkeypatch.chdir(REPO_ROOT)
+    firewall = traffic_suite.create_firewall(str(tmp_path), shard_workers=0, train=False)
+    yield firewall
+    traffic_suite.shutdown(firewall)
+
+@pytest.mark.parametrize('profile', traffic_suite.PROFILES)
+def test_profile_keeps_invariants(firewall, profile):
+    rng = random.Random(1)
+    packets = traffic_suite.GENERATORS[profile](rng, traffic_suite.TrafficClock(rng), 5000)
+    traffic_suite.feed(firewall, packets)
+    assert traffic_suite.check_invariants(firewall) == []
+    if profile == 'syn_scan':
+        # Skaneri izolohet, hosti i skanuar jo
+        assert {info.src_ip for info in packets} <= firewall.quarantined_ips
+
+def test_soak_keeps_invariants_under_small_limits(firewall):
+    # Kapacitete të vogla që trafiku i soak-ut t'i mbushë shpejt
+    firewall.flow_table.capacity = 512
+    firewall.verdict_cache.capacity = 256
+    firewall.alerts.capacity = 16
+    rng = random.Random(2)
+    clock = traffic_suite.TrafficClock(rng)
+    for _ in range(4):
+        traffic_suite.feed(firewall, traffic_suite.mixed(rng, clock, 5000))
+        assert traffic_suite.check_invariants(firewall) == []
+    assert len(firewall.flow_table) == 512
@@ -0,0 +1,35 @@
+from verdict_cache import VerdictCache, VERDICT_ALLOW, VERDICT_BLOCK
+
+FLOW = ('10.0.0.1', '93.184.216.34', 50000, 443, 6)
+
+def test_flow_verdict_expires_after_ttl():
+    cache = VerdictCache(flow_ttl=10.0)
+    assert cache.lookup(FLOW, FLOW[1], now=0.0) is None
+    cache.store_flow(FLOW, VERDICT_ALLOW, 0.1, now=0.0)
+    assert cache.lookup(FLOW, FLOW[1], now=5.0).verdict == VERDICT_ALLOW
+    assert cache.lookup(FLOW, FLOW[1], now=11.0) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expired']) == (1, 2, 1)
+
+def test_flow_is_rescored_after_packet_budget():
+    cache = VerdictCache(rescore_packets=3)
+    cache.store_flow(FLOW, VERDICT_ALLOW, now=0.0)
+    results = [cache.lookup(FLOW, FLOW[1], now=1.0) for _ in range(4)]
+    assert [entry is not None for entry in results] == [True, True, False, False]
+
+def test_destination_verdict_covers_every_flow():
+    cache = VerdictCache()
+    cache.store_destination(FLOW[1], VERDICT_BLOCK, now=0.0)
+    other = ('10.0.0.1', FLOW[1], 50001, 80, 6)
+    assert cache.lookup(other, FLOW[1], now=1.0).verdict == VERDICT_BLOCK
+    cache.invalidate_destination(FLOW[1])
+    assert cache.lookup(other, FLOW[1], now=1.0) is None
+
+def test_capacity_is_bounded():
+    cache = VerdictCache(capacity=4)
+    for port in range(10):
+        cache.store_flow(('10.0.0.1', '10.0.0.2', port, 443, 6), VERDICT_ALLOW, now=0.0)
+    stats = cache.stats()
+    assert stats['flow_entries'] == 4 and stats['evicted'] == 6
+    assert cache.lookup(('10.0.0.1', '10.0.0.2', 9, 443, 6), '10.0.0.2', now=1.0) is not None
+    assert cache.lookup(('10.0.0.1', '10.0.0.2', 0, 443, 6), '10.0.0.2', now=1.0) is None
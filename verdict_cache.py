@@ -0,0 +1,104 @@
+import time
+import threading
+from collections import OrderedDict
+
+# Vendimet që ruhen në cache
+VERDICT_ALLOW = 'allow'
+VERDICT_BLOCK = 'block'
+VERDICT_SUSPICIOUS = 'suspicious'
+
+class CachedVerdict:
+    """Vendim i ruajtur me afat kohor dhe numër paketash deri në ripikëzim"""
+    __slots__ = ('verdict', 'score', 'expires', 'packets_left')
+
+    def __init__(self, verdict, score, expires, packets_left):
+        self.verdict = verdict
+        self.score = score
+        self.expires = expires
+        self.packets_left = packets_left
+
+class VerdictCache:
+    """Cache vendimesh sipas lidhjes dhe destinacionit që anashkalon ML për trafikun e vendosur"""
+
+    def __init__(self, flow_ttl=30.0, destination_ttl=300.0, rescore_packets=200, capacity=65536):
+        self.flow_ttl = flow_ttl
+        self.destination_ttl = destination_ttl
+        self.rescore_packets = max(1, int(rescore_packets))
+        self.capacity = max(1, int(capacity))
+        self.flows = OrderedDict()
+        self.destinations = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {
+            'hits': 0,
+            'misses': 0,
+            'flow_hits': 0,
+            'destination_hits': 0,
+            'expired': 0,
+            'evicted': 0
+        }
+
+    def lookup(self, flow_key, dst_ip, now=None):
+        """Kthe vendimin e vlefshëm për paketën, ose None nëse duhet pikëzuar me ML"""
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            entry = self.destinations.get(dst_ip)
+            if entry is not None:
+                if entry.expires > now:
+                    self.counters['hits'] += 1
+                    self.counters['destination_hits'] += 1
+                    return entry
+                del self.destinations[dst_ip]
+                self.counters['expired'] += 1
+
+            entry = self.flows.get(flow_key)
+            if entry is not None:
+                entry.packets_left -= 1
+                if entry.expires > now and entry.packets_left > 0:
+                    self.flows.move_to_end(flow_key)
+                    self.counters['hits'] += 1
+                    self.counters['flow_hits'] += 1
+                    return entry
+                # Afati ose numri i paketave mbaroi: lidhja ripikëzohet
+                del self.flows[flow_key]
+                self.counters['expired'] += 1
+
+            self.counters['misses'] += 1
+            return None
+
+    def store(self, table, key, verdict, score, ttl, now):
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            table[key] = CachedVerdict(verdict, score, now + ttl, self.rescore_packets)
+            table.move_to_end(key)
+            if len(table) > self.capacity:
+                table.popitem(last=False)
+                self.counters['evicted'] += 1
+
+    def store_flow(self, flow_key, verdict, score=None, now=None):
+        """Ruaj vendimin për një lidhje deri në ripikëzimin e radhës"""
+        self.store(self.flows, flow_key, verdict, score, self.flow_ttl, now)
+
+    def store_destination(self, dst_ip, verdict, now=None):
+        """Ruaj vendimin për të gjitha lidhjet drejt një destinacioni"""
+        self.store(self.destinations, dst_ip, verdict, None, self.destination_ttl, now)
+
+    def invalidate_destination(self, dst_ip):
+        with self.lock:
+            self.destinations.pop(dst_ip, None)
+
+    def clear(self):
+        with self.lock:
+            self.flows.clear()
+            self.destinations.clear()
+
+    def stats(self):
+        """Kthe numëruesit dhe shkallën e goditjeve të cache-it"""
+        with self.lock:
+            stats = dict(self.counters)
+            stats['flow_entries'] = len(self.flows)
+            stats['destination_entries'] = len(self.destinations)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats